@@ -0,0 +1,67 @@
+"""
+Benchmark: sniff opens and bytes avoided by classifying files by name.
+
+Walks a tree (default: a synthetic one, see synthtree.py; or ``--root``)
+with the extension classifier on and off, without the scan cache or git,
+and prints time plus the sniff counters from ``stats.STATS``. Both walks
+must keep the same files.
+
+    python benchmarks/bench_classify.py --files 20000 --binary-ratio 0.2
+    python benchmarks/bench_classify.py --root ~/src/monorepo
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import synthtree
+
+from collector.config import CollectorConfig
+from collector.discovery import walk
+from collector.stats import STATS
+
+
+def run(root: Path, classify: bool, repeat: int) -> tuple[float, dict[str, int], list[str]]:
+    best, counts, kept = float("inf"), {}, []
+    for _ in range(repeat):
+        STATS.reset()
+        config = CollectorConfig(root=root, classify=classify)
+        start = time.perf_counter()
+        entries = list(walk(config))
+        best = min(best, time.perf_counter() - start)
+        counts, kept = dict(STATS.counts), [e.rel_path.as_posix() for e in entries]
+    return best, counts, kept
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--root", type=Path, help="Walk this tree instead of a synthetic one.")
+    parser.add_argument("--repeat", type=int, default=3, help="Walks per mode (best kept).")
+    synthtree.add_arguments(parser)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = args.root
+        if root is None:
+            root = Path(tmp) / "tree"
+            synthtree.generate(root, synthtree.spec_from(args))
+        results = {label: run(root, on, args.repeat) for label, on in (("sniff", False),
+                                                                      ("classify", True))}
+
+    cols = ("sniff_opens", "sniff_bytes", "classify_opens_avoided", "classify_bytes_avoided")
+    print(f"{'mode':<10} {'seconds':>8} {'files':>8} " + " ".join(f"{c:>23}" for c in cols))
+    for label, (seconds, counts, kept) in results.items():
+        cells = " ".join(f"{counts.get(c, 0):>23,}" for c in cols)
+        print(f"{label:<10} {seconds:>8.3f} {len(kept):>8,} {cells}")
+    if results["sniff"][2] != results["classify"][2]:
+        print("\nthe two walks kept different files", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
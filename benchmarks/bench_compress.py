@@ -0,0 +1,114 @@
+"""
+Benchmark: compressing while rendering vs. rendering then compressing.
+
+Builds a tree of text files (or uses ``--root``) and, for each codec, times
+(a) rendering an uncompressed bundle and compressing it in a second pass, and
+(b) ``--compress``-style one-pass output with 1 and ``--jobs`` threads.
+Checks every variant decompresses to the same bundle.
+
+    python benchmarks/bench_compress.py --files 2000 --jobs 8
+    python benchmarks/bench_compress.py --root ~/src/monorepo --codec xz
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import hashlib
+import lzma
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from bench_walk import make_tree
+
+from collector.compress import CODECS, SUFFIXES, CompressionError, compressed_writer
+from collector.config import CollectorConfig
+from collector.discovery import walk
+from collector.formatters import render_to
+
+
+def _digest_of(path: Path, codec: str) -> str:
+    if codec == "gzip":
+        opener = gzip.open
+    elif codec == "xz":
+        opener = lzma.open
+    else:
+        import zstandard
+
+        def opener(p: Path, mode: str):  # noqa: ANN202
+            return zstandard.open(p, mode)
+    digest = hashlib.sha256()
+    with opener(path, "rb") as fh:
+        while chunk := fh.read(1 << 20):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def one_pass(entries: list, out: Path, codec: str, jobs: int) -> float:
+    start = time.perf_counter()
+    with out.open("wb") as fh, compressed_writer(fh, codec, jobs) as stream:
+        render_to(entries, "md", stream)
+    return time.perf_counter() - start
+
+
+def two_pass(entries: list, tmp: Path, out: Path, codec: str) -> float:
+    start = time.perf_counter()
+    plain = tmp / "plain.md"
+    with plain.open("wb") as fh:
+        render_to(entries, "md", fh)
+    with plain.open("rb") as src, out.open("wb") as fh, compressed_writer(fh, codec) as dst:
+        shutil.copyfileobj(src, dst, 1 << 20)
+    return time.perf_counter() - start
+
+
+def run(root: Path, args: argparse.Namespace, tmp: Path) -> int:
+    entries = list(walk(CollectorConfig(root=root, use_cache=False)))
+    print(f"{len(entries):,} files")
+    print(f"{'codec':<6} {'variant':<22} {'seconds':>8} {'MB out':>8}")
+    status = 0
+    for codec in args.codec or CODECS:
+        out = tmp / f"bundle{SUFFIXES[codec]}"
+        variants = [
+            ("render, then compress", lambda o, c=codec: two_pass(entries, tmp, o, c)),
+            ("one pass, 1 thread", lambda o, c=codec: one_pass(entries, o, c, 1)),
+            (f"one pass, {args.jobs} threads", lambda o, c=codec, j=args.jobs: one_pass(
+                entries, o, c, j
+            )),
+        ]
+        digests = set()
+        for name, fn in variants:
+            try:
+                seconds = fn(out)
+            except CompressionError as e:
+                print(f"{codec:<6} skipped: {e}")
+                break
+            digests.add(_digest_of(out, codec))
+            print(f"{codec:<6} {name:<22} {seconds:>8.3f} {out.stat().st_size / 1e6:>8.2f}")
+        if len(digests) > 1:
+            print(f"error: {codec} variants decompress to different bundles")
+            status = 1
+    return status
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--root", type=Path, help="Existing tree (default: synthetic).")
+    parser.add_argument("--files", type=int, default=2_000)
+    parser.add_argument("--jobs", type=int, default=4)
+    parser.add_argument("--codec", action="append", choices=CODECS)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.root is not None:
+            return run(args.root.resolve(), args, Path(tmp))
+        root = Path(tmp) / "tree"
+        root.mkdir()
+        make_tree(root, args.files)
+        return run(root, args, Path(tmp))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+"""
+Benchmark: enumerating a git work tree with ``git ls-files`` vs. walking it.
+
+Builds a synthetic repository (or uses ``--root``), warms a throwaway scan
+cache so binary sniffing is out of the picture, then times ``walk()`` with
+the filesystem walker and with the git index backend, and checks both yield
+the same files in the same order.
+
+    python benchmarks/bench_gitindex.py --files 50000
+    python benchmarks/bench_gitindex.py --root ~/src/monorepo --tracked-only
+"""
+
+from __future__ import annotations
+
+import argparse
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import replace
+from pathlib import Path
+
+from bench_walk import make_tree
+
+from collector.cache import ScanCache
+from collector.config import CollectorConfig
+from collector.discovery import walk
+from collector.gitindex import git_candidates
+from collector.ignore import IgnoreMatcher
+
+
+def make_repo(root: Path, n_files: int) -> None:
+    make_tree(root, n_files)
+    git = ["git", "-c", "user.name=bench", "-c", "user.email=bench@example.invalid"]
+    subprocess.run([*git, "init", "-q"], cwd=root, check=True)
+    subprocess.run([*git, "add", "-A"], cwd=root, check=True)
+    subprocess.run([*git, "commit", "-q", "-m", "bench"], cwd=root, check=True)
+
+
+def best_of(repeat: int, fn) -> tuple[float, object]:  # noqa: ANN001
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def run(root: Path, args: argparse.Namespace, cache_dir: Path) -> int:
+    config = CollectorConfig(
+        root=root, jobs=args.jobs, git_index=True, git_untracked=not args.tracked_only
+    )
+    cache = ScanCache.open(root, directory=cache_dir)
+    list(walk(config, cache))
+    if cache is not None:
+        cache.flush()
+
+    walker = replace(config, git_index=False)
+    matcher = IgnoreMatcher(root.resolve(), config)
+    listed_s, listed = best_of(args.repeat, lambda: git_candidates(root, config, matcher))
+    walk_s, by_walk = best_of(args.repeat, lambda: [e.rel_path for e in walk(walker, cache)])
+    git_s, by_git = best_of(args.repeat, lambda: [e.rel_path for e in walk(config, cache)])
+
+    print(f"{'backend':<22} {'seconds':>8} {'files':>8}")
+    print(f"{'walker':<22} {walk_s:>8.3f} {len(by_walk):>8,}")
+    print(f"{'git index':<22} {git_s:>8.3f} {len(by_git):>8,}")
+    print(f"{'  enumeration only':<22} {listed_s:>8.3f} {len(listed or []):>8,}")
+    if by_walk != by_git:
+        print("note: results differ (tracked-but-ignored files or submodules?)")
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--root", type=Path, help="Existing work tree (default: synthetic).")
+    parser.add_argument("--files", type=int, default=20_000)
+    parser.add_argument("--jobs", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--tracked-only", action="store_true")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_dir = Path(tmp) / "cache"
+        if args.root is not None:
+            return run(args.root.resolve(), args, cache_dir)
+        root = Path(tmp) / "repo"
+        root.mkdir()
+        make_repo(root, args.files)
+        return run(root, args, cache_dir)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,51 @@
+"""
+Benchmark: opens and bytes saved by handing sniffed content to the renderers.
+
+Walks a tree (default: this checkout), renders it to /dev/null with and
+without the handoff, and prints the read counters from ``stats.STATS``.
+
+    python benchmarks/bench_handoff.py --root ~/src/monorepo --format xml
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+from collector.config import CollectorConfig
+from collector.discovery import walk
+from collector.formatters import render_to
+from collector.stats import STATS
+
+
+def run(root: Path, fmt: str, budget: int) -> tuple[float, dict[str, int]]:
+    STATS.reset()
+    start = time.perf_counter()
+    entries = list(walk(CollectorConfig(root=root, handoff_budget=budget)))
+    with Path(os.devnull).open("wb") as sink:
+        render_to(entries, fmt, sink)
+    elapsed = time.perf_counter() - start
+    return elapsed, {**STATS.counts, "files": len(entries)}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--root", type=Path, default=Path(__file__).resolve().parent.parent)
+    parser.add_argument("--format", default="md")
+    args = parser.parse_args()
+
+    default_budget = CollectorConfig().handoff_budget
+    cols = ("files", "sniff_opens", "read_opens", "read_bytes", "opens_saved", "bytes_saved")
+    print(f"{'mode':<12} {'seconds':>8} " + " ".join(f"{c:>12}" for c in cols))
+    for label, budget in (("no handoff", 0), ("handoff", default_budget)):
+        elapsed, counters = run(args.root, args.format, budget)
+        cells = " ".join(f"{counters.get(c, 0):>12,}" for c in cols)
+        print(f"{label:<12} {elapsed:>8.3f} {cells}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
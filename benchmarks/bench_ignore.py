@@ -0,0 +1,106 @@
+"""
+Benchmark: regex evaluations per file, compiled ignore engine vs. the legacy checks.
+
+Builds a synthetic tree with a large root .gitignore, nested .gitignore files
+and CLI exclude/include globs, then counts pattern evaluations made by the
+legacy walker (one per pattern per PathSpec.match_file / fnmatch call) and by
+``ignore.IgnoreMatcher``.
+
+    python benchmarks/bench_ignore.py --files 20000 --patterns 200
+"""
+
+from __future__ import annotations
+
+import argparse
+import fnmatch
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pathspec
+from bench_walk import legacy_walk, make_tree
+
+from collector import ignore
+from collector.config import CollectorConfig
+from collector.discovery import walk
+
+
+def write_ignores(root: Path, n_patterns: int) -> None:
+    lines = [f"generated_{i}/" if i % 3 == 0 else f"*.gen{i}" for i in range(n_patterns)]
+    (root / ".gitignore").write_text("\n".join(["*.log", *lines, "!keep.gen1"]) + "\n")
+    for i, d in enumerate(sorted(p for p in root.iterdir() if p.is_dir())[:20]):
+        (d / ".gitignore").write_text(f"*.tmp{i}\n/local_{i}/\n")
+
+
+def count_legacy(config: CollectorConfig) -> tuple[float, int, int]:
+    evals = 0
+    match_file = pathspec.PathSpec.match_file
+    name_match = fnmatch.fnmatch
+
+    def counting_match_file(self, file):  # noqa: ANN001
+        nonlocal evals
+        evals += len(self.patterns)
+        return match_file(self, file)
+
+    def counting_fnmatch(name, pat):  # noqa: ANN001
+        nonlocal evals
+        evals += 1
+        return name_match(name, pat)
+
+    pathspec.PathSpec.match_file = counting_match_file  # type: ignore[method-assign]
+    fnmatch.fnmatch = counting_fnmatch
+    try:
+        start = time.perf_counter()
+        n = sum(1 for _ in legacy_walk(config))
+        return time.perf_counter() - start, evals, n
+    finally:
+        pathspec.PathSpec.match_file = match_file  # type: ignore[method-assign]
+        fnmatch.fnmatch = name_match
+
+
+def count_compiled(config: CollectorConfig) -> tuple[float, int, int]:
+    matchers: list[ignore.IgnoreMatcher] = []
+    init = ignore.IgnoreMatcher.__init__
+
+    def capturing_init(self, *args, **kwargs):  # noqa: ANN001, ANN002, ANN003
+        init(self, *args, **kwargs)
+        matchers.append(self)
+
+    ignore.IgnoreMatcher.__init__ = capturing_init  # type: ignore[method-assign]
+    try:
+        start = time.perf_counter()
+        n = sum(1 for _ in walk(config))
+        # The built-in name globs are one precompiled regex per check.
+        return time.perf_counter() - start, sum(m.evaluations for m in matchers), n
+    finally:
+        ignore.IgnoreMatcher.__init__ = init  # type: ignore[method-assign]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--files", type=int, default=10_000)
+    parser.add_argument("--patterns", type=int, default=100, help="Root .gitignore patterns.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        make_tree(root, args.files)
+        write_ignores(root, args.patterns)
+        config = CollectorConfig(
+            root=root,
+            exclude_globs=["**/File_0001*", "*.snap", "docs/"],
+            include_globs=["**/*.py", "**/*.ts", "**/*.md"],
+            use_cache=False,
+        )
+        legacy = count_legacy(config)
+        compiled = count_compiled(config)
+
+    print(f"{'engine':<10} {'seconds':>8} {'regex evals':>12} {'per file':>9} {'files':>7}")
+    for name, (seconds, evals, n) in (("legacy", legacy), ("compiled", compiled)):
+        print(f"{name:<10} {seconds:>8.3f} {evals:>12,} {evals / max(n, 1):>9.1f} {n:>7,}")
+    return 0 if legacy[2] == compiled[2] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,149 @@
+"""
+Benchmark: startup latency of a short `collect` run, against a budget.
+
+Every measurement is a fresh interpreter, best of ``--repeat``:
+
+    baseline   `python -c pass`
+    import     `import collector.cli`, as `-X importtime` reports it
+    run        `python -m collector py -a -q -o <tmp>` on a small synthetic tree
+               (``--files``), with the daemon bypassed
+
+and lists the modules the quiet run imported that cost the most. The run
+fails (exit 1) if importing the CLI takes more than ``--budget-ms``, or if the
+quiet run loaded a module only some options need: Rich (tables, prompts),
+pyperclip (--copy), tiktoken (--tokens), asyncio (the async API), the token
+process pool, or ctypes (--watch). A dependency that imports one of these
+itself (typing_extensions, loaded by pathspec, pulls in part of asyncio) is
+reported but doesn't fail the run.
+
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --budget-ms 80 --repeat 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+import synthtree
+
+# Modules a `collect py -a -q -o FILE` run must not import, and who needs them.
+LAZY = {
+    "rich": "tables and prompts",
+    "pyperclip": "--copy",
+    "tiktoken": "--tokens",
+    "asyncio": "the async API",
+    "concurrent.futures.process": "parallel token counting",
+    "ctypes": "--watch",
+    "collector.transforms": "--transform and --outline",
+}
+
+
+@dataclass
+class Module:
+    own_us: int
+    cumulative_us: int
+    parent: str | None = None  # the module whose import led to this one
+
+
+def _importtime(args: list[str], env: dict[str, str]) -> tuple[float, dict[str, Module]]:
+    """Wall seconds of ``python -X importtime args``, and what it imported, by module name."""
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        env=env, capture_output=True, text=True, check=False,
+    )
+    elapsed = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(f"{' '.join(args)} failed:\n{proc.stderr[-2000:]}")
+    modules: dict[str, Module] = {}
+    # A module is listed after the ones it imported, one level less indented.
+    waiting: list[tuple[int, str]] = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        own, cumulative, field = line[len("import time:"):].split("|")
+        if not own.strip().isdigit():
+            continue
+        name = field.strip()
+        depth = len(field) - len(field.lstrip())
+        for _, child in (w for w in waiting if w[0] > depth):
+            modules[child].parent = name
+        waiting = [w for w in waiting if w[0] <= depth]
+        waiting.append((depth, name))
+        modules[name] = Module(int(own), int(cumulative))
+    return elapsed, modules
+
+
+def _blame(name: str, modules: dict[str, Module]) -> str | None:
+    """The nearest third-party (not stdlib) module whose import led to ``name``."""
+    parent = modules[name].parent
+    while parent is not None:
+        if parent.partition(".")[0] not in sys.stdlib_module_names:
+            return parent
+        parent = modules[parent].parent
+    return None
+
+
+def _best(repeat: int, args: list[str], env: dict[str, str]):  # noqa: ANN202
+    runs = [_importtime(args, env) for _ in range(repeat)]
+    return min(runs, key=lambda run: run[0])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per measurement (best kept).")
+    parser.add_argument(
+        "--budget-ms", type=float, default=150.0, help="Allowed `import collector.cli` time."
+    )
+    parser.add_argument("--top", type=int, default=12, help="Slowest modules to list.")
+    synthtree.add_arguments(parser)
+    parser.set_defaults(files=200)
+    args = parser.parse_args()
+
+    env = {**os.environ, "COLLECTOR_NO_DAEMON": "1"}
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp) / "tree"
+        synthtree.generate(root, synthtree.spec_from(args))
+        env["XDG_CACHE_HOME"] = str(Path(tmp) / "cache")
+        base, _ = _best(args.repeat, ["-c", "pass"], env)
+        load, imported = _best(args.repeat, ["-c", "import collector.cli"], env)
+        out = str(Path(tmp) / "out.md")
+        cli = ["-m", "collector", "py", "-a", "-q", "--root", str(root), "-o", out]
+        run, run_modules = _best(args.repeat, cli, env)
+
+    import_ms = imported["collector.cli"].cumulative_us / 1000
+    print(f"{'measurement':<12} {'ms':>8}")
+    print(f"{'baseline':<12} {base * 1000:>8.1f}")
+    print(f"{'import':<12} {import_ms:>8.1f}   (budget {args.budget_ms:g})")
+    print(f"{'run':<12} {run * 1000:>8.1f}   ({(run - base) * 1000:.1f} over baseline)")
+
+    print(f"\nslowest imports of the run (self time), {len(run_modules)} modules:")
+    slowest = sorted(run_modules.items(), key=lambda kv: kv[1].own_us, reverse=True)
+    for name, module in slowest[:args.top]:
+        print(f"  {module.own_us / 1000:>7.1f} ms  {name}")
+
+    failed = False
+    if import_ms > args.budget_ms:
+        print(f"\nover budget: importing the CLI took {import_ms:.1f} ms > {args.budget_ms:g} ms")
+        failed = True
+    for module, needed_by in LAZY.items():
+        if module not in run_modules:
+            continue
+        culprit = _blame(module, run_modules)
+        if culprit is not None and not culprit.startswith("collector"):
+            print(f"\n{module} was imported by a dependency ({culprit}); not counted")
+            continue
+        print(f"\n{module} was imported by a quiet run; it should load only for {needed_by}")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,276 @@
+"""
+Benchmark suite: every pipeline phase on one synthetic tree, with baselines.
+
+Generates a deterministic tree (see ``synthtree``; every ``TreeSpec`` field is
+a flag) or uses ``--root``, then times each phase in a fresh process so its
+peak RSS is its own:
+
+    discovery     walk() with the filesystem walker, no scan cache
+    filtering     IgnoreMatcher decisions for every path, without I/O
+    sniffing      _looks_binary on every file in the tree (reads up to 8 KiB each)
+    render:<fmt>  render_to for each output format, into a temporary file
+    tokens        count_entries on the discovered files
+    cli           `python -m collector -a` end to end, as a subprocess
+
+Each phase reports best-of-N seconds, files/s, MB/s and peak RSS. ``--save``
+writes the results as JSON; ``--compare`` loads such a file and flags any
+phase that got slower (or bigger) by more than ``--threshold`` percent,
+exiting 1 if one did.
+
+    python benchmarks/bench_suite.py --files 20000 --save baseline.json
+    python benchmarks/bench_suite.py --files 20000 --compare baseline.json
+    python benchmarks/bench_suite.py --root ~/src/monorepo --phases discovery,render:md
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict
+from pathlib import Path
+
+import synthtree
+
+from collector.config import OutputFormat
+
+PHASES = (
+    "discovery", "filtering", "sniffing",
+    *(f"render:{fmt}" for fmt in OutputFormat.ALL),
+    "tokens", "cli",
+)
+RESULTS_VERSION = 1
+
+
+def _peak_rss() -> int | None:
+    """Peak resident set size of this process so far, in bytes."""
+    try:
+        import resource
+    except ImportError:
+        return None  # Windows
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _children_peak_rss() -> int | None:
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _best(repeat: int, fn) -> tuple[float, object]:  # noqa: ANN001
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+# Directory prefix -> (subdirectory names, (file name, size) pairs, has a .gitignore).
+Listing = dict[str, tuple[list[str], list[tuple[str, int]], bool]]
+
+
+def _list_tree(root: Path) -> Listing:
+    """Every directory's subdirectories and files, symlinks skipped, read up front."""
+    listing: Listing = {}
+    pending = [""]
+    while pending:
+        prefix = pending.pop()
+        dirs, files = [], []
+        with os.scandir(root / prefix) as it:
+            for entry in it:
+                if entry.is_symlink():
+                    continue
+                if entry.is_dir():
+                    dirs.append(entry.name)
+                    pending.append(f"{prefix}{entry.name}/")
+                else:
+                    files.append((entry.name, entry.stat().st_size))
+        listing[prefix] = (dirs, files, any(name == ".gitignore" for name, _ in files))
+    return listing
+
+
+def _filter_all(root: Path, listing: Listing, config) -> tuple[int, int]:  # noqa: ANN001
+    """Apply only the matcher's decisions to a pre-listed tree; returns (files kept, bytes)."""
+    from collector.ignore import IgnoreMatcher
+
+    matcher = IgnoreMatcher(root, config)
+    kept = size = 0
+    pending = [("", matcher.root_rules)]
+    while pending:
+        prefix, rules = pending.pop()
+        subdirs, files, has_gitignore = listing[prefix]
+        if has_gitignore:
+            rules = matcher.enter(rules, str(root / prefix / ".gitignore"), prefix)
+        for name in subdirs:
+            rel = prefix + name
+            if matcher.visit_dir(name, rel, rules):
+                pending.append((rel + "/", rules))
+        for name, n_bytes in files:
+            if matcher.keep_file(name, prefix + name, rules):
+                kept += 1
+                size += n_bytes
+    return kept, size
+
+
+def run_phase(phase: str, root: str, repeat: int) -> dict:
+    """Time one phase in this (fresh) process. Runs in a spawned worker."""
+    from collector.config import CollectorConfig
+    from collector.discovery import _looks_binary, walk
+    from collector.formatters import get_renderer, render_to
+    from collector.tokens import count_entries
+
+    base = Path(root)
+    config = CollectorConfig(root=base, use_cache=False)
+    result: dict[str, float | int | None] = {}
+    if phase == "cli":
+        with tempfile.TemporaryDirectory() as tmp:
+            cmd = [
+                sys.executable, "-m", "collector", "-a", "-q", "--no-cache",
+                "-r", root, "-o", str(Path(tmp) / "out.md"),
+            ]
+            seconds, _ = _best(repeat, lambda: subprocess.run(cmd, check=True))
+        entries = list(walk(config))
+        result.update(seconds=seconds, files=len(entries), bytes=sum(e.size for e in entries))
+        result["peak_rss"] = _children_peak_rss()
+        return result
+
+    if phase == "discovery":
+        seconds, entries = _best(repeat, lambda: list(walk(config)))
+        n_files, n_bytes = len(entries), sum(e.size for e in entries)
+    elif phase == "filtering":
+        listing = _list_tree(base)
+        seconds, (n_files, n_bytes) = _best(repeat, lambda: _filter_all(base, listing, config))
+    elif phase == "sniffing":
+        sizes = [
+            (base / prefix / name, size)
+            for prefix, (_dirs, files, _gitignore) in _list_tree(base).items()
+            for name, size in files
+        ]
+        seconds, _ = _best(repeat, lambda: [_looks_binary(path) for path, _size in sizes])
+        n_files, n_bytes = len(sizes), sum(min(size, 8192) for _path, size in sizes)
+    else:
+        entries = list(walk(config))
+        n_files, n_bytes = len(entries), sum(e.size for e in entries)
+        if phase == "tokens":
+            renderer = get_renderer(OutputFormat.MARKDOWN)
+            seconds, _ = _best(repeat, lambda: count_entries(entries, renderer))
+        else:
+            fmt = phase.partition(":")[2]
+            with tempfile.TemporaryDirectory() as tmp:
+                out = Path(tmp) / "bundle"
+
+                def render() -> int:
+                    with out.open("wb") as fh:
+                        return render_to(entries, fmt, fh)
+
+                seconds, _ = _best(repeat, render)
+    result.update(seconds=seconds, files=n_files, bytes=n_bytes, peak_rss=_peak_rss())
+    return result
+
+
+def measure(root: Path, phases: list[str], repeat: int) -> dict[str, dict]:
+    results = {}
+    spawn = multiprocessing.get_context("spawn")
+    for phase in phases:
+        with ProcessPoolExecutor(max_workers=1, mp_context=spawn) as pool:
+            r = pool.submit(run_phase, phase, str(root), repeat).result()
+        r["files_per_s"] = r["files"] / r["seconds"] if r["seconds"] else None
+        r["mb_per_s"] = r["bytes"] / 1e6 / r["seconds"] if r["seconds"] else None
+        results[phase] = r
+        _print_row(phase, r, None, 0)
+    return results
+
+
+def _pct(new: float | None, old: float | None) -> float | None:
+    return None if not new or not old else 100.0 * (new - old) / old
+
+
+def _print_row(phase: str, r: dict, old: dict | None, threshold: float) -> bool:
+    """Print one result line; returns True if it regressed against ``old``."""
+    rss = f"{r['peak_rss'] / 1e6:,.0f}" if r.get("peak_rss") else "-"
+    line = (
+        f"{phase:<14} {r['seconds']:>9.3f} {r['files_per_s'] or 0:>11,.0f} "
+        f"{r['mb_per_s'] or 0:>8,.1f} {rss:>9}"
+    )
+    regressed = False
+    if old is not None:
+        dt, drss = _pct(r["seconds"], old.get("seconds")), _pct(r["peak_rss"], old.get("peak_rss"))
+        regressed = (dt or 0) > threshold or (drss or 0) > threshold
+        for delta in (dt, drss):
+            line += f" {'' if delta is None else f'{delta:+.1f}%':>9}"
+        line += "  REGRESSION" if regressed else ""
+    print(line)
+    return regressed
+
+
+def _header(compare: bool) -> None:
+    line = f"{'phase':<14} {'seconds':>9} {'files/s':>11} {'MB/s':>8} {'RSS MB':>9}"
+    print(line + (f" {'Δ time':>9} {'Δ RSS':>9}" if compare else ""))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--root", type=Path, help="Existing tree (default: synthetic).")
+    parser.add_argument("--phases", help=f"Comma-separated subset of: {', '.join(PHASES)}")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per phase (best kept).")
+    parser.add_argument("--save", type=Path, help="Write results as JSON here.")
+    parser.add_argument("--compare", type=Path, help="Baseline JSON from an earlier --save.")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Regression margin, %%.")
+    synthtree.add_arguments(parser)
+    args = parser.parse_args()
+
+    phases = args.phases.split(",") if args.phases else list(PHASES)
+    unknown = sorted(set(phases) - set(PHASES))
+    if unknown:
+        parser.error(f"unknown phase(s): {', '.join(unknown)}")
+    baseline = json.loads(args.compare.read_text()) if args.compare else None
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.root is not None:
+            root, tree = args.root.resolve(), {"root": str(args.root.resolve())}
+        else:
+            spec = synthtree.spec_from(args)
+            root = Path(tmp) / "tree"
+            tree = {"spec": asdict(spec), "stats": asdict(synthtree.generate(root, spec))}
+            print(", ".join(f"{k}={v:,}" for k, v in tree["stats"].items()))
+        if baseline is not None and baseline.get("tree", {}).get("spec") != tree.get("spec"):
+            print("warning: the baseline was measured on a different tree")
+        _header(compare=False)
+        results = measure(root, phases, args.repeat)
+
+    payload = {
+        "version": RESULTS_VERSION,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "tree": tree,
+        "phases": results,
+    }
+    if args.save is not None:
+        args.save.write_text(json.dumps(payload, indent=2) + "\n")
+        print(f"saved to {args.save}")
+    if baseline is None:
+        return 0
+    print(f"\nagainst {args.compare} (threshold {args.threshold:g}%):")
+    _header(compare=True)
+    regressions = [
+        phase for phase, r in results.items()
+        if _print_row(phase, r, baseline["phases"].get(phase), args.threshold)
+    ]
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+"""
+Benchmark: bytes and tokens saved by each content transform, and what they cost.
+
+Walks a tree (default: this checkout; or ``--root``) for the given
+extensions, runs every transform on its own and then all of them together,
+and prints the files changed, bytes and tokens saved and the time taken, on
+one process and on a pool of ``--jobs``. Both runs must produce the same
+content.
+
+    python benchmarks/bench_transforms.py --ext py
+    python benchmarks/bench_transforms.py --root ~/src/monorepo --ext py --ext ts --jobs 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+from collector.config import CollectorConfig
+from collector.discovery import FileEntry, walk
+from collector.tokens import DEFAULT_ENCODING, method_for
+from collector.transforms import TRANSFORMS, Pipeline
+
+
+def run(
+    entries: list[FileEntry], names: list[str], jobs: int, encoding: str
+) -> tuple[float, Pipeline, list[str | None]]:
+    pipeline = Pipeline(names, encoding=encoding)
+    start = time.perf_counter()
+    texts = [r.text if r is not None else None for r in pipeline.stream(entries, jobs=jobs)]
+    return time.perf_counter() - start, pipeline, texts
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--root", type=Path, default=Path(__file__).resolve().parent.parent)
+    parser.add_argument("--ext", action="append", help="Extension to collect (repeatable).")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="Pool workers.")
+    parser.add_argument("--encoding", default=DEFAULT_ENCODING)
+    args = parser.parse_args()
+
+    config = CollectorConfig(root=args.root, extensions=set(args.ext or []), use_cache=False)
+    entries = list(walk(config))
+    total = sum(e.size for e in entries)
+    print(f"{len(entries):,} files, {total:,} bytes, tokens by {method_for(args.encoding)}\n")
+
+    print(f"{'transform':<12} {'files':>7} {'bytes saved':>12} {'share':>6} "
+          f"{'tokens saved':>13} {'1 proc s':>9} {f'{args.jobs} procs s':>10}")
+    differ = False
+    for names in [[name] for name in TRANSFORMS] + [list(TRANSFORMS)]:
+        serial, pipeline, texts = run(entries, names, 1, args.encoding)
+        pooled, _, pooled_texts = run(entries, names, args.jobs, args.encoding)
+        differ |= texts != pooled_texts
+        label = names[0] if len(names) == 1 else "all"
+        if len(names) == 1:
+            saving = pipeline.savings[label]
+            files, saved, tokens = saving.files, saving.bytes, saving.tokens
+        else:
+            files = sum(text is not None for text in texts)
+            saved = sum(s.bytes for s in pipeline.savings.values())
+            tokens = sum(s.tokens for s in pipeline.savings.values())
+        share = saved / total if total else 0.0
+        print(f"{label:<12} {files:>7,} {saved:>12,} {share:>6.1%} {tokens:>13,} "
+              f"{serial:>9.3f} {pooled:>10.3f}")
+    if differ:
+        print("\nthe pooled run produced different content", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,197 @@
+"""
+Benchmark: scandir-based ``discovery.walk`` against the original pathlib walker.
+
+Builds a synthetic tree (or uses ``--root``), runs both walkers, checks they
+yield identical results, and reports wall time plus filesystem calls made
+from Python (stat/lstat/listdir/scandir/open and DirEntry.stat).
+
+    python benchmarks/bench_walk.py --files 20000
+    python benchmarks/bench_walk.py --root ~/src/monorepo --repeat 3
+"""
+
+from __future__ import annotations
+
+import argparse
+import fnmatch
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections.abc import Callable, Iterator
+from pathlib import Path
+
+import pathspec
+
+from collector.config import DEFAULT_IGNORED_DIRS, DEFAULT_IGNORED_GLOBS, CollectorConfig
+from collector.discovery import FileEntry, _looks_binary, walk
+
+# C-level callables that translate into filesystem syscalls.
+_FS_CALLS = frozenset({"stat", "lstat", "listdir", "scandir", "open"})
+
+
+def _load_gitignore(root: Path) -> pathspec.PathSpec | None:
+    gitignore = root / ".gitignore"
+    if not gitignore.is_file():
+        return None
+    try:
+        lines = gitignore.read_text(encoding="utf-8", errors="replace").splitlines()
+    except OSError:
+        return None
+    return pathspec.PathSpec.from_lines("gitwildmatch", lines)
+
+
+def _make_spec(patterns: list[str]) -> pathspec.PathSpec | None:
+    return pathspec.PathSpec.from_lines("gitwildmatch", patterns) if patterns else None
+
+
+def _matches_name_glob(name: str, patterns: tuple[str, ...]) -> bool:
+    return any(fnmatch.fnmatch(name, pat) for pat in patterns)
+
+
+def legacy_walk(config: CollectorConfig) -> Iterator[FileEntry]:
+    """The Path.iterdir()-based walker and its helpers, kept verbatim as the baseline."""
+    root = config.root.resolve()
+    gitignore = _load_gitignore(root) if config.respect_gitignore else None
+    exclude_spec = _make_spec(config.exclude_globs)
+    include_spec = _make_spec(config.include_globs)
+    extensions = {e.lstrip(".").lower() for e in config.extensions}
+
+    def _should_visit_dir(d: Path, rel: Path) -> bool:
+        if d.name in DEFAULT_IGNORED_DIRS:
+            return False
+        if _matches_name_glob(d.name, DEFAULT_IGNORED_GLOBS):
+            return False
+        rel_posix = rel.as_posix()
+        if exclude_spec is not None and exclude_spec.match_file(f"{rel_posix}/"):
+            return False
+        return not (gitignore is not None and gitignore.match_file(f"{rel_posix}/"))
+
+    def _should_yield_file(f: Path, rel: Path) -> bool:
+        if _matches_name_glob(f.name, DEFAULT_IGNORED_GLOBS):
+            return False
+        rel_posix = rel.as_posix()
+        if exclude_spec is not None and exclude_spec.match_file(rel_posix):
+            return False
+        if gitignore is not None and gitignore.match_file(rel_posix):
+            return False
+        if extensions:
+            ext = f.suffix.lstrip(".").lower()
+            if ext not in extensions and f.name not in extensions:
+                return False
+        return not (include_spec is not None and not include_spec.match_file(rel_posix))
+
+    def _recurse(current: Path) -> Iterator[FileEntry]:
+        try:
+            entries = sorted(current.iterdir(), key=lambda p: (p.is_file(), p.name.lower()))
+        except OSError:
+            return
+        for entry in entries:
+            rel = entry.relative_to(root)
+            if entry.is_symlink() and not config.follow_symlinks:
+                continue
+            if entry.is_dir():
+                if _should_visit_dir(entry, rel):
+                    yield from _recurse(entry)
+            elif entry.is_file():
+                if not _should_yield_file(entry, rel):
+                    continue
+                try:
+                    size = entry.stat().st_size
+                except OSError:
+                    continue
+                if size > config.max_file_size:
+                    continue
+                if _looks_binary(entry):
+                    continue
+                yield FileEntry(path=entry, rel_path=rel, size=size)
+
+    yield from _recurse(root)
+
+
+def make_tree(base: Path, n_files: int, seed: int = 0) -> None:
+    """Deterministic tree: nested packages, mixed extensions, a few binaries and ignores."""
+    rng = random.Random(seed)
+    exts = ("py", "ts", "md", "json", "txt", "go", "rs", "png")
+    dirs = [base]
+    for i in range(max(1, n_files // 25)):
+        parent = rng.choice(dirs)
+        d = parent / f"pkg_{i:05d}"
+        d.mkdir()
+        dirs.append(d)
+    (base / "node_modules" / "dep").mkdir(parents=True)
+    (base / "node_modules" / "dep" / "index.js").write_text("module.exports = 1;\n")
+    (base / ".gitignore").write_text("*.log\ngenerated/\n")
+    for i in range(n_files):
+        d = rng.choice(dirs)
+        ext = rng.choice(exts)
+        path = d / f"File_{i:06d}.{ext}"
+        if ext == "png":
+            path.write_bytes(b"\x89PNG\r\n\x1a\n\x00" * 16)
+        else:
+            path.write_text(f"# file {i}\n" + "x = 1\n" * rng.randint(1, 200))
+
+
+def measure(fn: Callable[[], list[FileEntry]]) -> tuple[float, int, list[FileEntry]]:
+    """Run ``fn`` once, returning (seconds, filesystem calls, result)."""
+    calls = 0
+
+    def profiler(frame, event, arg):  # noqa: ANN001
+        nonlocal calls
+        if event == "c_call" and getattr(arg, "__name__", "") in _FS_CALLS:
+            calls += 1
+
+    sys.setprofile(profiler)
+    threading.setprofile(profiler)
+    try:
+        result = fn()
+    finally:
+        sys.setprofile(None)
+        threading.setprofile(None)  # type: ignore[arg-type]
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start, calls, result
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--root", type=Path, help="Scan an existing tree instead.")
+    parser.add_argument("--files", type=int, default=10_000, help="Synthetic tree size.")
+    parser.add_argument("--jobs", type=int, default=0, help="Also time the parallel walker.")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per walker (best kept).")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = args.root
+        if root is None:
+            root = Path(tmp)
+            make_tree(root, args.files)
+        config = CollectorConfig(root=root)
+
+        parallel = CollectorConfig(root=root, jobs=args.jobs)
+        walkers = [("pathlib (legacy)", legacy_walk, config), ("scandir", walk, config)]
+        if args.jobs > 1:
+            walkers.append((f"scandir -j{args.jobs}", walk, parallel))
+
+        rows = []
+        results = {}
+        for name, walker, cfg in walkers:
+            best = float("inf")
+            for _ in range(args.repeat):
+                seconds, calls, result = measure(lambda w=walker, c=cfg: list(w(c)))
+                best = min(best, seconds)
+            rows.append((name, best, calls, len(result)))
+            results[name] = [(e.rel_path.as_posix(), e.size) for e in result]
+
+    same = all(r == results["pathlib (legacy)"] for r in results.values())
+    print(f"{'walker':<18} {'seconds':>9} {'fs calls':>10} {'files':>8}")
+    for name, seconds, calls, n in rows:
+        print(f"{name:<18} {seconds:>9.3f} {calls:>10,} {n:>8,}")
+    (_, t0, c0, _), (_, t1, c1, _) = rows[:2]
+    print(f"speedup x{t0 / t1:.2f}, fs calls -{100 * (1 - c1 / max(c0, 1)):.0f}%, "
+          f"identical output: {same}")
+    return 0 if same else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,154 @@
+"""
+Deterministic synthetic source trees for the benchmarks.
+
+A ``TreeSpec`` fixes the shape: file count, directory depth, a log-normal
+size distribution, the share of binary files, how much .gitignore machinery
+there is (root pattern count, nested .gitignore files, share of files they
+match) and symlinks. The same spec and seed always produce the same tree,
+byte for byte, so timings from different runs and machines compare.
+
+    python benchmarks/synthtree.py /tmp/tree --files 50000 --depth 8 --symlinks 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sys
+from dataclasses import asdict, dataclass, fields
+from pathlib import Path
+
+# Extension mix of a typical polyglot repository, by weight.
+_TEXT_EXTS = {"py": 30, "ts": 20, "md": 10, "json": 10, "go": 8, "rs": 7, "txt": 5, "yaml": 5}
+_BINARY_EXTS = ("png", "jpg", "bin", "pyc")
+_LINES = [
+    "import os\n",
+    "def handler(event, context):\n",
+    "    return {'status': 200, 'body': event.get('body', '')}\n",
+    "    # TODO: retry with exponential backoff\n",
+    "const total = items.reduce((acc, x) => acc + x.price, 0);\n",
+    "func (s *Server) Close() error { return s.ln.Close() }\n",
+    "let mut buf = Vec::with_capacity(4096);\n",
+    "Ünïcödé strings show up in real code too: naïve café\n",
+    "\n",
+]
+
+
+@dataclass
+class TreeSpec:
+    files: int = 10_000
+    depth: int = 6  # deepest directory nesting
+    size_median: int = 2_000  # bytes; sizes are log-normal around this
+    size_sigma: float = 1.2
+    max_size: int = 4_000_000
+    binary_ratio: float = 0.05
+    ignore_patterns: int = 50  # lines in the root .gitignore
+    nested_ignores: int = 10  # directories with a .gitignore of their own
+    ignored_ratio: float = 0.1  # share of files the ignore rules match
+    symlinks: int = 0  # links to files and directories, plus one loop if > 0
+    seed: int = 0
+
+
+@dataclass
+class TreeStats:
+    files: int = 0
+    dirs: int = 0
+    bytes: int = 0
+    binary: int = 0
+    ignored: int = 0
+    symlinks: int = 0
+
+
+def _text(rng: random.Random, size: int) -> bytes:
+    out: list[str] = []
+    n = 0
+    while n < size:
+        line = rng.choice(_LINES)
+        out.append(line)
+        n += len(line)
+    return "".join(out).encode()[:size]
+
+
+def generate(root: Path, spec: TreeSpec) -> TreeStats:
+    """Write the tree described by ``spec`` under ``root`` (which must be empty)."""
+    rng = random.Random(spec.seed)
+    stats = TreeStats()
+    root.mkdir(parents=True, exist_ok=True)
+
+    dirs: list[tuple[Path, int]] = [(root, 0)]
+    for i in range(max(1, spec.files // 20)):
+        parent, level = rng.choice([d for d in dirs[-200:] if d[1] < spec.depth] or dirs[:1])
+        path = parent / f"pkg_{i:05d}"
+        path.mkdir()
+        dirs.append((path, level + 1))
+    stats.dirs = len(dirs)
+
+    # Root rules: half name globs, a quarter directory rules, the rest anchored paths.
+    patterns = []
+    for i in range(spec.ignore_patterns):
+        kind = i % 4
+        patterns.append(
+            f"*.gen{i}" if kind < 2 else f"build_{i}/" if kind == 2 else f"/pkg_{i:05d}/out_{i}"
+        )
+    (root / ".gitignore").write_text("\n".join(["*.log", *patterns, "!keep.gen1"]) + "\n")
+    nested = rng.sample(dirs[1:], min(spec.nested_ignores, len(dirs) - 1))
+    for i, (path, _level) in enumerate(nested):
+        (path / ".gitignore").write_text(f"*.tmp{i}\n/local_{i}/\n!important.tmp{i}\n")
+
+    exts, weights = zip(*_TEXT_EXTS.items(), strict=True)
+    for i in range(spec.files):
+        parent, _level = rng.choice(dirs)
+        size = min(int(rng.lognormvariate(0, spec.size_sigma) * spec.size_median), spec.max_size)
+        roll = rng.random()
+        if roll < spec.binary_ratio:
+            name = f"asset_{i:06d}.{rng.choice(_BINARY_EXTS)}"
+            data = b"\x89PNG\r\n\x1a\n\x00" + rng.randbytes(max(size - 9, 0))
+            stats.binary += 1
+        else:
+            name = f"File_{i:06d}.{rng.choices(exts, weights)[0]}"
+            if roll < spec.binary_ratio + spec.ignored_ratio:
+                name += ".log" if i % 2 else f".gen{rng.randrange(max(spec.ignore_patterns, 1))}"
+                stats.ignored += 1
+            data = _text(rng, size)
+        (parent / name).write_bytes(data)
+        stats.files += 1
+        stats.bytes += len(data)
+
+    if spec.symlinks:
+        targets = sorted(p for p in root.rglob("*") if p.is_file())
+        for i in range(spec.symlinks):
+            parent, _level = rng.choice(dirs)
+            target = rng.choice(targets) if i % 2 else rng.choice(dirs)[0]
+            (parent / f"link_{i}").symlink_to(os.path.relpath(target, parent))
+        (dirs[-1][0] / "loop").symlink_to("..")
+        stats.symlinks = spec.symlinks + 1
+    return stats
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """One ``--flag`` per TreeSpec field, so every script exposes the same knobs."""
+    for f in fields(TreeSpec):
+        flag = "--" + f.name.replace("_", "-")
+        parser.add_argument(flag, type=type(getattr(TreeSpec(), f.name)), default=None)
+
+
+def spec_from(args: argparse.Namespace) -> TreeSpec:
+    given = {k: v for k, v in vars(args).items() if k in asdict(TreeSpec()) and v is not None}
+    return TreeSpec(**given)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("root", type=Path)
+    add_arguments(parser)
+    args = parser.parse_args()
+    if args.root.exists() and any(args.root.iterdir()):
+        parser.error(f"{args.root} is not empty")
+    stats = generate(args.root, spec_from(args))
+    print(", ".join(f"{k}={v:,}" for k, v in asdict(stats).items()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,25 @@
-"""Allow `python -m collector` invocation."""
+"""The `collect` entry point; also allows `python -m collector` invocation."""
 
-from .cli import app
+import sys
+
+from .client import delegate
+
+
+def main() -> None:
+    """`collect serve ...` starts the daemon; other runs go to it when one is running."""
+    args = sys.argv[1:]
+    if args[:1] == ["serve"]:
+        from .daemon import serve_app
+
+        serve_app(args[1:], prog_name="collect serve")
+        return
+    status = delegate(args)
+    if status is not None:
+        sys.exit(status)
+    from .cli import app
 
-if __name__ == "__main__":
     app()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,394 @@
+"""
+Library API: a ``Collector`` runs the pipeline for one ``CollectorConfig``.
+
+The synchronous methods are the pipeline's steps (walk, ``--since``,
+dedup, token counting, packing, rendering, the manifest); the CLI is a thin
+client of them. The async methods are for event-loop hosts such as a web
+service building LLM context per request:
+
+    async with Collector(CollectorConfig(root=repo, extensions={"py"})) as collector:
+        async for entry in collector.iter_entries():
+            ...
+        await collector.render_to(response)  # asyncio StreamWriter, or any async write()
+
+Blocking filesystem work is offloaded to a thread pool shared by every
+``Collector`` (``IO_WORKERS`` threads unless one is given its own
+``executor``), so however many requests are in flight, at most that many
+walks or renders touch the disk at once and file descriptors stay bounded.
+Entries are walked in batches, one pool job each, so concurrent requests
+interleave. A render to an async stream runs on a thread of its own and
+hands its output over through a bounded queue, so a slow client stalls its
+own render rather than buffering the bundle in memory. The render holds one
+of ``IO_WORKERS`` disk slots only while it works, never while it waits for
+its client, so stalled clients don't hold up other requests. asyncio itself is imported by
+the async methods, so synchronous callers such as the CLI don't load it.
+"""
+
+from __future__ import annotations
+
+import inspect
+import io
+import threading
+from collections.abc import AsyncIterator, Callable, Iterator, Mapping, Sequence
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, BinaryIO
+
+from .budget import PackResult, pack, priority_order
+from .cache import ScanCache
+from .compress import compressed_writer
+from .config import CollectorConfig
+from .dedup import find_copies, same_as
+from .discovery import FileEntry, TreeIndex, walk
+from .formatters import Renderer, get_renderer, render_to
+from .ignore import IgnoreMatcher
+from .manifest import ChangeSet, Manifest, build_manifest, changes_since
+from .tokens import TokenReport, count_entries
+
+if TYPE_CHECKING:
+    import asyncio
+
+    from .transforms import Pipeline
+
+# Pool threads shared by Collectors without an executor of their own.
+IO_WORKERS = 8
+# Entries per walk job in ``iter_entries``.
+_WALK_BATCH = 256
+# Async renders: bytes per queued chunk, and chunks queued before the render waits.
+_PIPE_CHUNK = 64 * 1024
+_PIPE_DEPTH = 8
+
+_shared: ThreadPoolExecutor | None = None
+_shared_lock = threading.Lock()
+# Disk slots for async renders of Collectors on the shared pool.
+_shared_slots = threading.BoundedSemaphore(IO_WORKERS)
+
+
+def _shared_executor() -> ThreadPoolExecutor:
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = ThreadPoolExecutor(max_workers=IO_WORKERS, thread_name_prefix="collector-io")
+        return _shared
+
+
+def _take(entries: Iterator[FileEntry], n: int) -> list[FileEntry]:
+    batch: list[FileEntry] = []
+    for entry in entries:
+        batch.append(entry)
+        if len(batch) == n:
+            break
+    return batch
+
+
+class _QueueSink(io.RawIOBase):
+    """
+    Write end of an async render: each write waits for room in the loop's
+    queue, giving up the render's disk slot (held by the caller) meanwhile.
+    """
+
+    def __init__(
+        self,
+        queue: asyncio.Queue[bytes | None],
+        loop: asyncio.AbstractEventLoop,
+        slots: threading.Semaphore,
+    ) -> None:
+        super().__init__()
+        self._queue = queue
+        self._loop = loop
+        self._slots = slots
+        self.aborted = False
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: bytes) -> int:  # type: ignore[override]
+        if self.aborted:
+            raise BrokenPipeError("the consumer of this render went away")
+        self.put(bytes(data))
+        return len(data)
+
+    def put(self, item: bytes | None) -> None:
+        import asyncio
+
+        self._slots.release()
+        try:
+            asyncio.run_coroutine_threadsafe(self._queue.put(item), self._loop).result()
+        finally:
+            self._slots.acquire()
+
+
+async def _write(stream: Any, chunk: bytes) -> None:
+    """One chunk to an async stream: awaitable ``write``, or ``write`` plus ``drain``."""
+    result = stream.write(chunk)
+    if inspect.isawaitable(result):
+        await result
+    drain = getattr(stream, "drain", None)
+    if drain is not None:
+        await drain()
+
+
+def _is_async_stream(stream: Any) -> bool:
+    return hasattr(stream, "drain") or inspect.iscoroutinefunction(getattr(stream, "write", None))
+
+
+class Collector:
+    """
+    The collection pipeline for one ``config``.
+
+    The scan cache (when ``config.use_cache``) is opened on first use; pass
+    ``cache`` to share one between Collectors for the same root. Call
+    ``close`` (or use the Collector as a context manager) to flush it.
+    ``pipeline`` holds the config's content transforms, and what they saved
+    in this Collector's renders; None if it selects none. Raises ValueError
+    if the config names an unknown transform.
+    """
+
+    def __init__(
+        self,
+        config: CollectorConfig,
+        cache: ScanCache | None = None,
+        executor: Executor | None = None,
+    ) -> None:
+        self.config = config
+        self._cache = cache
+        self._cache_loaded = cache is not None or not config.use_cache
+        self._cache_lock = threading.Lock()
+        self._executor = executor
+        self._slots = _shared_slots if executor is None else threading.BoundedSemaphore(IO_WORKERS)
+        self.pipeline: Pipeline | None = None
+        if config.transforms or config.outline_globs:
+            from .transforms import Pipeline
+
+            self.pipeline = Pipeline.from_config(config)
+
+    @property
+    def cache(self) -> ScanCache | None:
+        with self._cache_lock:
+            if not self._cache_loaded:
+                self._cache = ScanCache.open(self.config.root, rebuild=self.config.rebuild_cache)
+                self._cache_loaded = True
+            return self._cache
+
+    def renderer(self, deleted: Sequence[str] = ()) -> Renderer:
+        return get_renderer(self.config.output_format, self.config.show_tree, deleted)
+
+    # -- synchronous pipeline -------------------------------------------------
+
+    def walk(self) -> list[FileEntry]:
+        """Every file the config selects, in walk order."""
+        return list(walk(self.config, self.cache))
+
+    def index(self) -> TreeIndex:
+        """A survey of the tree for choosing extensions afterwards (see ``TreeIndex``)."""
+        return TreeIndex.build(self.config, self.cache)
+
+    def changes_since(
+        self, entries: Sequence[FileEntry], since: str
+    ) -> tuple[ChangeSet, Manifest | None]:
+        """
+        ``--since``: what changed against a manifest file or git ref, and the
+        manifest if one was used. Raises ValueError if ``since`` can't be used.
+        """
+        matcher = IgnoreMatcher(self.config.root.resolve(), self.config)
+
+        def keep(rel: str) -> bool:
+            return matcher.keep_file(rel.rpartition("/")[2], rel, None)
+
+        return changes_since(self.config.root.resolve(), entries, since, self.cache, keep)
+
+    def find_copies(self, entries: Sequence[FileEntry]) -> dict[str, str]:
+        """With ``config.dedup``, digests of the byte-identical files (see ``dedup``)."""
+        return find_copies(entries, self.cache) if self.config.dedup else {}
+
+    def count_tokens(
+        self,
+        entries: Sequence[FileEntry],
+        deleted: Sequence[str] = (),
+        copies: Mapping[str, str] | None = None,
+    ) -> TokenReport:
+        return count_entries(
+            entries, self.renderer(deleted), self.config.token_encoding, self.cache,
+            copies=copies, pipeline=self.pipeline,
+        )
+
+    def pack(
+        self, entries: Sequence[FileEntry], report: TokenReport, deleted: Sequence[str] = ()
+    ) -> PackResult:
+        """
+        The files that fit in ``config.max_tokens``, by ``config.priority``.
+        Raises ValueError for the "near" priority without ``config.near``.
+        """
+        if self.config.max_tokens is None:
+            raise ValueError("pack() needs config.max_tokens")
+        if self.config.priority == "near" and self.config.near is None:
+            raise ValueError("the near priority needs config.near")
+        order = priority_order(
+            entries, report, self.config.priority, self.config.include_globs, self.config.near
+        )
+        return pack(
+            entries, report, self.config.max_tokens, order, self.renderer(deleted),
+            self.config.token_encoding,
+        )
+
+    def render(
+        self,
+        entries: list[FileEntry],
+        stream: BinaryIO,
+        deleted: Sequence[str] = (),
+        hashes: dict[str, str] | None = None,
+        copies: Mapping[str, str] | None = None,
+    ) -> int:
+        """
+        Write the bundle for ``entries`` into ``stream``, through
+        ``config.compression`` if set, and return the uncompressed size.
+        ``copies`` (from ``find_copies``) turns later copies into references.
+        Raises CompressionError if the codec isn't available.
+        """
+        def _render(sink: BinaryIO) -> int:
+            return render_to(
+                entries, self.config.output_format, sink,
+                include_tree=self.config.show_tree, cache=self.cache, deleted=deleted,
+                hashes=hashes, same_as=same_as(entries, copies) if copies else None,
+                pipeline=self.pipeline,
+            )
+
+        if self.config.compression is None:
+            return _render(stream)
+        with compressed_writer(stream, self.config.compression, self.config.jobs) as sink:
+            return _render(sink)
+
+    def write_manifest(
+        self,
+        path: Path,
+        walked: Sequence[FileEntry],
+        hashes: dict[str, str],
+        previous: Manifest | None = None,
+    ) -> None:
+        """Record every walked file as a later ``--since`` baseline. Raises OSError."""
+        build_manifest(walked, hashes, previous, self.cache).write(path)
+
+    def flush(self) -> None:
+        """Persist what the scan cache learned so far."""
+        if self._cache is not None:
+            self._cache.flush()
+
+    def close(self) -> None:
+        self.flush()
+
+    def __enter__(self) -> Collector:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    # -- asyncio ----------------------------------------------------------------
+
+    def _submit(self, fn: Callable[..., Any], *args: Any) -> Future[Any]:
+        return (self._executor or _shared_executor()).submit(fn, *args)
+
+    async def _offload(self, fn: Callable[..., Any], *args: Any) -> Any:
+        import asyncio
+
+        return await asyncio.wrap_future(self._submit(fn, *args))
+
+    async def iter_entries(self) -> AsyncIterator[FileEntry]:
+        """``walk`` without blocking the event loop: walked in batches on the I/O pool."""
+        import asyncio
+
+        # Reading ``self.cache`` may load it from disk, so even that is offloaded.
+        entries = await self._offload(lambda: walk(self.config, self.cache))
+        job: Future[list[FileEntry]] | None = None
+        try:
+            while True:
+                job = self._submit(_take, entries, _WALK_BATCH)
+                batch = await asyncio.wrap_future(job)
+                if not batch:
+                    break
+                for entry in batch:
+                    yield entry
+        finally:
+            # A cancelled await leaves a running batch behind; the walk can only
+            # be closed once that has returned.
+            if job is not None and not job.done():
+                await asyncio.wait({asyncio.wrap_future(job)})
+            await self._offload(entries.close)
+
+    async def render_to(
+        self,
+        stream: Any,
+        entries: list[FileEntry] | None = None,
+        deleted: Sequence[str] = (),
+        hashes: dict[str, str] | None = None,
+    ) -> int:
+        """
+        ``render`` without blocking the event loop; returns the uncompressed size.
+
+        ``stream`` is an async stream (an ``asyncio.StreamWriter`` or anything
+        with an awaitable ``write``) or a plain binary file object, which is
+        written from the I/O pool directly. ``entries`` defaults to a fresh
+        walk; with ``config.dedup`` copies among them become references.
+        """
+        if entries is None:
+            entries = [entry async for entry in self.iter_entries()]
+        copies = await self._offload(self.find_copies, entries) if self.config.dedup else None
+
+        def render(sink: BinaryIO) -> int:
+            return self.render(entries, sink, deleted, hashes, copies)
+
+        if not _is_async_stream(stream):
+            return await self._offload(render, stream)
+        return await self._pump(render, stream)
+
+    async def _pump(self, render: Callable[[BinaryIO], int], stream: Any) -> int:
+        """
+        Run ``render`` on a thread of its own, forwarding its output to async
+        ``stream``. Waiting for ``stream`` takes no pool thread or disk slot.
+        """
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue[bytes | None] = asyncio.Queue(maxsize=_PIPE_DEPTH)
+        sink = _QueueSink(queue, loop, self._slots)
+        done: Future[int] = Future()
+
+        def produce() -> None:
+            done.set_running_or_notify_cancel()
+            try:
+                with self._slots:
+                    try:
+                        with io.BufferedWriter(sink, _PIPE_CHUNK) as buffered:
+                            n = render(buffered)
+                    finally:
+                        if not sink.aborted:
+                            sink.put(None)
+            except BaseException as e:  # noqa: BLE001 - handed to the awaiting coroutine
+                done.set_exception(e)
+            else:
+                done.set_result(n)
+
+        threading.Thread(target=produce, name="collector-render", daemon=True).start()
+        producer = asyncio.wrap_future(done)
+        try:
+            while (chunk := await queue.get()) is not None:
+                await _write(stream, chunk)
+        except BaseException:
+            # Unblock the render so it fails on its next write, then let it finish.
+            sink.aborted = True
+            while not producer.done():
+                while not queue.empty():
+                    queue.get_nowait()
+                await asyncio.wait({producer}, timeout=0.05)
+            if not producer.cancelled():
+                producer.exception()  # retrieved: the consumer's error is the one to report
+            raise
+        return await producer
+
+    async def aclose(self) -> None:
+        await self._offload(self.close)
+
+    async def __aenter__(self) -> Collector:
+        return self
+
+    async def __aexit__(self, *exc: object) -> None:
+        await self.aclose()
@@ -0,0 +1,168 @@
+"""
+Token-budget packing: pick the subset of a walk that fits under ``--max-tokens``.
+
+Files are ranked by a priority strategy and packed first-fit: each file is
+taken if it still fits, otherwise it's recorded as omitted with the reason,
+and packing moves on to the next (a big file doesn't stop smaller, lower-ranked
+ones from filling the remaining room). The packed files keep walk order, so
+the bundle looks exactly as if they had been selected by hand.
+
+Costs come from a ``TokenReport`` (content plus format wrapper per file). The
+bundle header lists every packed file, so each file is also charged its
+average share of the file tree; the real header is measured once the set is
+known and the lowest-priority files are dropped if that estimate fell short.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from pathlib import PurePosixPath
+
+from .discovery import FileEntry
+from .formatters import Renderer
+from .ignore import CompiledSpec
+from .tokens import TokenReport, frame_tokens
+
+PRIORITIES = ("include", "smallest", "near")
+
+TOO_LARGE = "larger than the budget"
+NO_ROOM = "no room left"
+TREE_OVERFLOW = "made room for the tree"
+
+
+@dataclass(slots=True)
+class Omission:
+    """A candidate left out of the bundle, and why."""
+    entry: FileEntry
+    tokens: int
+    reason: str
+
+
+@dataclass
+class PackResult:
+    """The packed selection (in walk order) plus everything that didn't make it."""
+    limit: int
+    indices: list[int]
+    report: TokenReport
+    omitted: list[Omission] = field(default_factory=list)
+
+    @property
+    def tokens(self) -> int:
+        return self.report.total
+
+
+def _include_rank(entries: Sequence[FileEntry], include_globs: Sequence[str]) -> list[int]:
+    """Index of the first ``--include`` glob each file matches (files matching none go last)."""
+    specs = [CompiledSpec([glob]) for glob in include_globs]
+    ranks = []
+    for entry in entries:
+        rel = entry.rel_path.as_posix()
+        ranks.append(next((r for r, spec in enumerate(specs) if spec.match(rel)), len(specs)))
+    return ranks
+
+
+def _distance(parts: tuple[str, ...], target: tuple[str, ...]) -> int:
+    """Steps through the directory tree from ``target`` to ``parts``."""
+    common = 0
+    for a, b in zip(parts, target, strict=False):
+        if a != b:
+            break
+        common += 1
+    return (len(parts) - common) + (len(target) - common)
+
+
+def priority_order(
+    entries: Sequence[FileEntry],
+    report: TokenReport,
+    strategy: str = "include",
+    include_globs: Sequence[str] = (),
+    near: str | None = None,
+) -> list[int]:
+    """
+    Entry indices, highest priority first. Ties fall back to walk order.
+
+    - ``include``: files matching earlier ``--include`` globs first (with no
+      globs this is plain walk order).
+    - ``smallest``: fewest tokens first, which maximises the file count.
+    - ``near``: closest to the ``near`` path (relative to the root) first.
+    """
+    order = range(len(entries))
+    if strategy == "include":
+        if not include_globs:
+            return list(order)
+        ranks = _include_rank(entries, include_globs)
+        return sorted(order, key=ranks.__getitem__)
+    if strategy == "smallest":
+        return sorted(order, key=report.per_file.__getitem__)
+    if strategy == "near":
+        if not near:
+            raise ValueError("The 'near' priority needs a path to be near.")
+        target = PurePosixPath(near).parts
+        dist = [_distance(e.rel_path.parts, target) for e in entries]
+        return sorted(order, key=lambda i: (dist[i], report.per_file[i]))
+    raise ValueError(f"Unknown priority {strategy!r}; expected one of {', '.join(PRIORITIES)}")
+
+
+def pack(
+    entries: Sequence[FileEntry],
+    report: TokenReport,
+    limit: int,
+    order: Sequence[int],
+    renderer: Renderer,
+    encoding: str,
+) -> PackResult:
+    """
+    Pack ``entries`` in priority ``order`` into at most ``limit`` tokens.
+
+    A file is too large if its own cost, without its share of the tree,
+    exceeds the room left after the bundle's fixed frame. Separators are
+    charged in packing order: the first file packed pays none. With
+    ``--dedup`` groups in the report, the first file of a group to be
+    packed is charged in full and later ones only as references, whichever
+    of them ends up carrying the body in walk order.
+    """
+    base = frame_tokens([], renderer, encoding)
+    tree_share = -(-max(report.frame - base, 0) // max(len(entries), 1))
+    room = limit - base
+    chosen: list[int] = []
+    charged: dict[int, int] = {}
+    carried: set[str] = set()
+    omitted: dict[int, str] = {}
+    for i in order:
+        group = report.groups.get(i)
+        own = report.reference[i] if group in carried else report.content[i] + report.wrapper[i]
+        cost = own + tree_share + (report.separator if chosen else 0)
+        if own > limit - base:
+            omitted[i] = TOO_LARGE
+        elif cost > room:
+            omitted[i] = NO_ROOM
+        else:
+            chosen.append(i)
+            charged[i] = cost
+            room -= cost
+            if group is not None:
+                carried.add(group)
+
+    # The tree share is an average; measure the real header and trim if needed.
+    while True:
+        selected = [entries[i] for i in sorted(chosen)]
+        frame = frame_tokens(selected, renderer, encoding)
+        excess = report.subset(sorted(chosen), frame).total - limit
+        if excess <= 0 or not chosen:
+            break
+        while excess > 0 and chosen:
+            i = chosen.pop()
+            omitted[i] = TREE_OVERFLOW
+            excess -= charged[i]
+
+    indices = sorted(chosen)
+    return PackResult(
+        limit=limit,
+        indices=indices,
+        report=report.subset(indices, frame),
+        omitted=[
+            Omission(entries[i], report.per_file[i], reason)
+            for i, reason in sorted(omitted.items())
+        ],
+    )
@@ -0,0 +1,281 @@
+"""
+Persistent scan cache: per-file stat stamp, binary verdict, content hash,
+token count and whether the file renders verbatim, so warm runs skip the
+sniff, token counting and UTF-8 validation for unchanged files.
+
+Every read is checked against the file's current stamp, so a record made
+for other content is never served, and a binary verdict is only reused
+under the classifier settings it was reached with (see ``classify``).
+
+One SQLite database under ``$XDG_CACHE_HOME/file-collector/`` holds every
+root. A run loads its root's rows once, works from the in-memory dict, and
+writes back only what changed in a single transaction. WAL mode plus a busy
+timeout lets parallel ``collect`` invocations share the file safely. The
+cache is purely an optimisation: any SQLite or filesystem error disables it
+for the run instead of failing the collection.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+SCHEMA_VERSION = 3
+DEFAULT_MAX_ENTRIES = 500_000
+
+# Recency is tracked at day granularity so a warm run over an unchanged tree
+# doesn't rewrite every row just to bump its timestamp.
+_TOUCH_INTERVAL = 24 * 3600
+
+# (st_dev, st_ino, st_mtime_ns, st_size): any change means "re-sniff, re-count".
+Stamp = tuple[int, int, int, int]
+
+
+def stamp_of(st: os.stat_result) -> Stamp:
+    return (st.st_dev, st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+def file_stamp(path: str | os.PathLike[str]) -> Stamp | None:
+    """The current stamp of the file at ``path``, or None if it can't be stat'ed."""
+    try:
+        return stamp_of(os.stat(path))  # noqa: PTH116 - str paths, as in the walker
+    except OSError:
+        return None
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def default_cache_dir() -> Path:
+    """``$XDG_CACHE_HOME/file-collector``, falling back to ``~/.cache/file-collector``."""
+    base = os.environ.get("XDG_CACHE_HOME")
+    return (Path(base) if base else Path.home() / ".cache") / "file-collector"
+
+
+@dataclass(slots=True)
+class CacheRecord:
+    """What we know about one file as of ``stamp``."""
+    stamp: Stamp
+    binary: bool
+    sha256: str | None = None
+    tokens: int | None = None
+    token_method: str | None = None
+    verbatim: bool | None = None
+    last_used: int = 0
+    classifier: str | None = None  # ``Classifier.key`` the binary verdict was reached with
+
+
+class ScanCache:
+    """
+    In-memory view of one root's cache rows, flushed back with ``flush()``.
+
+    Safe to call from the parallel walker's threads: lookups are dict reads
+    and every mutation goes through a lock.
+    """
+
+    def __init__(
+        self,
+        db_path: Path,
+        root: Path,
+        records: dict[str, CacheRecord],
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ) -> None:
+        self.db_path = db_path
+        self.root = str(root)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._records = records
+        self._dirty: set[str] = set()
+        self._touched: set[str] = set()
+        self._lock = threading.Lock()
+        self._now = int(time.time())
+
+    @classmethod
+    def open(
+        cls,
+        root: Path,
+        directory: Path | None = None,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        rebuild: bool = False,
+    ) -> ScanCache | None:
+        """Load the cache for ``root``. Returns None if the cache can't be used."""
+        db_path = (directory or default_cache_dir()) / "scan-cache.sqlite3"
+        root_key = str(root.resolve())
+        records: dict[str, CacheRecord] = {}
+        try:
+            db_path.parent.mkdir(parents=True, exist_ok=True)
+            with _connect(db_path) as conn:
+                if rebuild:
+                    conn.execute("DELETE FROM files WHERE root = ?", (root_key,))
+                rows = conn.execute(
+                    "SELECT path, dev, ino, mtime_ns, size, binary, sha256, tokens,"
+                    " token_method, verbatim, last_used, classifier FROM files WHERE root = ?",
+                    (root_key,),
+                )
+                for path, *stamp, binary, sha, tokens, method, verbatim, used, kind in rows:
+                    records[path] = CacheRecord(
+                        tuple(stamp), bool(binary), sha, tokens, method,
+                        None if verbatim is None else bool(verbatim), used, kind,
+                    )
+        except (sqlite3.Error, OSError):
+            return None
+        return cls(db_path, Path(root_key), records, max_entries)
+
+    def lookup(self, rel: str, stamp: Stamp, classifier: str | None = None) -> CacheRecord | None:
+        """
+        Return the record for ``rel`` if it was made for exactly this
+        ``stamp`` and, if given, its verdict under this ``classifier`` key.
+        """
+        rec = self._records.get(rel)
+        with self._lock:
+            if (
+                rec is None or rec.stamp != stamp
+                or (classifier is not None and rec.classifier != classifier)
+            ):
+                self.misses += 1
+                return None
+            self.hits += 1
+            if self._now - rec.last_used > _TOUCH_INTERVAL:
+                self._touched.add(rel)
+        return rec
+
+    def remember(
+        self, rel: str, stamp: Stamp, binary: bool, classifier: str | None = None
+    ) -> None:
+        """
+        Store a fresh sniff verdict, discarding anything known about older
+        content (a new verdict for the same content keeps its hash and counts).
+        """
+        with self._lock:
+            old = self._records.get(rel)
+            rec = CacheRecord(stamp, binary, last_used=self._now, classifier=classifier)
+            if old is not None and old.stamp == stamp:
+                rec.sha256, rec.tokens, rec.token_method = old.sha256, old.tokens, old.token_method
+                rec.verbatim = old.verbatim
+            self._records[rel] = rec
+            self._dirty.add(rel)
+
+    def get(self, rel: str, stamp: Stamp | None) -> CacheRecord | None:
+        """
+        The record for ``rel`` if it describes the content with ``stamp``
+        (the file's current one, see ``file_stamp``), else None.
+        """
+        rec = self._records.get(rel)
+        return rec if rec is not None and stamp is not None and rec.stamp == stamp else None
+
+    def update_content(
+        self,
+        rel: str,
+        stamp: Stamp,
+        sha256: str | None = None,
+        tokens: int | None = None,
+        token_method: str | None = None,
+        verbatim: bool | None = None,
+    ) -> None:
+        """
+        Attach a content hash, token count or verbatim verdict to the record
+        for ``rel``, if that record is still the one for ``stamp``.
+        """
+        with self._lock:
+            rec = self._records.get(rel)
+            if rec is None or rec.stamp != stamp:
+                return
+            if sha256 is not None:
+                rec.sha256 = sha256
+            if tokens is not None:
+                rec.tokens, rec.token_method = tokens, token_method
+            if verbatim is not None:
+                rec.verbatim = verbatim
+            self._dirty.add(rel)
+
+    def flush(self) -> None:
+        """Write changed rows back in one transaction, then evict down to ``max_entries``."""
+        with self._lock:
+            dirty = [(rel, self._records[rel]) for rel in self._dirty]
+            touched = [(self._now, self.root, rel) for rel in self._touched - self._dirty]
+            self._dirty.clear()
+            self._touched.clear()
+        if not dirty and not touched:
+            return
+        try:
+            with _connect(self.db_path) as conn:
+                conn.execute("BEGIN IMMEDIATE")
+                conn.executemany(
+                    "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (self.root, rel, *rec.stamp, int(rec.binary), rec.sha256,
+                         rec.tokens, rec.token_method, rec.verbatim, self._now, rec.classifier)
+                        for rel, rec in dirty
+                    ],
+                )
+                conn.executemany(
+                    "UPDATE files SET last_used = ? WHERE root = ? AND path = ?", touched
+                )
+                (count,) = conn.execute("SELECT COUNT(*) FROM files").fetchone()
+                if count > self.max_entries:
+                    conn.execute(
+                        "DELETE FROM files WHERE rowid IN"
+                        " (SELECT rowid FROM files ORDER BY last_used LIMIT ?)",
+                        (count - self.max_entries,),
+                    )
+                conn.execute("COMMIT")
+        except (sqlite3.Error, OSError):
+            pass
+
+
+class _Connection:
+    """Context manager around a sqlite3 connection that always closes it."""
+
+    def __init__(self, db_path: Path) -> None:
+        self.conn = sqlite3.connect(db_path, timeout=10.0, isolation_level=None)
+
+    def __enter__(self) -> sqlite3.Connection:
+        return self.conn
+
+    def __exit__(self, *exc: object) -> None:
+        if self.conn.in_transaction:
+            self.conn.rollback()
+        self.conn.close()
+
+
+def _connect(db_path: Path) -> _Connection:
+    ctx = _Connection(db_path)
+    try:
+        _prepare(ctx.conn)
+    except BaseException:
+        ctx.__exit__()
+        raise
+    return ctx
+
+
+def _prepare(conn: sqlite3.Connection) -> None:
+    """Enable WAL and create (or migrate) the schema."""
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    (version,) = conn.execute("PRAGMA user_version").fetchone()
+    if version != SCHEMA_VERSION:
+        conn.execute("BEGIN IMMEDIATE")
+        # Re-check under the write lock: a concurrent run may have just migrated.
+        (version,) = conn.execute("PRAGMA user_version").fetchone()
+        if version == SCHEMA_VERSION:
+            conn.execute("COMMIT")
+            return
+        conn.execute("DROP TABLE IF EXISTS files")
+        conn.execute(
+            "CREATE TABLE files ("
+            " root TEXT NOT NULL, path TEXT NOT NULL,"
+            " dev INTEGER, ino INTEGER, mtime_ns INTEGER, size INTEGER,"
+            " binary INTEGER NOT NULL, sha256 TEXT, tokens INTEGER, token_method TEXT,"
+            " verbatim INTEGER, last_used INTEGER NOT NULL, classifier TEXT,"
+            " PRIMARY KEY (root, path))"
+        )
+        conn.execute("CREATE INDEX files_last_used ON files (last_used)")
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        conn.execute("COMMIT")
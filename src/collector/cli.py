@@ -2,29 +2,75 @@
 
 from __future__ import annotations
 
+import json
+import os
+import re
+import sys
+import time
+from collections.abc import Callable, Sequence
 from enum import Enum
+from io import BytesIO
 from pathlib import Path
-from typing import Annotated
+from typing import TYPE_CHECKING, Annotated, Any, BinaryIO
 
 import typer
-from rich.console import Console
-from rich.prompt import Prompt
-from rich.table import Table
 
 from . import __version__
-from .config import CollectorConfig
+from .api import Collector
+from .budget import PackResult
+from .cache import ScanCache
+from .compress import SUFFIXES, CompressionError, codec_for
+from .config import TRANSFORM_NAMES, CollectorConfig
+from .dedup import same_as
+from .discovery import NO_EXTENSION, FileEntry, TreeIndex
+from .formatters import default_extension
+from .listing import select_paths, summarize
+from .manifest import Manifest
+from .platform_utils import ClipboardError, copy_to_clipboard, open_with_default_app
+from .stats import STATS, Stats
+from .tokens import TokenReport, frame_tokens
+
+if TYPE_CHECKING:
+    from rich.console import Console
+
+    from .transforms import Pipeline
 
 
 class Format(str, Enum):
-    """Typer renders this as a `--format [md|txt|xml|json]` choice automatically."""
+    """Typer renders this as a `--format [md|txt|xml|json|jsonl]` choice automatically."""
     md = "md"
     txt = "txt"
     xml = "xml"
     json = "json"
-from .discovery import FileEntry, discover_extensions, walk
-from .formatters import default_extension, render
-from .platform_utils import ClipboardError, copy_to_clipboard, open_with_default_app
-from .tokens import count_tokens
+    jsonl = "jsonl"
+
+
+class Compression(str, Enum):
+    """Codec for `--compress`."""
+    gzip = "gzip"
+    zstd = "zstd"
+    xz = "xz"
+
+
+class Encoding(str, Enum):
+    """Tokenizer used by `--tokens`."""
+    cl100k_base = "cl100k_base"
+    o200k_base = "o200k_base"
+
+
+class Priority(str, Enum):
+    """Which files `--max-tokens` keeps first."""
+    include = "include"
+    smallest = "smallest"
+    near = "near"
+
+
+class Listing(str, Enum):
+    """How `--list` shows the files found."""
+    auto = "auto"
+    files = "files"
+    dirs = "dirs"
+
 
 app = typer.Typer(
     name="collect",
@@ -33,8 +79,38 @@ app = typer.Typer(
     rich_markup_mode="rich",
     add_completion=False,
 )
-console = Console(stderr=False)
-err_console = Console(stderr=True)
+
+
+class _LazyConsole:
+    """
+    A Rich ``Console`` made on first use, so that runs which print nothing
+    (``-q``, or the daemon's client) never import Rich.
+    """
+
+    def __init__(self, **options: Any) -> None:
+        self._options = options
+        self._console: Console | None = None
+
+    def __getattr__(self, name: str) -> Any:
+        if self._console is None:
+            from rich.console import Console
+
+            self._console = Console(**self._options)
+        return getattr(self._console, name)
+
+
+console: Console = _LazyConsole(stderr=False)  # type: ignore[assignment]
+err_console: Console = _LazyConsole(stderr=True)  # type: ignore[assignment]
+
+# Past this many files, a Rich table is slow to build and too long to read:
+# `--list auto` shows the directory summary and `--list files` streams rows.
+TABLE_LIMIT = 1000
+
+# A picker token that is a row number or a range of them, not a path.
+_INDEX_TOKEN = re.compile(r"\d+(?:-\d+)?")
+
+# Builds each run's Collector; `collect serve` substitutes one backed by its warm index.
+make_collector: Callable[[CollectorConfig], Collector] = Collector
 
 
 def _format_size(size: int) -> str:
@@ -46,15 +122,168 @@ def _format_size(size: int) -> str:
     return f"{size:.1f} TB"
 
 
-def _print_table(entries: list[FileEntry]) -> None:
-    """Pretty-print the discovered files as a Rich table."""
+def _print_table(
+    entries: list[FileEntry],
+    ui: Console = console,
+    report: TokenReport | None = None,
+    duplicates: dict[str, str] | None = None,
+) -> None:
+    """
+    Pretty-print the discovered files as a Rich table. With a token ``report``,
+    add each file's tokens (content plus format wrapper) and a per-directory
+    breakdown, so it's clear where the budget goes before anything is rendered.
+    ``duplicates`` (--dedup) marks which files will be references to another.
+    """
+    from rich.table import Table
+
     table = Table(show_header=True, header_style="bold cyan", border_style="dim")
     table.add_column("#", style="dim", justify="right", width=4)
     table.add_column("Path")
     table.add_column("Size", justify="right", style="green")
+    if report is not None:
+        table.add_column("Tokens", justify="right", style="magenta")
     for i, entry in enumerate(entries):
-        table.add_row(str(i), entry.rel_path.as_posix(), _format_size(entry.size))
-    console.print(table)
+        rel = entry.rel_path.as_posix()
+        if duplicates and rel in duplicates:
+            rel += f" [dim]= {duplicates[rel]}[/dim]"
+        row = [str(i), rel, _format_size(entry.size)]
+        if report is not None:
+            row.append(f"{report.per_file[i]:,}")
+        table.add_row(*row)
+    ui.print(table)
+    if report is None:
+        return
+
+    total = max(report.total, 1)
+    by_dir = Table(title="Tokens by directory", header_style="bold cyan", border_style="dim")
+    by_dir.add_column("Directory")
+    by_dir.add_column("Tokens", justify="right", style="magenta")
+    by_dir.add_column("Share", justify="right", style="dim")
+    for directory, n in report.by_directory(entries).items():
+        by_dir.add_row(f"{directory}/" if directory != "." else "./", f"{n:,}", f"{n / total:.0%}")
+    ui.print(by_dir)
+    ui.print(
+        f"[dim]≈ {report.total:,} tokens for all {len(entries)} file(s) ({report.method})[/dim]"
+    )
+
+
+def _stream_rows(
+    entries: list[FileEntry],
+    ui: Console = console,
+    report: TokenReport | None = None,
+    duplicates: dict[str, str] | None = None,
+    chunk: int = 2000,
+) -> None:
+    """
+    ``_print_table``'s rows as aligned lines, printed ``chunk`` at a time, so
+    a list of any length starts appearing at once and is never held as one
+    renderable.
+    """
+    from rich.text import Text
+
+    index_width = len(str(len(entries) - 1))
+    header = f"{'#':>{index_width}}  {'Size':>9}  "
+    if report is not None:
+        token_width = max(len(f"{max(report.per_file, default=0):,}"), len("Tokens"))
+        header += f"{'Tokens':>{token_width}}  "
+    ui.print(Text(header + "Path", style="bold cyan"), soft_wrap=True)
+    for start in range(0, len(entries), chunk):
+        lines = Text()
+        for i in range(start, min(start + chunk, len(entries))):
+            entry = entries[i]
+            rel = entry.rel_path.as_posix()
+            if i > start:
+                lines.append("\n")
+            lines.append(f"{i:>{index_width}}  ", style="dim")
+            lines.append(f"{_format_size(entry.size):>9}  ", style="green")
+            if report is not None:
+                lines.append(f"{report.per_file[i]:>{token_width},}  ", style="magenta")
+            lines.append(rel)
+            if duplicates and rel in duplicates:
+                lines.append(f" = {duplicates[rel]}", style="dim")
+        ui.print(lines, soft_wrap=True)
+    if report is not None:
+        ui.print(
+            f"[dim]≈ {report.total:,} tokens for all {len(entries)} file(s) ({report.method})[/dim]"
+        )
+
+
+def _print_summary(
+    entries: list[FileEntry],
+    depth: int,
+    ui: Console = console,
+    report: TokenReport | None = None,
+) -> None:
+    """
+    Files, bytes and (with a token ``report``) tokens per directory, down to
+    ``depth`` levels; deeper directories count towards their ancestor. Each
+    row covers its whole subtree, the root row everything, and its share is
+    of the root's tokens (or bytes, without a report).
+    """
+    from rich.table import Table
+
+    rows = summarize(entries, depth, report.per_file if report is not None else None)
+    total = max(rows[0].size if rows[0].tokens is None else rows[0].tokens, 1)
+    table = Table(header_style="bold cyan", border_style="dim")
+    table.add_column("Directory")
+    table.add_column("Files", justify="right")
+    table.add_column("Size", justify="right", style="green")
+    if report is not None:
+        table.add_column("Tokens", justify="right", style="magenta")
+    table.add_column("Share", justify="right", style="dim")
+    for row in rows:
+        name = row.path if row.depth <= 1 else row.parts[-1] + "/"
+        cells = [
+            "  " * max(row.depth - 1, 0) + name, f"{row.files:,}", _format_size(row.size)
+        ]
+        if row.tokens is not None:
+            cells.append(f"{row.tokens:,}")
+        cells.append(f"{(row.tokens if row.tokens is not None else row.size) / total:.0%}")
+        table.add_row(*cells)
+    ui.print(table)
+    ui.print(
+        f"[dim]{len(entries):,} file(s), by directory to depth {depth}; "
+        "[cyan]--list files[/cyan] lists each file[/dim]"
+    )
+
+
+def _show_entries(
+    entries: list[FileEntry],
+    listing: Listing,
+    depth: int,
+    ui: Console = console,
+    report: TokenReport | None = None,
+    duplicates: dict[str, str] | None = None,
+) -> None:
+    """Show what was found the way ``--list`` asks, scaled to how much there is."""
+    if listing is Listing.dirs or (listing is Listing.auto and len(entries) > TABLE_LIMIT):
+        _print_summary(entries, depth, ui, report)
+    elif len(entries) > TABLE_LIMIT:
+        _stream_rows(entries, ui, report, duplicates)
+    else:
+        _print_table(entries, ui, report, duplicates)
+
+
+def _print_omitted(result: PackResult, total: int, ui: Console = console, limit: int = 20) -> None:
+    """Summarise a --max-tokens packing: what fit, and the first ``limit`` files left out."""
+    from rich.table import Table
+
+    ui.print(
+        f"[bold]Packed {len(result.indices)} of {total} file(s)[/bold] into "
+        f"≈ {result.tokens:,} / {result.limit:,} tokens"
+    )
+    if not result.omitted:
+        return
+    table = Table(title="Left out", header_style="bold yellow", border_style="dim")
+    table.add_column("Path")
+    table.add_column("Tokens", justify="right", style="magenta")
+    table.add_column("Reason", style="dim")
+    biggest_first = sorted(result.omitted, key=lambda o: -o.tokens)
+    for omission in biggest_first[:limit]:
+        table.add_row(omission.entry.rel_path.as_posix(), f"{omission.tokens:,}", omission.reason)
+    ui.print(table)
+    if len(result.omitted) > limit:
+        ui.print(f"[dim]… and {len(result.omitted) - limit} more[/dim]")
 
 
 def _parse_indices(raw: str, total: int) -> list[int] | None:
@@ -85,12 +314,46 @@ def _parse_indices(raw: str, total: int) -> list[int] | None:
     return sorted(out)
 
 
-def _prompt_extensions(root: Path) -> set[str]:
+def _parse_selection(raw: str, entries: Sequence[FileEntry]) -> list[int] | None:
+    """
+    Parse a picker answer: ``_parse_indices`` numbers and ranges, mixed with
+    root-relative directories, files and globs ("src/", "README.md", "*.md").
+    Tokens apply left to right, and a leading "!" drops what one names
+    ("src/ !src/tests/"); answers of only such tokens start from every
+    file. Returns None on a malformed token, or a path or glob that names no
+    file, so the caller can re-prompt.
+    """
+    tokens = raw.replace(",", " ").split()
+    if not tokens:
+        return list(range(len(entries)))
+    only_drops = all(token.startswith("!") for token in tokens)
+    chosen: set[int] = set(range(len(entries))) if only_drops else set()
+    for token in tokens:
+        drop = token.startswith("!")
+        body = token[1:] if drop else token
+        if not body:
+            return None
+        if _INDEX_TOKEN.fullmatch(body):
+            picked = _parse_indices(body, len(entries))
+        else:
+            picked = select_paths(entries, body) or None
+        if picked is None:
+            return None
+        if drop:
+            chosen.difference_update(picked)
+        else:
+            chosen.update(picked)
+    return sorted(chosen)
+
+
+def _prompt_extensions(index: TreeIndex, ui: Console = console) -> set[str]:
     """Interactively prompt the user to pick extensions, showing what's present."""
-    survey = CollectorConfig(root=root)
-    available = discover_extensions(survey)
+    from rich.prompt import Prompt
+    from rich.table import Table
+
+    available = index.extension_counts()
     if not available:
-        console.print("[red]No files found in this directory.[/red]")
+        ui.print("[red]No files found in this directory.[/red]")
         raise typer.Exit(code=1)
 
     table = Table(title="Available extensions", header_style="bold cyan")
@@ -98,32 +361,222 @@ def _prompt_extensions(root: Path) -> set[str]:
     table.add_column("Count", justify="right", style="green")
     for ext, count in available.items():
         table.add_row(ext, str(count))
-    console.print(table)
+    ui.print(table)
 
     raw = Prompt.ask(
         "[bold]Extensions to collect[/bold] (space-separated, or [italic]all[/italic])",
         default="all",
+        console=ui,
     )
     if raw.strip().lower() == "all":
-        return {ext for ext in available if ext != "(no ext)"}
+        return {ext for ext in available if ext != NO_EXTENSION}
     return {e.strip().lstrip(".") for e in raw.split() if e.strip()}
 
 
+def _parse_excerpt(raw: str) -> tuple[int, int]:
+    """`--excerpt 200,50` -> (200, 50); a lone number keeps that many head lines only."""
+    head, _, tail = raw.partition(",")
+    try:
+        lines = int(head), int(tail or 0)
+    except ValueError:
+        lines = (-1, -1)
+    if min(lines) < 0 or not any(lines):
+        err_console.print(f"[red]--excerpt wants HEAD[,TAIL] line counts, got {raw!r}.[/red]")
+        raise typer.Exit(code=2)
+    return lines
+
+
+def _is_stdout(path: Path | None) -> bool:
+    """`--output -` means stream the bundle to stdout."""
+    return path is not None and str(path) == "-"
+
+
 def _resolve_output_path(
-    user_supplied: Path | None, fmt: str, root: Path
+    user_supplied: Path | None, fmt: str, root: Path, codec: str | None = None
 ) -> Path:
     """Decide the output file path, picking a sensible default and extension."""
+    if user_supplied is not None and _is_stdout(user_supplied):
+        return user_supplied
+    ext = default_extension(fmt)
+    suffix = SUFFIXES[codec] if codec else ""
     if user_supplied is not None:
-        # Honor explicit name but ensure extension matches format.
-        ext = default_extension(fmt)
+        # Honor explicit name but ensure extension matches format (and codec).
+        if suffix and user_supplied.suffix.lower() == suffix:
+            user_supplied = user_supplied.with_suffix("")
         if user_supplied.suffix.lower() != ext:
             user_supplied = user_supplied.with_suffix(ext)
-        return user_supplied
-    return root / f"collected{default_extension(fmt)}"
+        return user_supplied.with_name(user_supplied.name + suffix)
+    return root / f"collected{ext}{suffix}"
+
+
+def _temp_path(path: Path) -> Path:
+    """The sibling a bundle is written to before it replaces ``path``."""
+    return path.with_name(f".{path.name}.tmp")
+
+
+def _root_relative(paths: set[Path], root: Path) -> set[str]:
+    """Root-relative POSIX forms of those ``paths`` that lie under ``root``."""
+    base = root.resolve()
+    out = set()
+    for path in paths:
+        try:
+            out.add(path.resolve().relative_to(base).as_posix())
+        except ValueError:
+            continue
+    return out
+
+
+def _relative_to_root(path: Path, root: Path) -> str:
+    """`--near` accepts a path from the cwd or from the root; return it root-relative."""
+    resolved = path.resolve()
+    try:
+        return resolved.relative_to(root).as_posix()
+    except ValueError:
+        return path.as_posix()
+
+
+def _write_manifest(
+    collector: Collector,
+    path: Path,
+    walked: list[FileEntry],
+    hashes: dict[str, str],
+    previous: Manifest | None,
+) -> None:
+    """Record every walked file (not just the emitted ones) as the next --since baseline."""
+    try:
+        collector.write_manifest(path, walked, hashes, previous)
+    except OSError as e:
+        err_console.print(f"[red]Couldn't write manifest:[/red] {e}")
+        raise typer.Exit(code=2) from e
+
+
+def _render(
+    collector: Collector,
+    selected: list[FileEntry],
+    sink: BinaryIO,
+    deleted: list[str],
+    hashes: dict[str, str],
+    copies: dict[str, str],
+) -> int:
+    """``Collector.render`` into ``sink``, exiting with a message if the codec is missing."""
+    try:
+        return collector.render(selected, sink, deleted, hashes, copies)
+    except CompressionError as e:
+        err_console.print(f"[red]{e}[/red]")
+        raise typer.Exit(code=2) from e
 
 
-def _version_callback(value: bool) -> None:
-    if value:
+def _watch(config: CollectorConfig, out_path: Path, cache: ScanCache | None, poll: bool) -> None:
+    """Keep ``out_path`` current until interrupted."""
+    from .watch import Session
+
+    session = Session(
+        config, out_path, cache, debounce=config.debounce_ms / 1000, force_polling=poll
+    )
+    n_bytes = session.start()
+    console.print(
+        f"[green]✓[/green] Wrote [bold]{len(session.entries)}[/bold] file(s) to "
+        f"[cyan]{out_path}[/cyan] ({_format_size(n_bytes)}); watching via {session.method}, "
+        "Ctrl-C to stop"
+    )
+    try:
+        for update in session.run():
+            console.print(
+                f"[dim]{time.strftime('%H:%M:%S')}[/dim] ↻ {update.changed} changed, "
+                f"{update.added} added, {update.removed} removed → "
+                f"{_format_size(update.bytes)} in {update.seconds * 1000:.1f} ms"
+            )
+    except KeyboardInterrupt:
+        console.print("[dim]Stopped watching.[/dim]")
+    finally:
+        session.close()
+
+
+# Phases measured inside another one, shown indented under it.
+_SUBPHASES = {"git", "list", "filter", "sniff", "read", "copy"}
+
+
+def _print_stats(snapshot: dict[str, dict], ui: Console = console) -> None:
+    """--stats: time per phase, counters, and what was skipped and why."""
+    from rich.table import Table
+
+    seconds = snapshot["seconds"]
+    total = seconds.get("total") or 0.0
+    phases = Table(title="Time by phase", header_style="bold cyan", border_style="dim")
+    phases.add_column("Phase")
+    phases.add_column("Seconds", justify="right", style="green")
+    phases.add_column("Share", justify="right", style="dim")
+    for phase, secs in seconds.items():
+        label = f"  {phase}" if phase in _SUBPHASES else phase
+        phases.add_row(label, f"{secs:.3f}", f"{secs / total:.0%}" if total else "")
+    ui.print(phases)
+
+    counts = Table(title="Counters", header_style="bold cyan", border_style="dim")
+    counts.add_column("Counter")
+    counts.add_column("Value", justify="right", style="green")
+    for name, value in snapshot["counts"].items():
+        counts.add_row(name, _format_size(value) if "bytes" in name else f"{value:,}")
+    ui.print(counts)
+
+    files, dirs = snapshot["skipped"]["files"], snapshot["skipped"]["dirs"]
+    if files or dirs:
+        skipped = Table(title="Skipped", header_style="bold yellow", border_style="dim")
+        skipped.add_column("Reason")
+        skipped.add_column("Files", justify="right", style="magenta")
+        skipped.add_column("Dirs", justify="right", style="magenta")
+        for reason in dict.fromkeys([*files, *dirs]):
+            skipped.add_row(reason, f"{files.get(reason, 0):,}", f"{dirs.get(reason, 0):,}")
+        ui.print(skipped)
+    if any(phase in _SUBPHASES for phase in seconds):
+        ui.print("[dim]Indented phases are part of the one above; with --jobs they are "
+                 "summed across threads.[/dim]")
+
+
+def _report_stats(
+    before: Stats, started: float, show: bool, json_path: Path | None, ui: Console
+) -> None:
+    """Print and/or write what this run recorded (everything since ``before``)."""
+    if not show and json_path is None:
+        return
+    run = STATS.minus(before)
+    run.seconds["total"] = time.perf_counter() - started
+    snapshot = run.snapshot()
+    if show:
+        _print_stats(snapshot, ui)
+    if json_path is None:
+        return
+    payload = json.dumps(snapshot, indent=2) + "\n"
+    if _is_stdout(json_path):
+        sys.stdout.write(payload)
+        return
+    try:
+        json_path.write_text(payload, encoding="utf-8")
+    except OSError as e:
+        err_console.print(f"[red]Couldn't write stats:[/red] {e}")
+        raise typer.Exit(code=2) from e
+
+
+def _print_transforms(pipeline: Pipeline, ui: Console = console) -> None:
+    """What each content transform took off the bundle."""
+    from rich.table import Table
+
+    counted = pipeline.encoding is not None
+    table = Table(title="Transforms", header_style="bold cyan", border_style="dim")
+    table.add_column("Transform")
+    table.add_column("Files changed", justify="right", style="magenta")
+    table.add_column("Bytes saved", justify="right", style="green")
+    if counted:
+        table.add_column("Tokens saved", justify="right", style="green")
+    for name, saving in pipeline.savings.items():
+        row = [name, f"{saving.files:,}", _format_size(saving.bytes)]
+        if counted:
+            row.append(f"≈ {saving.tokens:,}")
+        table.add_row(*row)
+    ui.print(table)
+
+
+def _version_callback(ctx: typer.Context, value: bool) -> None:
+    if value and not ctx.resilient_parsing:
         console.print(f"file-collector [bold cyan]{__version__}[/bold cyan]")
         raise typer.Exit()
 
@@ -152,13 +605,16 @@ def main(
     ] = False,
     output: Annotated[
         Path | None,
-        typer.Option("--output", "-o", help="Output file path. Defaults to ./collected.<ext>."),
+        typer.Option(
+            "--output", "-o",
+            help="Output file path, or [cyan]-[/cyan] for stdout. Defaults to ./collected.<ext>.",
+        ),
     ] = None,
     fmt: Annotated[
         Format,
         typer.Option(
             "--format", "-f",
-            help="Output format: md, txt, xml, json.",
+            help="Output format: md, txt, xml, json, jsonl.",
         ),
     ] = Format.md,
     clipboard: Annotated[
@@ -169,6 +625,53 @@ def main(
         bool,
         typer.Option("--open", help="Open the output file with the default app after writing."),
     ] = False,
+    compress: Annotated[
+        Compression | None,
+        typer.Option(
+            "--compress", "-z",
+            help="Compress the bundle while writing it (default: from a .gz/.zst/.xz "
+            "output suffix). Uses --jobs threads.",
+            show_default=False,
+        ),
+    ] = None,
+    watch: Annotated[
+        bool,
+        typer.Option(
+            "--watch", "-w",
+            help="Keep the output file up to date as files change (implies --all).",
+        ),
+    ] = False,
+    poll: Annotated[
+        bool,
+        typer.Option("--poll", help="With --watch, poll instead of using inotify."),
+    ] = False,
+    debounce: Annotated[
+        int,
+        typer.Option("--debounce", min=0, help="With --watch, ms of quiet before rewriting."),
+    ] = 50,
+    dedup: Annotated[
+        bool,
+        typer.Option(
+            "--dedup",
+            help="Emit byte-identical files once; later copies become a reference to the first.",
+        ),
+    ] = False,
+    manifest_path: Annotated[
+        Path | None,
+        typer.Option(
+            "--manifest",
+            help="Also write a manifest (path, size, mtime, hash) usable with --since later.",
+        ),
+    ] = None,
+    since: Annotated[
+        str | None,
+        typer.Option(
+            "--since",
+            help="Only emit files added or modified since this manifest or git ref, "
+            "and list deleted ones.",
+            show_default=False,
+        ),
+    ] = None,
     exclude: Annotated[
         list[str] | None,
         typer.Option(
@@ -190,18 +693,148 @@ def main(
             help="Skip files larger than this (bytes). Default 1 MB.",
         ),
     ] = 1_000_000,
+    excerpt: Annotated[
+        str | None,
+        typer.Option(
+            "--excerpt",
+            metavar="HEAD[,TAIL]",
+            help="Emit files over --max-size as their first HEAD and last TAIL lines, "
+            "with a marker for the rest, instead of skipping them.",
+            show_default=False,
+        ),
+    ] = None,
+    excerpt_bytes: Annotated[
+        int,
+        typer.Option(
+            "--excerpt-bytes", min=0, help="Emit files over --max-size as their first N bytes."
+        ),
+    ] = 0,
+    jobs: Annotated[
+        int,
+        typer.Option(
+            "--jobs", "-j",
+            min=0,
+            help="Scan directories on N threads (0 = one per CPU). Output order is unchanged.",
+        ),
+    ] = 1,
     no_gitignore: Annotated[
         bool,
         typer.Option("--no-gitignore", help="Do not respect .gitignore rules."),
     ] = False,
+    git_index: Annotated[
+        bool,
+        typer.Option(
+            "--git-index",
+            help="Inside a git work tree, list files with git ls-files instead of walking "
+            "(tracked files are kept even if .gitignore matches them).",
+        ),
+    ] = False,
+    tracked_only: Annotated[
+        bool,
+        typer.Option(
+            "--tracked-only", help="In a git work tree, skip untracked files (implies --git-index)."
+        ),
+    ] = False,
+    no_classify: Annotated[
+        bool,
+        typer.Option(
+            "--no-classify",
+            help="Sniff every file's content, even where its extension says text or binary.",
+        ),
+    ] = False,
+    text_ext: Annotated[
+        list[str] | None,
+        typer.Option("--text-ext", help="Treat this extension as text (repeatable)."),
+    ] = None,
+    binary_ext: Annotated[
+        list[str] | None,
+        typer.Option(
+            "--binary-ext", help="Treat this extension as binary, never opening it (repeatable)."
+        ),
+    ] = None,
     no_tree: Annotated[
         bool,
         typer.Option("--no-tree", help="Skip the file tree header in text/markdown output."),
     ] = False,
+    transform: Annotated[
+        list[str] | None,
+        typer.Option(
+            "--transform",
+            metavar="NAME",
+            help="Rewrite file content to save tokens (repeatable): "
+            f"{', '.join(TRANSFORM_NAMES)}.",
+            show_default=False,
+        ),
+    ] = None,
+    outline: Annotated[
+        list[str] | None,
+        typer.Option(
+            "--outline",
+            metavar="GLOB",
+            help="Emit files matching this glob as imports and signatures only (repeatable).",
+            show_default=False,
+        ),
+    ] = None,
     count_tokens_flag: Annotated[
         bool,
         typer.Option("--tokens", help="Estimate token count (uses tiktoken if installed)."),
     ] = False,
+    encoding: Annotated[
+        Encoding,
+        typer.Option("--encoding", help="tiktoken encoding for --tokens."),
+    ] = Encoding.cl100k_base,
+    max_tokens: Annotated[
+        int | None,
+        typer.Option(
+            "--max-tokens",
+            min=1,
+            help="Keep only the highest-priority files that fit in this many tokens.",
+        ),
+    ] = None,
+    priority: Annotated[
+        Priority,
+        typer.Option(
+            "--priority",
+            help="Packing order for --max-tokens: include-glob order, smallest first, "
+            "or nearest to --near.",
+        ),
+    ] = Priority.include,
+    near: Annotated[
+        Path | None,
+        typer.Option("--near", help="Path to pack around; implies --priority near."),
+    ] = None,
+    no_cache: Annotated[
+        bool,
+        typer.Option("--no-cache", help="Don't read or write the persistent scan cache."),
+    ] = False,
+    rebuild_cache: Annotated[
+        bool,
+        typer.Option("--rebuild-cache", help="Discard this root's cached scan data first."),
+    ] = False,
+    listing: Annotated[
+        Listing,
+        typer.Option(
+            "--list",
+            help="How to show the files found: a row per file, totals per directory, or "
+            f"auto (per directory past {TABLE_LIMIT:,} files).",
+        ),
+    ] = Listing.auto,
+    depth: Annotated[
+        int,
+        typer.Option("--depth", min=0, help="Directory levels in the per-directory listing."),
+    ] = 2,
+    stats: Annotated[
+        bool,
+        typer.Option("--stats", help="Print time per phase, syscalls, bytes and skip reasons."),
+    ] = False,
+    stats_json: Annotated[
+        Path | None,
+        typer.Option(
+            "--stats-json",
+            help="Write the --stats figures as JSON to this path ([cyan]-[/cyan] for stdout).",
+            show_default=False,
+        ),
+    ] = None,
     quiet: Annotated[
         bool,
         typer.Option("--quiet", "-q", help="Suppress non-essential output."),
@@ -224,15 +857,16 @@ def main(
       • [cyan]collect -a -f xml -o ctx.xml[/cyan]  Bundle everything (gitignored excluded) into XML
       • [cyan]collect py -x 'tests/**'[/cyan]      All .py files except those under tests/
       • [cyan]collect --tokens -a -c[/cyan]        Copy everything and report token count
+      • [cyan]collect -a --max-tokens 200000[/cyan] As much as fits in 200k tokens
     """
-    # Build config.
-    exts: set[str] = {e.lstrip(".").lower() for e in (extensions or [])}
-    if not exts and not all_files:
-        exts = _prompt_extensions(root)
-    if not exts and all_files:
-        # --all without extensions means "every text file we can find".
-        exts = set()
+    # With `-o -` stdout carries the bundle, so all chatter goes to stderr.
+    to_stdout = _is_stdout(output) and not clipboard
+    ui = err_console if to_stdout else console
+    started, before = time.perf_counter(), STATS.copy()
 
+    # Build config. --all without extensions means "every text file we can find".
+    exts: set[str] = {e.lstrip(".").lower() for e in (extensions or [])}
+    head_lines, tail_lines = _parse_excerpt(excerpt) if excerpt is not None else (0, 0)
     config = CollectorConfig(
         root=root,
         extensions=exts,
@@ -240,74 +874,223 @@ def main(
         include_globs=list(include or []),
         respect_gitignore=not no_gitignore,
         max_file_size=max_size,
+        excerpt_head=head_lines,
+        excerpt_tail=tail_lines,
+        excerpt_bytes=excerpt_bytes,
         output_format=fmt.value,
         output_path=output,
+        compression=compress.value if compress is not None else codec_for(output),
         copy_to_clipboard=clipboard,
         open_after=open_after,
         extract_all=all_files,
         show_tree=not no_tree,
+        transforms=list(transform or []),
+        outline_globs=list(outline or []),
         count_tokens=count_tokens_flag,
+        token_encoding=encoding.value,
+        max_tokens=max_tokens,
+        priority=Priority.near.value if near is not None else priority.value,
+        near=_relative_to_root(near, root) if near is not None else None,
+        jobs=jobs or os.cpu_count() or 1,
+        watch=watch,
+        debounce_ms=debounce,
+        git_index=git_index or tracked_only,
+        classify=not no_classify,
+        text_extensions=set(text_ext or []),
+        binary_extensions=set(binary_ext or []),
+        git_untracked=not tracked_only,
+        dedup=dedup,
+        use_cache=not no_cache,
+        rebuild_cache=rebuild_cache,
     )
 
-    # Discover.
-    entries: list[FileEntry] = list(walk(config))
-    if not entries:
-        err_console.print("[red]No matching files found.[/red]")
-        raise typer.Exit(code=1)
+    unknown = [name for name in config.transforms if name not in TRANSFORM_NAMES]
+    if unknown:
+        err_console.print(
+            f"[red]Unknown transform {unknown[0]!r}; "
+            f"choose from {', '.join(TRANSFORM_NAMES)}.[/red]"
+        )
+        raise typer.Exit(code=2)
+    if to_stdout and _is_stdout(stats_json):
+        err_console.print("[red]-o - and --stats-json - can't both use stdout.[/red]")
+        raise typer.Exit(code=2)
+    if clipboard and config.compression is not None:
+        err_console.print("[red]--compress writes binary data; it can't go to the clipboard.[/red]")
+        raise typer.Exit(code=2)
+    if config.watch:
+        if (
+            clipboard or to_stdout or since is not None or max_tokens is not None
+            or config.compression is not None or config.dedup
+        ):
+            err_console.print(
+                "[red]--watch writes a file; it can't be combined with --copy, -o -, "
+                "--since, --max-tokens, --compress or --dedup.[/red]"
+            )
+            raise typer.Exit(code=2)
+        with Collector(config) as collector:
+            _watch(config, _resolve_output_path(output, fmt.value, root), collector.cache, poll)
+        _report_stats(before, started, stats, stats_json, ui)
+        return
 
-    # Show what we found.
-    if not quiet:
-        _print_table(entries)
+    # Discover. When prompting for extensions, one survey feeds both the
+    # extension table and the file list.
+    with make_collector(config) as collector:
+        if not exts and not all_files:
+            index = collector.index()
+            config.extensions = _prompt_extensions(index, ui)
+            entries: list[FileEntry] = index.select(config.extensions)
+        else:
+            entries = collector.walk()
+        collector.flush()
+        # A previous bundle in the root is never read back into this one.
+        out_path = None
+        if not clipboard and not to_stdout:
+            out_path = _resolve_output_path(output, fmt.value, root, config.compression)
+            own = _root_relative({out_path, _temp_path(out_path)}, root)
+            entries = [e for e in entries if e.rel_path.as_posix() not in own]
+        if not entries:
+            err_console.print("[red]No matching files found.[/red]")
+            raise typer.Exit(code=1)
 
-    # Selection: --all skips the prompt entirely.
-    if all_files or len(entries) == 1:
-        selected = entries
-    else:
-        while True:
-            raw = Prompt.ask(
-                "[bold]Files to include[/bold] (e.g. '0 3 5', '0-4', '0,2,5-7'; blank = all)",
-                default="",
-            )
-            indices = _parse_indices(raw, len(entries))
-            if indices is not None:
-                selected = [entries[i] for i in indices]
-                break
-            err_console.print("[red]Invalid selection. Try again.[/red]")
+        # --since: keep what was added or modified, and remember what's gone.
+        walked, deleted, previous = entries, [], None
+        hashes: dict[str, str] = {}
+        if since is not None:
+            try:
+                changes, previous = collector.changes_since(walked, since)
+            except ValueError as e:
+                err_console.print(f"[red]--since {since}:[/red] {e}")
+                raise typer.Exit(code=2) from e
+            entries, deleted = changes.changed, changes.deleted
+            if not quiet:
+                ui.print(
+                    f"Since [cyan]{since}[/cyan]: [bold]{len(entries)}[/bold] changed file(s) "
+                    f"({changes.added} new), [bold]{len(deleted)}[/bold] deleted"
+                )
+            if not entries and not deleted:
+                if manifest_path is not None:
+                    _write_manifest(collector, manifest_path, walked, hashes, previous)
+                ui.print("[yellow]No changes.[/yellow]")
+                raise typer.Exit(code=0)
 
-    if not selected:
-        err_console.print("[yellow]Nothing selected.[/yellow]")
-        raise typer.Exit(code=0)
+        # --dedup: find byte-identical files before counting, so budgets see the savings.
+        copies = collector.find_copies(entries)
 
-    # Render.
-    output_text = render(selected, fmt.value, include_tree=not no_tree)
+        # Count tokens per file up front so the table (and --max-tokens) can use them.
+        report = None
+        if (count_tokens_flag and not quiet) or config.max_tokens is not None:
+            report = collector.count_tokens(entries, deleted, copies)
+        collector.flush()
 
-    # Emit.
-    if clipboard:
-        try:
-            copy_to_clipboard(output_text)
-        except ClipboardError as e:
-            err_console.print(f"[red]Clipboard error:[/red] {e}")
-            raise typer.Exit(code=2) from e
-        if not quiet:
-            console.print(
-                f"[green]✓[/green] Copied [bold]{len(selected)}[/bold] file(s) "
-                f"to clipboard ({_format_size(len(output_text.encode('utf-8')))})"
-            )
-    else:
-        out_path = _resolve_output_path(output, fmt.value, root)
-        out_path.write_text(output_text, encoding="utf-8")
+        if config.max_tokens is not None and report is not None:
+            if config.priority == Priority.near.value and config.near is None:
+                err_console.print("[red]--priority near needs --near PATH.[/red]")
+                raise typer.Exit(code=2)
+            packed = collector.pack(entries, report, deleted)
+            if not quiet:
+                _print_omitted(packed, len(entries), ui)
+            if not packed.indices:
+                err_console.print(f"[red]No file fits in {config.max_tokens:,} tokens.[/red]")
+                raise typer.Exit(code=1)
+            entries, report = [entries[i] for i in packed.indices], packed.report
+
+        # Show what we found.
         if not quiet:
-            console.print(
-                f"[green]✓[/green] Wrote [bold]{len(selected)}[/bold] file(s) to "
-                f"[cyan]{out_path}[/cyan] ({_format_size(out_path.stat().st_size)})"
-            )
-        if open_after:
-            open_with_default_app(out_path)
+            _show_entries(entries, listing, depth, ui, report, same_as(entries, copies))
+
+        # Selection: --all skips the prompt entirely.
+        if all_files or len(entries) <= 1:
+            selected = entries
+        else:
+            from rich.prompt import Prompt
+
+            while True:
+                raw = Prompt.ask(
+                    "[bold]Files to include[/bold] (e.g. '0 3 5', '0-4', 'src/ !src/tests/', "
+                    "'*.md'; blank = all)",
+                    default="",
+                    console=ui,
+                )
+                indices = _parse_selection(raw, entries)
+                if indices is not None:
+                    selected = [entries[i] for i in indices]
+                    if report is not None:
+                        renderer = collector.renderer(deleted)
+                        frame = frame_tokens(selected, renderer, config.token_encoding)
+                        report = report.subset(indices, frame)
+                    break
+                err_console.print("[red]Invalid selection. Try again.[/red]")
+
+        if not selected and not deleted:
+            err_console.print("[yellow]Nothing selected.[/yellow]")
+            raise typer.Exit(code=0)
+        duplicates = same_as(selected, copies)
+
+        # Render straight into the sink; only the clipboard needs the whole text.
+        if clipboard:
+            buf = BytesIO()
+            n_bytes = _render(collector, selected, buf, deleted, hashes, copies)
+            try:
+                copy_to_clipboard(buf.getvalue().decode("utf-8"))
+            except ClipboardError as e:
+                err_console.print(f"[red]Clipboard error:[/red] {e}")
+                raise typer.Exit(code=2) from e
+            if not quiet:
+                ui.print(
+                    f"[green]✓[/green] Copied [bold]{len(selected)}[/bold] file(s) "
+                    f"to clipboard ({_format_size(n_bytes)})"
+                )
+        elif to_stdout:
+            n_bytes = _render(collector, selected, sys.stdout.buffer, deleted, hashes, copies)
+            sys.stdout.buffer.flush()
+            if not quiet:
+                ui.print(
+                    f"[green]✓[/green] Wrote [bold]{len(selected)}[/bold] file(s) "
+                    f"to stdout ({_format_size(n_bytes)})"
+                )
+        else:
+            # Render beside the target and move it in place, so a failed run
+            # leaves the previous bundle intact.
+            tmp = _temp_path(out_path)
+            try:
+                with tmp.open("wb") as fh:
+                    n_bytes = _render(collector, selected, fh, deleted, hashes, copies)
+                tmp.replace(out_path)
+            except BaseException:
+                tmp.unlink(missing_ok=True)
+                raise
+            if not quiet:
+                size = _format_size(n_bytes)
+                if config.compression is not None:
+                    size += f" → {_format_size(out_path.stat().st_size)} {config.compression}"
+                ui.print(
+                    f"[green]✓[/green] Wrote [bold]{len(selected)}[/bold] file(s) to "
+                    f"[cyan]{out_path}[/cyan] ({size})"
+                )
+            if open_after:
+                open_with_default_app(out_path)
+
+        if manifest_path is not None:
+            _write_manifest(collector, manifest_path, walked, hashes, previous)
+            if not quiet:
+                ui.print(f"[dim]Manifest of {len(walked)} file(s) written to {manifest_path}[/dim]")
+
+    if duplicates and not quiet:
+        by_path = {e.rel_path.as_posix(): e for e in selected}
+        saved = sum(by_path[rel].size for rel in duplicates)
+        tokens_saved = f", ≈ {report.saved:,} tokens" if report is not None else ""
+        ui.print(
+            f"[dim]Deduplicated {len(duplicates)} identical file(s): "
+            f"{_format_size(saved)} of content{tokens_saved} not repeated[/dim]"
+        )
+
+    if collector.pipeline is not None and not quiet:
+        _print_transforms(collector.pipeline, ui)
 
     # Token report.
-    if count_tokens_flag and not quiet:
-        n_tokens, method = count_tokens(output_text)
-        console.print(f"[dim]≈ {n_tokens:,} tokens ({method})[/dim]")
+    if report is not None and not quiet:
+        ui.print(f"[dim]≈ {report.total:,} tokens ({report.method})[/dim]")
+    _report_stats(before, started, stats, stats_json, ui)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,114 @@
+"""
+Client side of ``collect serve``: hand a ``collect`` run to the daemon, if one
+is running, and relay its output.
+
+Standard library only (not even pathlib), so trying the daemon costs little
+more than a ``connect``: the ``collect`` entry point calls ``delegate``
+before it imports the CLI. The daemon answers "run it yourself" for anything it doesn't serve
+(prompts, --watch, --copy, ...), and the CLI then runs locally as usual.
+Set ``COLLECTOR_NO_DAEMON=1`` to always run locally.
+
+Protocol, over a Unix socket: the client sends one JSON line (argv, working
+directory, whether stdout and stderr are terminals, and the environment that
+shapes terminal output). The daemon replies with frames of a one-byte
+channel and a 4-byte big-endian length: ``o`` and ``e`` carry stdout and
+stderr bytes, ``x`` carries the exit status (ASCII digits) and ends the
+reply, and ``l`` means "run it locally".
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import struct
+import sys
+
+FRAME = struct.Struct(">cI")
+STDOUT = b"o"
+STDERR = b"e"
+EXIT = b"x"
+LOCAL = b"l"
+
+# Forwarded so the daemon formats output the way a local run would.
+FORWARDED_ENV = ("TERM", "COLORTERM", "NO_COLOR", "FORCE_COLOR", "COLUMNS", "LINES")
+
+
+def socket_path() -> str:
+    """``$COLLECTOR_SOCKET``, else ``file-collector.sock`` in ``$XDG_RUNTIME_DIR`` or /tmp."""
+    explicit = os.environ.get("COLLECTOR_SOCKET")
+    if explicit:
+        return explicit
+    runtime = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime:
+        return f"{runtime}/file-collector.sock"
+    return f"/tmp/file-collector-{os.getuid()}.sock"
+
+
+def _terminal_env() -> dict[str, str]:
+    env = {name: os.environ[name] for name in FORWARDED_ENV if name in os.environ}
+    if "COLUMNS" not in env:
+        for fd in (1, 2):
+            try:
+                env["COLUMNS"] = str(os.get_terminal_size(fd).columns)
+                break
+            except OSError:
+                continue
+    return env
+
+
+def _write_all(fd: int, data: bytes) -> None:
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
+
+
+def delegate(argv: list[str]) -> int | None:
+    """
+    Run ``collect argv`` on the daemon, relaying its stdout and stderr.
+    Returns the exit status, or None if there is no daemon (one owned by
+    another user doesn't count) or it leaves this run to the caller.
+    """
+    if os.environ.get("COLLECTOR_NO_DAEMON"):
+        return None
+    try:
+        path = socket_path()
+        if os.stat(path).st_uid != os.getuid():  # noqa: PTH116
+            return None
+    except (OSError, AttributeError):
+        return None  # no socket (or no os.getuid: Windows, where there's no daemon)
+    import socket  # only once there is a daemon to talk to
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path)
+    except OSError:
+        sock.close()
+        return None
+    request = {
+        "argv": argv,
+        "cwd": os.getcwd(),  # noqa: PTH109
+        "tty": [os.isatty(1), os.isatty(2)],
+        "env": _terminal_env(),
+    }
+    relayed = False
+    with sock, sock.makefile("rb") as replies:
+        try:
+            sock.sendall(json.dumps(request).encode() + b"\n")
+            while len(head := replies.read(FRAME.size)) == FRAME.size:
+                channel, length = FRAME.unpack(head)
+                data = replies.read(length)
+                if channel == LOCAL:
+                    return None
+                if channel == EXIT:
+                    return int(data)
+                relayed = True
+                _write_all(1 if channel == STDOUT else 2, data)
+        except BrokenPipeError:
+            if relayed:
+                return 1  # our stdout was closed (`| head`); the daemon gives up on its own
+        except OSError:
+            pass
+    if not relayed:
+        return None  # the daemon went away before answering: run locally instead
+    print("collect: the daemon closed the connection mid-run", file=sys.stderr)
+    return 1
@@ -0,0 +1,132 @@
+"""
+Compressed bundle output: gzip, zstd or xz, compressed while rendering.
+
+With one job the bundle goes through the codec's ordinary streaming writer.
+With more, the stream is cut into fixed-size blocks that are compressed on a
+thread pool (zlib, lzma and zstandard all release the GIL) and written in
+order, each as a self-contained gzip member, xz stream or zstd frame. Those
+formats define a concatenation of members/streams/frames as one file, so the
+result decompresses with ``zcat``/``xzcat``/``zstdcat`` or the Python
+modules, streaming, with no index or special reader. zstd needs the optional
+``zstandard`` package.
+"""
+
+from __future__ import annotations
+
+import gzip
+import io
+import lzma
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import BinaryIO
+
+CODECS = ("gzip", "zstd", "xz")
+SUFFIXES = {"gzip": ".gz", "zstd": ".zst", "xz": ".xz"}
+
+# Big enough that per-block headers and the lost cross-block context cost
+# little ratio; small enough that 2 x jobs blocks in flight stay cheap.
+_BLOCK_SIZE = {"gzip": 1 << 20, "zstd": 4 << 20, "xz": 8 << 20}
+# gzip(1)'s default; Python's gzip module defaults to the much slower 9.
+_GZIP_LEVEL = 6
+
+
+class CompressionError(RuntimeError):
+    """Raised when a codec isn't available."""
+
+
+def codec_for(path: Path | None) -> str | None:
+    """The codec an output path's suffix asks for (``ctx.md.gz`` -> gzip), if any."""
+    if path is None:
+        return None
+    suffix = path.suffix.lower()
+    return next((codec for codec, ext in SUFFIXES.items() if ext == suffix), None)
+
+
+def _zstandard():  # noqa: ANN202 - module object
+    try:
+        import zstandard
+    except ImportError as e:
+        raise CompressionError(
+            "zstd output needs the zstandard package. Run: pip install 'file-collector[zstd]'"
+        ) from e
+    return zstandard
+
+
+def _block_compressor(codec: str) -> Callable[[bytes], bytes]:
+    """A thread-safe function compressing one block into a self-contained unit."""
+    if codec == "gzip":
+        return lambda block: gzip.compress(block, _GZIP_LEVEL, mtime=0)
+    if codec == "xz":
+        return lambda block: lzma.compress(block, format=lzma.FORMAT_XZ)
+    zstandard = _zstandard()
+    # ZstdCompressor objects aren't safe to share between threads.
+    return lambda block: zstandard.ZstdCompressor().compress(block)
+
+
+class _BlockWriter(io.RawIOBase):
+    """Write-only stream compressing ``block_size`` chunks on ``jobs`` threads, in order."""
+
+    def __init__(
+        self, raw: BinaryIO, compress: Callable[[bytes], bytes], block_size: int, jobs: int
+    ) -> None:
+        super().__init__()
+        self.raw = raw
+        self._compress = compress
+        self._block_size = block_size
+        self._buf = bytearray()
+        self._pending: deque[Future[bytes]] = deque()
+        self._max_pending = 2 * jobs
+        self._blocks = 0
+        self._pool = ThreadPoolExecutor(max_workers=jobs, thread_name_prefix="collector-compress")
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: bytes) -> int:  # type: ignore[override]
+        self._buf += data
+        while len(self._buf) >= self._block_size:
+            self._submit(bytes(self._buf[:self._block_size]))
+            del self._buf[:self._block_size]
+        return len(data)
+
+    def _submit(self, block: bytes) -> None:
+        self._pending.append(self._pool.submit(self._compress, block))
+        self._blocks += 1
+        while self._pending and (
+            len(self._pending) > self._max_pending or self._pending[0].done()
+        ):
+            self.raw.write(self._pending.popleft().result())
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        try:
+            if self._buf or not self._blocks:
+                self._submit(bytes(self._buf))  # an empty bundle still needs a valid header
+                self._buf.clear()
+            while self._pending:
+                self.raw.write(self._pending.popleft().result())
+        finally:
+            self._pool.shutdown(cancel_futures=True)
+            super().close()
+
+
+def compressed_writer(raw: BinaryIO, codec: str, jobs: int = 1) -> BinaryIO:
+    """
+    Wrap ``raw`` in a stream that compresses everything written to it with
+    ``codec``. Closing the wrapper finishes the compressed data but leaves
+    ``raw`` open. Raises CompressionError if the codec isn't available.
+    """
+    if codec not in CODECS:
+        raise ValueError(f"Unknown codec {codec!r}; expected one of {', '.join(CODECS)}")
+    if jobs > 1:
+        return _BlockWriter(raw, _block_compressor(codec), _BLOCK_SIZE[codec], jobs)
+    if codec == "gzip":
+        return gzip.GzipFile(
+            filename="", mode="wb", compresslevel=_GZIP_LEVEL, fileobj=raw, mtime=0
+        )
+    if codec == "xz":
+        return lzma.LZMAFile(raw, "wb", format=lzma.FORMAT_XZ)
+    return _zstandard().ZstdCompressor().stream_writer(raw, closefd=False)
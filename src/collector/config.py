@@ -84,8 +84,14 @@ class OutputFormat:
     TEXT = "txt"
     XML = "xml"
     JSON = "json"
+    JSONL = "jsonl"
 
-    ALL = ("md", "txt", "xml", "json")
+    ALL = ("md", "txt", "xml", "json", "jsonl")
+
+
+# Content transforms, in the order they run (see transforms.py). Listed here
+# so the CLI can offer and check them without loading that module.
+TRANSFORM_NAMES: tuple[str, ...] = ("license", "docstrings", "comments", "outline", "blank-lines")
 
 
 @dataclass
@@ -98,14 +104,36 @@ class CollectorConfig:
     include_globs: list[str] = field(default_factory=list)
     respect_gitignore: bool = True
     max_file_size: int = 1_000_000  # 1 MB
+    excerpt_head: int = 0  # files over max_file_size: emit their first N lines
+    excerpt_tail: int = 0  # ... and last N lines, instead of skipping them
+    excerpt_bytes: int = 0  # ... or their first N bytes
+    transforms: list[str] = field(default_factory=list)  # content rewrites, see transforms.py
+    outline_globs: list[str] = field(default_factory=list)  # files emitted as signatures only
     output_format: str = OutputFormat.MARKDOWN
     output_path: Path | None = None
+    compression: str | None = None  # gzip, zstd or xz, applied while rendering
     copy_to_clipboard: bool = False
     open_after: bool = False
     extract_all: bool = False
     show_tree: bool = True
     count_tokens: bool = False
+    token_encoding: str = "cl100k_base"  # tiktoken encoding; cl100k_base or o200k_base
+    max_tokens: int | None = None  # pack the highest-priority files into this many tokens
+    priority: str = "include"  # packing order: include, smallest or near
+    near: str | None = None  # root-relative path for the "near" priority
     follow_symlinks: bool = False
+    jobs: int = 1  # >1 lists and sniffs directories on a thread pool
+    handoff_budget: int = 64 * 1024 * 1024  # bytes of sniffed content kept for rendering
+    classify: bool = True  # settle text vs. binary by extension where the tables know it
+    text_extensions: set[str] = field(default_factory=set)  # added to the known-text table
+    binary_extensions: set[str] = field(default_factory=set)  # added to the known-binary table
+    git_index: bool = False  # enumerate with `git ls-files` inside a work tree
+    git_untracked: bool = True  # with git_index, also list untracked, non-ignored files
+    dedup: bool = False  # emit byte-identical files once, later copies as references
+    watch: bool = False  # keep the output file up to date as the tree changes
+    debounce_ms: int = 50  # --watch: quiet period before rewriting
+    use_cache: bool = True  # persistent scan cache under $XDG_CACHE_HOME/file-collector
+    rebuild_cache: bool = False
 
 
 def language_for(path: Path) -> str:
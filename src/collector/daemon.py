@@ -0,0 +1,354 @@
+"""
+``collect serve``: a long-running daemon that answers ``collect`` runs from
+warm, inotify-refreshed indexes of the trees it has seen.
+
+Each run the ``collect`` entry point hands over (see ``client``) goes through
+the same Typer command as a local run, with stdout and stderr relayed to the
+client, so options, output and exit codes are the same. Only discovery
+differs: ``cli.make_collector`` returns a Collector whose ``walk`` filters a
+``watch.LiveIndex`` instead of walking the disk. An index is kept per root
+and per set of walk filters, extensions aside: it holds every text file, and
+each run's extensions filter it. Past ``MAX_TREES`` the least recently used
+index is dropped.
+
+Runs are served one at a time, so process-wide state (``STATS``, the
+consoles, the working directory) belongs to one run while it lasts; against
+an unchanged tree a run takes milliseconds. Runs that prompt, that need the
+user's desktop (--copy, --open), that watch, or that bypass or rebuild the
+scan cache are left to the client to run locally.
+"""
+
+from __future__ import annotations
+
+import io
+import json
+import os
+import signal
+import socket
+import sys
+import traceback
+from collections import OrderedDict
+from collections.abc import Iterator
+from contextlib import contextmanager, suppress
+from dataclasses import replace
+from pathlib import Path
+from typing import Annotated, Any
+
+import typer
+from rich.console import Console
+
+from . import cli
+from .api import Collector
+from .cache import ScanCache
+from .client import EXIT, FORWARDED_ENV, FRAME, LOCAL, STDERR, STDOUT
+from .client import socket_path as client_socket_path
+from .config import CollectorConfig
+from .discovery import FileEntry
+from .ignore import has_extension
+from .watch import LiveIndex
+
+# Warm indexes kept at once; each holds one inotify watch per directory.
+MAX_TREES = 8
+
+# Options whose runs the daemon leaves to the client.
+_LOCAL_ONLY = (
+    "watch", "clipboard", "open_after", "version", "no_cache", "rebuild_cache", "tracked_only"
+)
+
+
+class DaemonError(RuntimeError):
+    """Raised when the daemon can't listen on its socket."""
+
+
+def _tree_key(config: CollectorConfig) -> tuple[Any, ...]:
+    """Everything that shapes a walk except the extensions."""
+    return (
+        config.root.resolve(), tuple(config.exclude_globs), tuple(config.include_globs),
+        config.respect_gitignore, config.max_file_size, config.follow_symlinks,
+        config.excerpt_head, config.excerpt_tail, config.excerpt_bytes,
+        config.git_index, config.git_untracked, config.classify,
+        frozenset(config.text_extensions), frozenset(config.binary_extensions),
+    )
+
+
+class WarmCollector(Collector):
+    """A Collector whose ``walk`` filters a warm index rather than walking the disk."""
+
+    def __init__(self, config: CollectorConfig, index: LiveIndex) -> None:
+        super().__init__(config, index.cache)
+        self.live = index
+
+    def walk(self) -> list[FileEntry]:
+        exts = {e.lstrip(".").lower() for e in self.config.extensions}
+        if not exts:
+            return list(self.live.entries)
+        return [e for e in self.live.entries if has_extension(e.path.name, exts)]
+
+
+class Trees:
+    """Warm indexes by root and walk filters, least recently used first."""
+
+    def __init__(self, limit: int = MAX_TREES, force_polling: bool = False) -> None:
+        self.limit = limit
+        self.force_polling = force_polling
+        self._indexes: OrderedDict[tuple[Any, ...], LiveIndex] = OrderedDict()
+        self._caches: dict[Path, ScanCache] = {}
+
+    def _cache(self, root: Path) -> ScanCache:
+        if root not in self._caches:
+            self._caches[root] = ScanCache.open(root)
+        return self._caches[root]
+
+    def index(self, config: CollectorConfig) -> LiveIndex:
+        """The index for ``config``, brought up to date; built on first use."""
+        key = _tree_key(config)
+        index = self._indexes.get(key)
+        if index is not None:
+            self._indexes.move_to_end(key)
+            index.refresh()
+            return index
+        root = key[0]
+        survey = replace(config, root=root, extensions=set())
+        index = LiveIndex(survey, self._cache(root), debounce=0, force_polling=self.force_polling)
+        self._indexes[key] = index
+        while len(self._indexes) > self.limit:
+            self._indexes.popitem(last=False)[1].close()
+        return index
+
+    def collector(self, config: CollectorConfig) -> Collector:
+        return WarmCollector(config, self.index(config))
+
+    def close(self) -> None:
+        for index in self._indexes.values():
+            index.close()
+        self._indexes.clear()
+        for cache in self._caches.values():
+            cache.flush()
+
+
+class _Channel(io.RawIOBase):
+    """One of the client's output streams, framed onto the connection."""
+
+    def __init__(self, conn: socket.socket, channel: bytes, tty: bool) -> None:
+        super().__init__()
+        self._conn = conn
+        self._channel = channel
+        self._tty = tty
+
+    def writable(self) -> bool:
+        return True
+
+    def isatty(self) -> bool:
+        return self._tty
+
+    def write(self, data: bytes) -> int:  # type: ignore[override]
+        self._conn.sendall(FRAME.pack(self._channel, len(data)))
+        self._conn.sendall(data)
+        return len(data)
+
+
+def _text_stream(conn: socket.socket, channel: bytes, tty: bool) -> io.TextIOWrapper:
+    return io.TextIOWrapper(
+        io.BufferedWriter(_Channel(conn, channel, tty)), encoding="utf-8", write_through=True
+    )
+
+
+@contextmanager
+def _client_context(request: dict[str, Any], conn: socket.socket) -> Iterator[None]:
+    """
+    Point stdout, stderr, the CLI's consoles, the working directory and the
+    terminal environment at the client's for the length of one run.
+    """
+    saved_streams = sys.stdout, sys.stderr
+    saved_consoles = cli.console, cli.err_console
+    saved_env = {name: os.environ.get(name) for name in FORWARDED_ENV}
+    saved_cwd = Path.cwd()
+    out_tty, err_tty = request.get("tty", (False, False))
+    sys.stdout = _text_stream(conn, STDOUT, out_tty)
+    sys.stderr = _text_stream(conn, STDERR, err_tty)
+    try:
+        os.chdir(request["cwd"])
+        for name in FORWARDED_ENV:
+            os.environ.pop(name, None)
+        os.environ.update(request.get("env", {}))
+        cli.console, cli.err_console = Console(), Console(stderr=True)
+        yield
+    finally:
+        for stream in (sys.stdout, sys.stderr):
+            with suppress(OSError, ValueError):  # the client went away
+                stream.flush()
+        sys.stdout, sys.stderr = saved_streams
+        cli.console, cli.err_console = saved_consoles
+        for name, value in saved_env.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+        os.chdir(saved_cwd)
+
+
+class Server:
+    """Serve ``collect`` runs on a Unix socket, one connection at a time."""
+
+    def __init__(self, path: str, trees: Trees) -> None:
+        self.path = path
+        self.trees = trees
+        self.command = typer.main.get_command(cli.app)
+        self._sock: socket.socket | None = None
+
+    def bind(self) -> None:
+        """Listen on ``path``, replacing a stale socket. Raises DaemonError."""
+        if not hasattr(socket, "AF_UNIX"):
+            raise DaemonError("collect serve needs Unix domain sockets")
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self.path)
+        except FileNotFoundError:
+            pass
+        except OSError:
+            Path(self.path).unlink(missing_ok=True)  # left behind by a daemon that died
+        else:
+            raise DaemonError(f"a daemon is already serving on {self.path}")
+        finally:
+            probe.close()
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        umask = os.umask(0o177)  # the socket is for this user only
+        try:
+            sock.bind(self.path)
+        except OSError as e:
+            sock.close()
+            raise DaemonError(f"can't listen on {self.path}: {e}") from e
+        finally:
+            os.umask(umask)
+        sock.listen(64)
+        self._sock = sock
+
+    def serve_forever(self) -> None:
+        assert self._sock is not None, "bind() first"
+        while True:
+            conn, _ = self._sock.accept()
+            with conn, suppress(OSError):  # the client went away mid-run
+                self.handle(conn)
+
+    def _servable(self, argv: list[str], cwd: str) -> bool:
+        if "--help" in argv:
+            return False
+        try:
+            ctx = self.command.make_context(
+                "collect", list(argv), resilient_parsing=True, default_map={"root": cwd}
+            )
+        except Exception:
+            return False  # let the local run report it
+        params = ctx.params
+        return bool(params.get("all_files")) and not any(params.get(p) for p in _LOCAL_ONLY)
+
+    def handle(self, conn: socket.socket) -> None:
+        with conn.makefile("rb") as reader:
+            line = reader.readline()
+        try:
+            request = json.loads(line)
+            argv, cwd = list(request["argv"]), str(request["cwd"])
+        except (ValueError, KeyError, TypeError):
+            return
+        if not self._servable(argv, cwd):
+            conn.sendall(FRAME.pack(LOCAL, 0))
+            return
+        code = self.run(request, conn)
+        status = str(code).encode()
+        conn.sendall(FRAME.pack(EXIT, len(status)) + status)
+
+    def run(self, request: dict[str, Any], conn: socket.socket) -> int:
+        """One ``collect`` run for the client on ``conn``; returns its exit status."""
+        make_collector = cli.make_collector
+        cli.make_collector = self.trees.collector
+        try:
+            with _client_context(request, conn):
+                try:
+                    self.command.main(
+                        args=request["argv"], prog_name="collect",
+                        default_map={"root": request["cwd"]},
+                    )
+                except SystemExit as e:
+                    if e.code is None or isinstance(e.code, int):
+                        return e.code or 0
+                    print(e.code, file=sys.stderr)
+                    return 1
+                except Exception:
+                    traceback.print_exc()
+                    return 1
+                return 0
+        finally:
+            cli.make_collector = make_collector
+
+    def close(self) -> None:
+        if self._sock is not None:
+            self._sock.close()
+            Path(self.path).unlink(missing_ok=True)
+            self._sock = None
+        self.trees.close()
+
+
+serve_app = typer.Typer(
+    name="collect serve",
+    help="Keep warm indexes of source trees and answer `collect` runs from them.",
+    rich_markup_mode="rich",
+    add_completion=False,
+)
+
+
+@serve_app.command()
+def serve(
+    roots: Annotated[
+        list[Path] | None,
+        typer.Argument(
+            help="Trees to index right away (with default filters); others are "
+            "indexed on their first run.",
+            file_okay=False, dir_okay=True, exists=True, resolve_path=True,
+            show_default=False,
+        ),
+    ] = None,
+    socket_path: Annotated[
+        str | None,
+        typer.Option(
+            "--socket",
+            help="Unix socket to listen on. Default: $COLLECTOR_SOCKET, else "
+            "file-collector.sock in $XDG_RUNTIME_DIR (or /tmp).",
+            show_default=False,
+        ),
+    ] = None,
+    max_trees: Annotated[
+        int,
+        typer.Option("--max-trees", min=1, help="Warm indexes to keep; least recently used go."),
+    ] = MAX_TREES,
+    poll: Annotated[
+        bool,
+        typer.Option("--poll", help="Poll for changes instead of using inotify."),
+    ] = False,
+) -> None:
+    """
+    [bold]collect serve[/bold] runs in the foreground; while it does, [cyan]collect ... -a[/cyan]
+    runs are answered from memory instead of walking the disk.
+    """
+    console = cli.console
+    trees = Trees(max_trees, force_polling=poll)
+    server = Server(socket_path or client_socket_path(), trees)
+    try:
+        server.bind()
+    except DaemonError as e:
+        cli.err_console.print(f"[red]{e}[/red]")
+        raise typer.Exit(code=2) from e
+    # SIGTERM stops the daemon as Ctrl-C does, removing the socket.
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    try:
+        for root in roots or []:
+            index = trees.index(CollectorConfig(root=root))
+            console.print(
+                f"Indexed [bold]{len(index.entries)}[/bold] file(s) under [cyan]{root}[/cyan] "
+                f"via {index.method}"
+            )
+        console.print(f"Serving on [cyan]{server.path}[/cyan], Ctrl-C to stop")
+        server.serve_forever()
+    except KeyboardInterrupt:
+        console.print("[dim]Stopped serving.[/dim]")
+    finally:
+        server.close()
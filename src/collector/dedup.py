@@ -0,0 +1,66 @@
+"""
+Content-hash deduplication: byte-identical files are emitted once.
+
+Vendored copies, generated stubs and repeated licence files would otherwise
+each be rendered in full. With ``--dedup`` the first copy (in walk order) keeps
+its body and every later copy becomes a short reference to it, e.g.
+``<file path="b/LICENSE" size="1069" same-as="a/LICENSE"/>`` in XML.
+
+Only files that share their exact size with another candidate can be copies,
+so only those are hashed. Each hash comes from the scan cache when current,
+else from the bytes the binary sniff already handed off, else from one read
+of the file, and is stored in the cache for the next run.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Mapping, Sequence
+
+from .cache import ScanCache
+from .discovery import FileEntry, content_digest
+from .stats import STATS
+
+# A reference section costs about this much itself; smaller files stay as they are.
+MIN_BYTES = 64
+
+
+def find_copies(entries: Sequence[FileEntry], cache: ScanCache | None = None) -> dict[str, str]:
+    """
+    Content digests of the files in ``entries`` that have at least one
+    byte-identical twin there, keyed by root-relative path.
+    """
+    by_size: dict[int, list[FileEntry]] = {}
+    for entry in entries:
+        if entry.size >= MIN_BYTES:
+            by_size.setdefault(entry.size, []).append(entry)
+    by_digest: dict[str, list[str]] = {}
+    hashed = 0
+    for group in by_size.values():
+        if len(group) < 2:
+            continue
+        for entry in group:
+            by_digest.setdefault(content_digest(entry, cache), []).append(
+                entry.rel_path.as_posix()
+            )
+            hashed += 1
+    STATS.add(dedup_hashed=hashed)
+    return {rel: sha for sha, rels in by_digest.items() if len(rels) > 1 for rel in rels}
+
+
+def same_as(entries: Sequence[FileEntry], copies: Mapping[str, str]) -> dict[str, str]:
+    """
+    For every file in ``entries`` whose content an earlier one already has:
+    its path mapped to that earlier file's path. ``copies`` comes from
+    ``find_copies`` on these entries or a superset of them.
+    """
+    first: dict[str, str] = {}
+    out: dict[str, str] = {}
+    for entry in entries:
+        rel = entry.rel_path.as_posix()
+        sha = copies.get(rel)
+        if sha is None:
+            continue
+        original = first.setdefault(sha, rel)
+        if original != rel:
+            out[rel] = original
+    return out
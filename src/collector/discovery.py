@@ -2,142 +2,452 @@
 
 from __future__ import annotations
 
-import fnmatch
-from dataclasses import dataclass
+import os
+import stat
+import threading
+import time
+from collections.abc import Callable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
 from pathlib import Path
-from typing import Iterator
 
-import pathspec
+from .cache import ScanCache, Stamp, content_hash, file_stamp, stamp_of
+from .classify import BINARY, HEAD_BYTES, TEXT, Classifier, has_magic
+from .config import CollectorConfig
+from .excerpt import Excerpt
+from .gitindex import git_candidates
+from .ignore import CompiledSpec, IgnoreMatcher, extension_of, has_extension
+from .stats import SKIP_BINARY, SKIP_SIZE, SKIP_SYMLINK, STATS, Stats
 
-from .config import DEFAULT_IGNORED_DIRS, DEFAULT_IGNORED_GLOBS, CollectorConfig
+# Candidate file: (abs path, rel path, size, stat stamp).
+_Candidate = tuple[str, str, int, Stamp]
+# Subdirectory to visit: (abs path, rel prefix, gitignore rules in force there).
+_Subdir = tuple[str, str, CompiledSpec | None]
+_Listing = tuple[list[_Subdir], list[_Candidate]]
+
+# Files per binary-sniff task in parallel mode: big enough to amortise the
+# future overhead, small enough to spread a flat directory across workers.
+_SNIFF_BATCH = 32
+# Bytes the full binary sniff reads from the start of a file.
+_SNIFF_BYTES = 8192
 
 
 @dataclass(frozen=True, slots=True)
 class FileEntry:
-    """A single discovered file with cached metadata."""
+    """
+    A single discovered file with cached metadata.
+
+    ``data`` holds the file's raw bytes when the binary sniff already read the
+    whole thing, so rendering can skip a second open (see ``read_entry``).
+    ``binary`` is only ever True for entries from ``walk(include_binary=True)``.
+    ``mtime_ns`` is the modification time seen by the walk (0 if unknown).
+    ``excerpt_of`` is set for a file over the size limit that is emitted as an
+    excerpt (see ``excerpt``): it holds the size on disk, while ``data`` holds
+    the excerpt and ``size`` its length.
+    """
     path: Path
     rel_path: Path
     size: int
+    data: bytes | None = field(default=None, compare=False, repr=False)
+    binary: bool = False
+    mtime_ns: int = field(default=0, compare=False)
+    excerpt_of: int | None = field(default=None, compare=False)
 
     @property
     def display(self) -> str:
         return str(self.rel_path)
 
 
-def _load_gitignore(root: Path) -> pathspec.PathSpec | None:
-    """Load .gitignore from root if present. Returns None if absent or unreadable."""
-    gitignore = root / ".gitignore"
-    if not gitignore.is_file():
-        return None
+def _sort_key(entry: os.DirEntry) -> tuple[bool, str, str]:
+    """Directories first, then files; case-insensitive, with the raw name as tiebreak."""
     try:
-        lines = gitignore.read_text(encoding="utf-8", errors="replace").splitlines()
+        is_file = entry.is_file()
     except OSError:
-        return None
-    return pathspec.PathSpec.from_lines("gitwildmatch", lines)
+        is_file = False
+    return (is_file, entry.name.lower(), entry.name)
 
 
-def _make_spec(patterns: list[str] | tuple[str, ...]) -> pathspec.PathSpec | None:
-    """Build a gitignore-style PathSpec from a list of patterns, or None if empty."""
-    if not patterns:
-        return None
-    return pathspec.PathSpec.from_lines("gitwildmatch", patterns)
+def _is_binary_chunk(chunk: bytes, final: bool = True) -> bool:
+    """NUL bytes or invalid UTF-8; unless ``final``, ``chunk`` may end mid-character."""
+    if b"\x00" in chunk:
+        return True
+    try:
+        chunk.decode("utf-8")
+    except UnicodeDecodeError as e:
+        return final or e.reason != "unexpected end of data"
+    return False
+
 
+def _sniff_file(
+    path: str | os.PathLike[str],
+    size: int,
+    sniff_bytes: int = _SNIFF_BYTES,
+    kind: str | None = None,
+    staged: bool = False,
+) -> tuple[bool, bytes | None]:
+    """
+    Return (is_binary, whole_file). ``whole_file`` is the file's bytes when
+    the sniff read all of it (``size <= sniff_bytes``), otherwise None.
 
-def _matches_name_glob(name: str, patterns: tuple[str, ...] | list[str]) -> bool:
-    """Simple filename-only matching for the built-in DEFAULT_IGNORED_GLOBS."""
-    return any(fnmatch.fnmatch(name, pat) for pat in patterns)
+    ``kind`` is the classifier's verdict on the name: a file known to be
+    text that is larger than ``sniff_bytes`` only has its head checked. With
+    ``staged``, an unclassified file's head is read first, and a NUL or a
+    binary magic number there ends the sniff early.
+    """
+    head_only = kind == TEXT and size > sniff_bytes
+    staged = staged and kind is None and size > HEAD_BYTES
+    try:
+        with open(path, "rb") as f:  # noqa: PTH123 - str paths, no Path allocation
+            chunk = f.read(HEAD_BYTES if head_only or staged else sniff_bytes)
+            if staged and b"\x00" not in chunk and not has_magic(chunk):
+                chunk += f.read(sniff_bytes - len(chunk))
+                staged = False
+    except OSError:
+        return True, None
+    if head_only or staged:
+        avoided = min(size, sniff_bytes) - len(chunk)
+        STATS.add(sniff_opens=1, sniff_bytes=len(chunk), classify_bytes_avoided=avoided)
+        return staged or _is_binary_chunk(chunk, final=False), None
+    STATS.add(sniff_opens=1, sniff_bytes=len(chunk))
+    if _is_binary_chunk(chunk, final=len(chunk) == size or len(chunk) < sniff_bytes):
+        return True, None
+    return False, (chunk if len(chunk) == size <= sniff_bytes else None)
 
 
-def _looks_binary(path: Path, sniff_bytes: int = 8192) -> bool:
+def _looks_binary(path: str | os.PathLike[str], sniff_bytes: int = _SNIFF_BYTES) -> bool:
     """
     Heuristic: a file is treated as binary if its first chunk contains a NUL byte
     or fails to decode as UTF-8. Fast and good enough for source-tree scanning.
     """
-    try:
-        with path.open("rb") as f:
-            chunk = f.read(sniff_bytes)
-    except OSError:
-        return True
-    if b"\x00" in chunk:
-        return True
-    try:
-        chunk.decode("utf-8")
-    except UnicodeDecodeError:
-        return True
-    return False
+    return _sniff_file(path, -1, sniff_bytes)[0]
 
 
-def walk(config: CollectorConfig) -> Iterator[FileEntry]:
+def walk(
+    config: CollectorConfig,
+    cache: ScanCache | None = None,
+    include_binary: bool = False,
+) -> Iterator[FileEntry]:
     """
     Yield FileEntry objects matching the config, in deterministic (sorted) order.
 
     Ordering: each directory's entries are sorted alphabetically, directories
-    first then files. Makes output reproducible across runs and filesystems.
+    first then files. Makes output reproducible across runs and filesystems,
+    and identical whatever ``config.jobs`` is.
+
+    With ``config.git_index``, inside a git work tree the candidates come
+    from ``git ls-files`` rather than a directory walk; the same filters and
+    ordering apply, but git's notion of membership wins, see ``gitindex``.
+
+    With a ``cache``, files whose stat stamp is unchanged reuse the stored
+    binary verdict instead of being opened and sniffed again. Binaries are
+    dropped unless ``include_binary`` is set, in which case they are yielded
+    with ``binary=True``.
+
+    Time, syscalls and skipped paths are recorded in ``stats.STATS``.
     """
-    root = config.root.resolve()
-    gitignore = _load_gitignore(root) if config.respect_gitignore else None
-    exclude_spec = _make_spec(config.exclude_globs)
-    include_spec = _make_spec(config.include_globs)
-    extensions = {e.lstrip(".").lower() for e in config.extensions}
-
-    def _should_visit_dir(d: Path, rel: Path) -> bool:
-        if d.name in DEFAULT_IGNORED_DIRS:
-            return False
-        if _matches_name_glob(d.name, DEFAULT_IGNORED_GLOBS):
-            return False
-        rel_posix = rel.as_posix()
-        if exclude_spec is not None and exclude_spec.match_file(f"{rel_posix}/"):
-            return False
-        if gitignore is not None and gitignore.match_file(f"{rel_posix}/"):
-            return False
-        return True
+    yield from STATS.timed("walk", _walk(config, cache, include_binary))
 
-    def _should_yield_file(f: Path, rel: Path) -> bool:
-        if _matches_name_glob(f.name, DEFAULT_IGNORED_GLOBS):
-            return False
-        rel_posix = rel.as_posix()
-        if exclude_spec is not None and exclude_spec.match_file(rel_posix):
-            return False
-        if gitignore is not None and gitignore.match_file(rel_posix):
-            return False
-        if extensions:
-            ext = f.suffix.lstrip(".").lower()
-            if ext not in extensions and f.name not in extensions:
-                return False
-        if include_spec is not None and not include_spec.match_file(rel_posix):
-            return False
-        return True
 
-    def _recurse(current: Path) -> Iterator[FileEntry]:
+def _walk(
+    config: CollectorConfig, cache: ScanCache | None, include_binary: bool
+) -> Iterator[FileEntry]:
+    root = config.root.resolve()
+    matcher = IgnoreMatcher(root, config)
+    excerpt = Excerpt.from_config(config)
+
+    # Built on os.scandir: DirEntry caches the d_type from readdir(), so the
+    # is_dir/is_file/is_symlink checks cost no syscalls on most filesystems.
+    # Paths stay plain strings until a file survives every filter.
+    def _scan(current: str, prefix: str, rules: CompiledSpec | None) -> _Listing:
+        """List one directory: subdirectories to visit and files passing the cheap filters."""
+        dirs: list[_Subdir] = []
+        files: list[_Candidate] = []
+        tally = Stats()
+        stat_calls = 0
+        start = time.perf_counter()
         try:
-            entries = sorted(
-                current.iterdir(),
-                key=lambda p: (p.is_file(), p.name.lower()),
-            )
-        except (PermissionError, OSError):
-            return
+            with os.scandir(current) as it:
+                entries = sorted(it, key=_sort_key)
+        except OSError:
+            return dirs, files
+        listed = time.perf_counter()
 
+        # A .gitignore here governs this directory's entries and everything below.
         for entry in entries:
-            rel = entry.relative_to(root)
-            if entry.is_symlink() and not config.follow_symlinks:
-                continue
-            if entry.is_dir():
-                if _should_visit_dir(entry, rel):
-                    yield from _recurse(entry)
-            elif entry.is_file():
-                if not _should_yield_file(entry, rel):
-                    continue
-                try:
-                    size = entry.stat().st_size
-                except OSError:
+            if entry.name == ".gitignore":
+                rules = matcher.enter(rules, entry.path, prefix)
+                break
+
+        for entry in entries:
+            name = entry.name
+            rel = prefix + name
+            try:
+                if entry.is_symlink() and not config.follow_symlinks:
+                    if entry.is_dir():
+                        tally.skip_dir(SKIP_SYMLINK)
+                    else:
+                        tally.skip_file(SKIP_SYMLINK)
                     continue
-                if size > config.max_file_size:
+                if entry.is_dir():
+                    reason = matcher.dir_skip(name, rel, rules)
+                    if reason is None:
+                        dirs.append((entry.path, rel + "/", rules))
+                    else:
+                        tally.skip_dir(reason)
                     continue
-                if _looks_binary(entry):
+                if not entry.is_file():
                     continue
-                yield FileEntry(path=entry, rel_path=rel, size=size)
+            except OSError:
+                continue
+            reason = matcher.file_skip(name, rel, rules)
+            if reason is not None:
+                tally.skip_file(reason)
+                continue
+            stat_calls += 1
+            try:
+                st = entry.stat()
+            except OSError:
+                continue
+            if excerpt is None and st.st_size > config.max_file_size:
+                tally.skip_file(SKIP_SIZE)
+                continue
+            files.append((entry.path, rel, st.st_size, stamp_of(st)))
+        tally.seconds.update(list=listed - start, filter=time.perf_counter() - listed)
+        # scandir: one opendir plus getdents; entry.stat() is one stat per candidate.
+        tally.counts.update(dirs_listed=1, stat_calls=stat_calls)
+        STATS.merge(tally)
+        return dirs, files
 
-    yield from _recurse(root)
+    # Small files are read whole by the sniff; keep their bytes for rendering
+    # while the shared budget lasts.
+    budget = [config.handoff_budget]
+    budget_lock = threading.Lock()
+
+    def _keep(data: bytes | None) -> bytes | None:
+        if data is None or config.handoff_budget <= 0:
+            return None
+        with budget_lock:
+            if budget[0] < len(data):
+                return None
+            budget[0] -= len(data)
+        return data
+
+    classifier = Classifier.from_config(config)
+
+    def _sniff(files: list[_Candidate]) -> list[FileEntry]:
+        """Classify binaries and materialise FileEntry objects for what we keep."""
+        out: list[FileEntry] = []
+        tally = Stats()
+        start = time.perf_counter()
+        hits = avoided = avoided_bytes = 0
+        for path, rel, size, stamp in files:
+            kind = classifier.kind(rel.rpartition("/")[2])
+            known = None
+            if cache is not None and kind != BINARY:
+                known = cache.lookup(rel, stamp, classifier.key)
+            if kind == BINARY:
+                is_binary, data = True, None
+                avoided += 1
+                avoided_bytes += min(size, _SNIFF_BYTES)
+            elif known is not None:
+                is_binary, data = known.binary, None
+                hits += 1
+            else:
+                is_binary, data = _sniff_file(path, size, kind=kind, staged=classifier.enabled)
+                if cache is not None:
+                    cache.remember(rel, stamp, is_binary, classifier.key)
+            if not is_binary and excerpt is not None and size > config.max_file_size:
+                out.append(_excerpt_entry(excerpt, path, rel, size, stamp))
+            elif not is_binary:
+                out.append(FileEntry(Path(path), Path(rel), size, _keep(data), mtime_ns=stamp[2]))
+            elif include_binary:
+                out.append(
+                    FileEntry(Path(path), Path(rel), size, binary=True, mtime_ns=stamp[2])
+                )
+            else:
+                tally.skip_file(SKIP_BINARY)
+        tally.seconds["sniff"] = time.perf_counter() - start
+        if hits:
+            tally.counts["sniff_cache_hits"] = hits
+        if avoided:
+            tally.counts.update(
+                classify_opens_avoided=avoided, classify_bytes_avoided=avoided_bytes
+            )
+        STATS.merge(tally)
+        return out
+
+    listed = git_candidates(root, config, matcher) if config.git_index else None
+    if listed is not None:
+        yield from _sniff_listed(_sniff, listed, config.jobs)
+        return
+
+    if config.jobs > 1:
+        yield from _walk_parallel(_scan, _sniff, str(root), matcher.root_rules, config.jobs)
+        return
+
+    def _recurse(current: str, prefix: str, rules: CompiledSpec | None) -> Iterator[FileEntry]:
+        dirs, files = _scan(current, prefix, rules)
+        for path, rel, sub_rules in dirs:
+            yield from _recurse(path, rel, sub_rules)
+        yield from _sniff(files)
+
+    yield from _recurse(str(root), "", matcher.root_rules)
+
+
+def _walk_parallel(
+    scan: Callable[[str, str, CompiledSpec | None], _Listing],
+    sniff: Callable[[list[_Candidate]], list[FileEntry]],
+    root: str,
+    root_rules: CompiledSpec | None,
+    jobs: int,
+) -> Iterator[FileEntry]:
+    """
+    Run ``scan`` and ``sniff`` on a thread pool while yielding in serial order.
+
+    Each listing task fans out its subdirectories and file batches as futures
+    and returns them in sorted order; the consumer drains them depth-first,
+    dirs before files, exactly like the serial walker. Workers never wait on
+    other futures, so the pool cannot deadlock whatever its size.
+    """
+    pool = ThreadPoolExecutor(max_workers=jobs, thread_name_prefix="collector-walk")
+
+    def _list(
+        current: str, prefix: str, rules: CompiledSpec | None
+    ) -> tuple[list[Future], list[Future]]:
+        dirs, files = scan(current, prefix, rules)
+        children = [pool.submit(_list, *subdir) for subdir in dirs]
+        batches = [
+            pool.submit(sniff, files[i:i + _SNIFF_BATCH])
+            for i in range(0, len(files), _SNIFF_BATCH)
+        ]
+        return children, batches
+
+    def _drain(listing: Future) -> Iterator[FileEntry]:
+        children, batches = listing.result()
+        for child in children:
+            yield from _drain(child)
+        for batch in batches:
+            yield from batch.result()
+
+    try:
+        yield from _drain(pool.submit(_list, root, "", root_rules))
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def _sniff_listed(
+    sniff: Callable[[list[_Candidate]], list[FileEntry]],
+    files: list[_Candidate],
+    jobs: int,
+) -> Iterator[FileEntry]:
+    """Sniff an already-enumerated candidate list, in batches on ``jobs`` threads."""
+    batches = [files[i:i + _SNIFF_BATCH] for i in range(0, len(files), _SNIFF_BATCH)]
+    if jobs <= 1:
+        for batch in batches:
+            yield from sniff(batch)
+        return
+    with ThreadPoolExecutor(max_workers=jobs, thread_name_prefix="collector-sniff") as pool:
+        for out in pool.map(sniff, batches):
+            yield from out
+
+
+def probe(
+    root: Path,
+    rel: str,
+    config: CollectorConfig,
+    matcher: IgnoreMatcher,
+    rules: CompiledSpec | None = None,
+    cache: ScanCache | None = None,
+) -> FileEntry | None:
+    """
+    The walk's decision for one root-relative file path, without walking:
+    name filters, symlink policy, size limit and binary sniff. Returns the
+    entry ``walk`` would yield (without handoff data), or None if it would
+    skip the path or the path is gone. ``rules`` are the gitignore rules in
+    force in the file's directory; the caller vouches the directory itself is
+    visible to the walk.
+    """
+    name = rel.rpartition("/")[2]
+    if not matcher.keep_file(name, rel, rules):
+        return None
+    path = os.path.join(root, rel)  # noqa: PTH118 - str paths, as in the walker
+    try:
+        st = os.stat(path) if config.follow_symlinks else os.lstat(path)  # noqa: PTH116
+    except OSError:
+        return None
+    excerpt = Excerpt.from_config(config)
+    oversized = st.st_size > config.max_file_size
+    if not stat.S_ISREG(st.st_mode) or (oversized and excerpt is None):
+        return None
+    classifier = Classifier.from_config(config)
+    kind = classifier.kind(name)
+    if kind == BINARY:
+        STATS.add(classify_opens_avoided=1, classify_bytes_avoided=min(st.st_size, _SNIFF_BYTES))
+        return None
+    stamp = stamp_of(st)
+    known = cache.lookup(rel, stamp, classifier.key) if cache is not None else None
+    if known is not None:
+        is_binary = known.binary
+    else:
+        is_binary = _sniff_file(path, st.st_size, kind=kind, staged=classifier.enabled)[0]
+        if cache is not None:
+            cache.remember(rel, stamp, is_binary, classifier.key)
+    if is_binary:
+        return None
+    if excerpt is not None and oversized:
+        return _excerpt_entry(excerpt, path, rel, st.st_size, stamp)
+    return FileEntry(Path(path), Path(rel), st.st_size, mtime_ns=st.st_mtime_ns)
+
+
+def _excerpt_entry(excerpt: Excerpt, path: str, rel: str, size: int, stamp: Stamp) -> FileEntry:
+    """The entry for an oversized file: its excerpt as ``data``, outside the handoff budget."""
+    try:
+        data = excerpt.read(path, size)
+    except (OSError, ValueError):
+        data = b""  # vanished or shrank to nothing since the stat
+    return FileEntry(Path(path), Path(rel), len(data), data, mtime_ns=stamp[2], excerpt_of=size)
+
+
+NO_EXTENSION = "(no ext)"
+
+
+@dataclass
+class TreeIndex:
+    """
+    One survey of a tree, kept in memory: every file that passes the config's
+    filters (extensions aside), in walk order, grouped by extension, with its
+    size and binary verdict. Selecting extensions afterwards is a filter over
+    this index rather than a second walk of the disk.
+    """
+    entries: list[FileEntry]
+    by_extension: dict[str, list[FileEntry]]
+
+    @classmethod
+    def build(cls, config: CollectorConfig, cache: ScanCache | None = None) -> TreeIndex:
+        survey = replace(config, extensions=set())
+        entries = list(walk(survey, cache, include_binary=True))
+        by_extension: dict[str, list[FileEntry]] = {}
+        for entry in entries:
+            ext = extension_of(entry.path.name) or NO_EXTENSION
+            by_extension.setdefault(ext, []).append(entry)
+        return cls(entries, by_extension)
+
+    def extension_counts(self) -> dict[str, int]:
+        """Text files per extension, most common first."""
+        counts = {
+            ext: n
+            for ext, group in self.by_extension.items()
+            if (n := sum(not e.binary for e in group))
+        }
+        return dict(sorted(counts.items(), key=lambda kv: (-kv[1], kv[0])))
+
+    def select(self, extensions: set[str]) -> list[FileEntry]:
+        """Text files matching ``extensions`` (all of them if empty), in walk order."""
+        exts = {e.lstrip(".").lower() for e in extensions}
+        return [
+            e for e in self.entries
+            if not e.binary and (not exts or has_extension(e.path.name, exts))
+        ]
 
 
 def discover_extensions(config: CollectorConfig) -> dict[str, int]:
@@ -145,15 +455,67 @@ def discover_extensions(config: CollectorConfig) -> dict[str, int]:
     Survey the tree to report which extensions are present and how many files
     each has. Useful for the interactive prompt when no extensions are given.
     """
-    counts: dict[str, int] = {}
-    # Temporarily clear extension filter to see everything.
-    survey = CollectorConfig(**{**config.__dict__, "extensions": set()})
-    for entry in walk(survey):
-        ext = entry.path.suffix.lstrip(".").lower() or "(no ext)"
-        counts[ext] = counts.get(ext, 0) + 1
-    return dict(sorted(counts.items(), key=lambda kv: (-kv[1], kv[0])))
+    return TreeIndex.build(replace(config, handoff_budget=0)).extension_counts()
 
 
 def read_text(path: Path) -> str:
     """Read a file as UTF-8, replacing invalid bytes. Never raises on decode errors."""
-    return path.read_text(encoding="utf-8", errors="replace")
+    return decode_text(_read_bytes(path))
+
+
+def _read_bytes(path: Path) -> bytes:
+    start = time.perf_counter()
+    data = path.read_bytes()
+    STATS.add_time("read", time.perf_counter() - start)
+    STATS.add(read_opens=1, read_bytes=len(data))
+    return data
+
+
+def decode_text(data: bytes) -> str:
+    """Decode bytes exactly as ``read_text`` would: UTF-8 with replacement, universal newlines."""
+    text = data.decode("utf-8", errors="replace")
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
+
+def read_entry_bytes(entry: FileEntry) -> bytes:
+    """Raw bytes of a discovered file, reusing bytes handed off by the sniff when present."""
+    if entry.data is not None:
+        STATS.add(opens_saved=1, bytes_saved=len(entry.data))
+        return entry.data
+    return _read_bytes(entry.path)
+
+
+def entry_stamp(entry: FileEntry) -> Stamp | None:
+    """
+    The stamp to check cached facts about ``entry``'s content against: the
+    file's current one, or None if that may not describe the bytes the walk
+    handed off (the file changed since).
+    """
+    stamp = file_stamp(entry.path)
+    if stamp is not None and entry.data is not None and stamp[2:] != (entry.mtime_ns, entry.size):
+        return None
+    return stamp
+
+
+def content_digest(entry: FileEntry, cache: ScanCache | None = None) -> str:
+    """
+    SHA-256 of a file's content (an excerpt's, for an excerpted file): from
+    the scan cache when current, else by reading it.
+    """
+    rel = entry.rel_path.as_posix()
+    rec = None
+    if cache is not None and entry.excerpt_of is None:
+        rec = cache.get(rel, entry_stamp(entry))
+    if rec is not None and rec.sha256 is not None:
+        return rec.sha256
+    sha = content_hash(read_entry_bytes(entry))
+    if rec is not None:
+        cache.update_content(rel, rec.stamp, sha256=sha)
+    return sha
+
+
+def read_entry(entry: FileEntry) -> str:
+    """Text of a discovered file, as ``read_text`` would return it."""
+    return decode_text(read_entry_bytes(entry))
@@ -0,0 +1,109 @@
+"""
+Bounded excerpts of files over the size limit.
+
+Without excerpts, a file larger than ``max_file_size`` is skipped. With
+them, it is emitted as its first N and last M lines (or its first K bytes),
+with a marker line where the rest was left out:
+
+    [... 5,368,612,114 of 5,368,709,120 bytes omitted ...]
+
+The file is memory-mapped and only the pages holding the excerpt are
+touched, so a 5 GB log costs a few kilobytes of I/O, and each side of an
+excerpt is capped at ``MAX_SIDE_BYTES`` however long its lines are. The walk
+hands the excerpt on as the entry's ``data`` with ``size`` set to its
+length, so every renderer, the token counts and --dedup see exactly what is
+emitted; ``excerpt_of`` keeps the size on disk.
+"""
+
+from __future__ import annotations
+
+import mmap
+import os
+from dataclasses import dataclass
+
+from .config import CollectorConfig
+from .stats import STATS
+
+# Most bytes taken from either end, even if the requested lines are longer.
+MAX_SIDE_BYTES = 256 * 1024
+
+
+def _char_boundary(data: bytes) -> bytes:
+    """``data`` without a UTF-8 character cut off at its end."""
+    for back in range(1, min(4, len(data)) + 1):
+        byte = data[-back]
+        if byte < 0x80:
+            return data
+        if byte >= 0xC0:  # lead byte: keep it only if its sequence is complete
+            need = 2 if byte < 0xE0 else 3 if byte < 0xF0 else 4
+            return data if back >= need else data[:-back]
+    return data
+
+
+def _leading_char_boundary(data: bytes) -> bytes:
+    """``data`` without UTF-8 continuation bytes at its start."""
+    start = 0
+    while start < min(3, len(data)) and 0x80 <= data[start] < 0xC0:
+        start += 1
+    return data[start:]
+
+
+@dataclass(frozen=True)
+class Excerpt:
+    """
+    How much of an oversized file to keep: ``head_lines`` and ``tail_lines``
+    from either end, or, if set, the first ``head_bytes`` instead.
+    """
+
+    head_lines: int = 0
+    tail_lines: int = 0
+    head_bytes: int = 0
+
+    @classmethod
+    def from_config(cls, config: CollectorConfig) -> Excerpt | None:
+        """The config's excerpt settings, or None if oversized files are skipped."""
+        spec = cls(config.excerpt_head, config.excerpt_tail, config.excerpt_bytes)
+        return spec if spec.head_lines or spec.tail_lines or spec.head_bytes else None
+
+    def _bounds(self, data: mmap.mmap, size: int) -> tuple[int, int]:
+        """(end of the head, start of the tail) as offsets into ``data``."""
+        if self.head_bytes:
+            return min(self.head_bytes, size), size
+        head, limit = 0, min(size, MAX_SIDE_BYTES)
+        for _ in range(self.head_lines):
+            newline = data.find(b"\n", head, limit)
+            if newline < 0:
+                head = head or limit  # a first line longer than the cap is cut
+                break
+            head = newline + 1
+        tail, floor = size, max(head, size - MAX_SIDE_BYTES)
+        # A final newline ends the last line rather than starting an empty one.
+        end = size - 1 if data[size - 1:size] == b"\n" else size
+        for _ in range(self.tail_lines):
+            newline = data.rfind(b"\n", floor, end)
+            if newline < 0:
+                if floor == head or tail == size:
+                    tail = floor  # the rest of the file, or a last line cut at the cap
+                break
+            tail, end = newline + 1, newline
+        return head, tail
+
+    def read(self, path: str | os.PathLike[str], size: int) -> bytes:
+        """The excerpt of the file at ``path`` (``size`` bytes on disk), marker included."""
+        with (
+            open(path, "rb") as f,  # noqa: PTH123 - str paths, as in the walker
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data,
+        ):
+            size = min(size, len(data))
+            head, tail = self._bounds(data, size)
+            first = _char_boundary(data[:head])
+            last = _leading_char_boundary(data[tail:size])
+        omitted = size - len(first) - len(last)
+        STATS.add(
+            excerpt_files=1, excerpt_bytes=len(first) + len(last), excerpt_bytes_omitted=omitted
+        )
+        if not omitted:
+            return first + last
+        marker = f"[... {omitted:,} of {size:,} bytes omitted ...]\n".encode()
+        lead = b"" if not first or first.endswith(b"\n") else b"\n"
+        return first + lead + marker + last
@@ -1,13 +1,40 @@
-"""Output formatters: Markdown, plain text, XML, JSON."""
+"""
+Output formatters: Markdown, plain text, XML, JSON, JSON Lines.
+
+Markdown and text sections embed a file's bytes unchanged whenever those
+bytes are valid UTF-8 without carriage returns and no content transform
+applies (see ``transforms``). For large files going to a real file or pipe,
+such bodies are copied in-kernel (``copy_file_range`` or ``sendfile``)
+between the Python-written headers instead of being decoded and re-encoded.
+The scan cache remembers which files qualify.
+"""
 
 from __future__ import annotations
 
+import codecs
+import io
 import json
-from collections.abc import Iterable
-from io import StringIO
+import mmap
+import os
+from abc import ABC, abstractmethod
+from collections.abc import Iterable, Iterator, Mapping
+from io import BytesIO, StringIO
+from typing import TYPE_CHECKING, BinaryIO
 
+from .cache import CacheRecord, ScanCache, content_hash, stamp_of
 from .config import OutputFormat, language_for
-from .discovery import FileEntry, read_text
+from .discovery import FileEntry, decode_text, entry_stamp, read_entry_bytes
+from .platform_utils import copy_range
+from .stats import STATS
+from .tokens import TokenCounter
+
+if TYPE_CHECKING:
+    from .transforms import Pipeline, Transformed
+
+# Below this, reading and decoding a file costs less than the syscalls (and
+# the output buffer flush) of an in-kernel copy.
+_COPY_MIN_BYTES = 64 * 1024
+_CHECK_CHUNK = 1 << 20
 
 
 def _tree(entries: Iterable[FileEntry]) -> str:
@@ -19,40 +46,140 @@ def _tree(entries: Iterable[FileEntry]) -> str:
     return out.getvalue()
 
 
-def _render_markdown(entries: list[FileEntry], include_tree: bool) -> str:
-    """Render entries as a Markdown document with fenced code blocks."""
-    out = StringIO()
-    if include_tree:
-        out.write(_tree(entries))
-        out.write("\n---\n\n")
-    for entry in entries:
+class BundleWriter:
+    """
+    Binary sink that encodes text as UTF-8 on the way out and keeps running
+    totals, so nobody has to hold (or re-encode) the finished bundle to size it.
+    """
+
+    def __init__(self, stream: BinaryIO, tokens: TokenCounter | None = None) -> None:
+        self.stream = stream
+        self.tokens = tokens
+        self.bytes_written = 0
+        self.fd = _copy_target(stream)
+
+    def write(self, text: str, counted: bool = True) -> None:
+        """Write ``text``; ``counted=False`` leaves token accounting to the caller."""
+        if not text:
+            return
+        data = text.encode("utf-8")
+        self.stream.write(data)
+        self.bytes_written += len(data)
+        if counted and self.tokens is not None:
+            self.tokens.feed(text)
+
+    def copy_from(self, fd: int, length: int) -> int:
+        """Append ``length`` bytes of file ``fd`` in-kernel; needs ``self.fd``."""
+        self.stream.flush()
+        n = copy_range(fd, self.fd, 0, length)
+        if self.stream.seekable():
+            # The copy moved the descriptor's offset behind the buffered writer's back.
+            self.stream.seek(os.lseek(self.fd, 0, os.SEEK_CUR))
+        self.bytes_written += n
+        return n
+
+
+def _copy_target(stream: BinaryIO) -> int | None:
+    """
+    The descriptor under a plain file or stdout stream, else None. Wrappers
+    that transform bytes (compression) also expose ``fileno()``, so only the
+    io classes that write bytes through unchanged qualify.
+    """
+    if not isinstance(stream, io.FileIO | io.BufferedWriter | io.BufferedRandom):
+        return None
+    try:
+        return stream.fileno()
+    except (OSError, ValueError):
+        return None
+
+
+class Renderer(ABC):
+    """
+    A bundle is a header, one section per file joined by ``separator``, and a
+    footer. Each section is ``open_section`` + ``body`` + ``close_section``, so
+    only one file's content is ever in memory while streaming. A ``--dedup``
+    copy of an earlier file gets a ``reference`` section instead.
+
+    ``deleted`` lists paths removed since a ``--since`` baseline; each format
+    records them in its header or footer. ``verbatim`` renderers emit the
+    body unchanged, which lets ``render_to`` copy it without decoding.
+    """
+
+    separator = ""
+    verbatim = False
+
+    def __init__(self, include_tree: bool = True, deleted: Iterable[str] = ()) -> None:
+        self.include_tree = include_tree
+        self.deleted = list(deleted)
+
+    def header(self, entries: list[FileEntry]) -> str:
+        return ""
+
+    @abstractmethod
+    def open_section(self, entry: FileEntry) -> str: ...
+
+    def body(self, content: str) -> str:
+        return content
+
+    def close_section(self, entry: FileEntry, ends_with_newline: bool) -> str:
+        return ""
+
+    @abstractmethod
+    def reference(self, entry: FileEntry, original: str) -> str:
+        """The whole section for a file whose content ``original`` already carries."""
+
+    def footer(self, entries: list[FileEntry]) -> str:
+        return ""
+
+
+class MarkdownRenderer(Renderer):
+    """Markdown document with fenced code blocks."""
+
+    verbatim = True
+
+    def header(self, entries: list[FileEntry]) -> str:
+        parts = []
+        if self.include_tree:
+            parts.append(_tree(entries) + "\n")
+        if self.deleted:
+            listing = "".join(f"- `{path}`\n" for path in self.deleted)
+            parts.append(f"# Deleted\n\n{listing}\n")
+        return "".join(parts) + "---\n\n" if parts else ""
+
+    def open_section(self, entry: FileEntry) -> str:
         lang = language_for(entry.path)
-        out.write(f"## `{entry.rel_path.as_posix()}`\n\n")
-        out.write(f"```{lang}\n")
-        content = read_text(entry.path)
-        out.write(content)
-        if not content.endswith("\n"):
-            out.write("\n")
-        out.write("```\n\n")
-    return out.getvalue()
+        return f"## `{entry.rel_path.as_posix()}`\n\n```{lang}\n"
 
+    def close_section(self, entry: FileEntry, ends_with_newline: bool) -> str:
+        return ("" if ends_with_newline else "\n") + "```\n\n"
 
-def _render_text(entries: list[FileEntry], include_tree: bool) -> str:
-    """Render entries as plain text with simple separators."""
-    out = StringIO()
-    if include_tree:
-        for e in entries:
-            out.write(f"// {e.rel_path.as_posix()}\n")
-        out.write("\n" + ("=" * 72) + "\n\n")
-    for entry in entries:
+    def reference(self, entry: FileEntry, original: str) -> str:
+        return f"## `{entry.rel_path.as_posix()}`\n\nSame content as `{original}`.\n\n"
+
+
+class TextRenderer(Renderer):
+    """Plain text with simple separators."""
+
+    verbatim = True
+
+    def header(self, entries: list[FileEntry]) -> str:
+        paths = ""
+        if self.include_tree:
+            paths = "".join(f"// {e.rel_path.as_posix()}\n" for e in entries)
+        paths += "".join(f"// deleted: {path}\n" for path in self.deleted)
+        if not (self.include_tree or self.deleted):
+            return ""
+        return paths + "\n" + ("=" * 72) + "\n\n"
+
+    def open_section(self, entry: FileEntry) -> str:
         sep = "=" * 72
-        out.write(f"{sep}\n// {entry.rel_path.as_posix()}\n{sep}\n\n")
-        content = read_text(entry.path)
-        out.write(content)
-        if not content.endswith("\n"):
-            out.write("\n")
-        out.write("\n")
-    return out.getvalue()
+        return f"{sep}\n// {entry.rel_path.as_posix()}\n{sep}\n\n"
+
+    def close_section(self, entry: FileEntry, ends_with_newline: bool) -> str:
+        return ("" if ends_with_newline else "\n") + "\n"
+
+    def reference(self, entry: FileEntry, original: str) -> str:
+        return self.open_section(entry) + f"(same content as {original})\n\n"
 
 
 def _xml_escape(s: str) -> str:
@@ -63,51 +190,364 @@ def _xml_escape(s: str) -> str:
     )
 
 
-def _render_xml(entries: list[FileEntry]) -> str:
+class XmlRenderer(Renderer):
     """
-    Render entries as XML — the format LLMs like Claude tend to parse most
-    cleanly when the prompt mixes multiple files.
+    XML — the format LLMs like Claude tend to parse most cleanly when the
+    prompt mixes multiple files.
     """
-    out = StringIO()
-    out.write('<?xml version="1.0" encoding="UTF-8"?>\n')
-    out.write("<files>\n")
-    for entry in entries:
+
+    def header(self, entries: list[FileEntry]) -> str:
+        return '<?xml version="1.0" encoding="UTF-8"?>\n<files>\n'
+
+    def open_section(self, entry: FileEntry) -> str:
         path = _xml_escape(entry.rel_path.as_posix())
-        content = read_text(entry.path)
+        return f'  <file path="{path}" size="{entry.size}">\n'
+
+    def body(self, content: str) -> str:
         # CDATA-style is fragile if content contains "]]>"; escape instead.
-        out.write(f'  <file path="{path}" size="{entry.size}">\n')
-        out.write(_xml_escape(content))
-        if not content.endswith("\n"):
-            out.write("\n")
-        out.write("  </file>\n")
-    out.write("</files>\n")
-    return out.getvalue()
+        return _xml_escape(content)
 
+    def close_section(self, entry: FileEntry, ends_with_newline: bool) -> str:
+        return ("" if ends_with_newline else "\n") + "  </file>\n"
 
-def _render_json(entries: list[FileEntry]) -> str:
-    """Render entries as a JSON array of {path, size, content} objects."""
-    payload = [
-        {
-            "path": entry.rel_path.as_posix(),
-            "size": entry.size,
-            "content": read_text(entry.path),
-        }
-        for entry in entries
-    ]
-    return json.dumps(payload, ensure_ascii=False, indent=2) + "\n"
+    def reference(self, entry: FileEntry, original: str) -> str:
+        path = _xml_escape(entry.rel_path.as_posix())
+        same = _xml_escape(original)
+        return f'  <file path="{path}" size="{entry.size}" same-as="{same}"/>\n'
+
+    def footer(self, entries: list[FileEntry]) -> str:
+        deleted = "".join(f'  <deleted path="{_xml_escape(path)}"/>\n' for path in self.deleted)
+        return deleted + "</files>\n"
+
+
+class JsonRenderer(Renderer):
+    """
+    JSON array of {path, size, content} objects, written one object at a
+    time. Byte-identical to ``json.dumps(payload, ensure_ascii=False, indent=2)``.
+    Deleted paths follow the files as {path, deleted: true} objects, and
+    ``--dedup`` copies are {path, size, same_as} objects.
+    """
+
+    separator = ",\n"
+
+    def header(self, entries: list[FileEntry]) -> str:
+        return "[\n" if entries or self.deleted else "["
+
+    def open_section(self, entry: FileEntry) -> str:
+        path = json.dumps(entry.rel_path.as_posix(), ensure_ascii=False)
+        return f'  {{\n    "path": {path},\n    "size": {entry.size},\n    "content": '
+
+    def body(self, content: str) -> str:
+        return json.dumps(content, ensure_ascii=False)
+
+    def close_section(self, entry: FileEntry, ends_with_newline: bool) -> str:
+        return "\n  }"
+
+    def reference(self, entry: FileEntry, original: str) -> str:
+        path = json.dumps(entry.rel_path.as_posix(), ensure_ascii=False)
+        same = json.dumps(original, ensure_ascii=False)
+        return f'  {{\n    "path": {path},\n    "size": {entry.size},\n    "same_as": {same}\n  }}'
+
+    def footer(self, entries: list[FileEntry]) -> str:
+        if not self.deleted:
+            return "\n]\n" if entries else "]\n"
+        deleted = self.separator.join(
+            f'  {{\n    "path": {json.dumps(path, ensure_ascii=False)},\n    "deleted": true\n  }}'
+            for path in self.deleted
+        )
+        return (self.separator if entries else "") + deleted + "\n]\n"
+
+
+class JsonlRenderer(Renderer):
+    """
+    JSON Lines: one {path, size, language, content} object per line, each
+    byte-identical to ``json.dumps(record, ensure_ascii=False)``, so the
+    output can be split on newlines and ingested in parallel. There is no
+    header; deleted paths follow as {path, deleted: true} lines. ``--dedup``
+    copies carry ``same_as`` (the path holding the content) instead of content.
+    """
+
+    def open_section(self, entry: FileEntry) -> str:
+        path = json.dumps(entry.rel_path.as_posix(), ensure_ascii=False)
+        language = json.dumps(language_for(entry.path) or None)
+        return f'{{"path": {path}, "size": {entry.size}, "language": {language}, "content": '
+
+    def body(self, content: str) -> str:
+        return json.dumps(content, ensure_ascii=False)
+
+    def close_section(self, entry: FileEntry, ends_with_newline: bool) -> str:
+        return "}\n"
+
+    def reference(self, entry: FileEntry, original: str) -> str:
+        head = self.open_section(entry).removesuffix('"content": ')
+        return f"{head}\"same_as\": {json.dumps(original, ensure_ascii=False)}}}\n"
+
+    def footer(self, entries: list[FileEntry]) -> str:
+        return "".join(
+            f'{{"path": {json.dumps(path, ensure_ascii=False)}, "deleted": true}}\n'
+            for path in self.deleted
+        )
+
+
+_RENDERERS: dict[str, type[Renderer]] = {
+    OutputFormat.MARKDOWN: MarkdownRenderer,
+    OutputFormat.TEXT: TextRenderer,
+    OutputFormat.XML: XmlRenderer,
+    OutputFormat.JSON: JsonRenderer,
+    OutputFormat.JSONL: JsonlRenderer,
+}
+
+
+def get_renderer(fmt: str, include_tree: bool = True, deleted: Iterable[str] = ()) -> Renderer:
+    """Instantiate the renderer for a format name."""
+    try:
+        return _RENDERERS[fmt](include_tree, deleted)
+    except KeyError:
+        raise ValueError(f"Unknown output format: {fmt!r}") from None
+
+
+def _content_tokens(
+    rel: str,
+    content: str,
+    tokens: TokenCounter,
+    rec: CacheRecord | None,
+    cache: ScanCache | None,
+    method: str | None = None,
+) -> int:
+    """
+    Token count of one file's content, served from its current cache record
+    ``rec`` when it has one. ``method`` keys the cached count if not
+    ``tokens.method``.
+    """
+    method = method or tokens.method
+    if rec is not None and rec.tokens is not None and rec.token_method == method:
+        return rec.tokens
+    n = tokens.count(content)
+    if rec is not None:
+        cache.update_content(rel, rec.stamp, tokens=n, token_method=method)
+    return n
+
+
+def _note_hash(
+    rel: str,
+    data: bytes | mmap.mmap,
+    rec: CacheRecord | None,
+    cache: ScanCache | None,
+    hashes: dict[str, str] | None,
+) -> None:
+    """Record the content hash in ``hashes`` and on the cache record, hashing only if needed."""
+    sha = rec.sha256 if rec is not None else None
+    if sha is None and (rec is not None or hashes is not None):
+        sha = content_hash(data)
+        if rec is not None:
+            cache.update_content(rel, rec.stamp, sha256=sha)
+    if hashes is not None:
+        hashes[rel] = sha
+
+
+def _is_verbatim(data: mmap.mmap) -> bool:
+    """Whether ``decode_text`` would return these exact bytes: valid UTF-8, no CR."""
+    if data.find(b"\r") != -1:
+        return False
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    with memoryview(data) as view:
+        try:
+            for start in range(0, len(view), _CHECK_CHUNK):
+                decoder.decode(view[start:start + _CHECK_CHUNK])
+            decoder.decode(b"", final=True)
+        except UnicodeDecodeError:
+            return False
+    return True
+
+
+def _copy_section(
+    out: BundleWriter,
+    renderer: Renderer,
+    entry: FileEntry,
+    rel: str,
+    rec: CacheRecord | None,
+    tokens: TokenCounter | None,
+    cache: ScanCache | None,
+    hashes: dict[str, str] | None,
+) -> bool:
+    """
+    Write a large verbatim file's section with its body copied in-kernel.
+    Returns False, having written nothing, if the file doesn't qualify.
+    The file is only mapped when its verdict or hash isn't cached.
+    """
+    if rec is not None and rec.verbatim is False:
+        return False
+    n_tokens = None
+    if tokens is not None:
+        if rec is None or rec.tokens is None or rec.token_method != tokens.method:
+            return False  # counting needs the text anyway
+        n_tokens = rec.tokens
+    try:
+        fd = os.open(entry.path, os.O_RDONLY)
+    except OSError:
+        return False
+    try:
+        st = os.fstat(fd)
+        size = st.st_size
+        if size < _COPY_MIN_BYTES:
+            return False
+        if rec is not None and stamp_of(st) != rec.stamp:
+            if tokens is not None:
+                return False  # changed since the cached count was checked
+            rec = None
+        verbatim = rec.verbatim if rec is not None else None
+        sha = rec.sha256 if rec is not None else None
+        if verbatim is None or (sha is None and (rec is not None or hashes is not None)):
+            with mmap.mmap(fd, 0, access=mmap.ACCESS_READ) as data:
+                if verbatim is None:
+                    verbatim = _is_verbatim(data)
+                    if rec is not None:
+                        cache.update_content(rel, rec.stamp, verbatim=verbatim)
+                if verbatim:
+                    _note_hash(rel, data, rec, cache, hashes)
+            if not verbatim:
+                return False
+        elif hashes is not None:
+            hashes[rel] = sha
+        ends_with_newline = os.pread(fd, 1, size - 1) == b"\n"
+        out.write(renderer.open_section(entry))
+        if n_tokens is not None:
+            tokens.add(n_tokens)
+        copied = out.copy_from(fd, size)
+        if copied != size:
+            raise OSError(f"{rel}: short copy ({copied:,} of {size:,} bytes)")
+        STATS.add(copied_files=1, copied_bytes=copied)
+        out.write(renderer.close_section(entry, ends_with_newline))
+        return True
+    finally:
+        os.close(fd)
+
+
+def _write_section(
+    out: BundleWriter,
+    renderer: Renderer,
+    entry: FileEntry,
+    first: bool,
+    tokens: TokenCounter | None = None,
+    cache: ScanCache | None = None,
+    hashes: dict[str, str] | None = None,
+    transformed: Transformed | None = None,
+) -> None:
+    """
+    One file's section, preceded by the separator unless it's the ``first``.
+    ``transformed`` is the file's content after the transforms, if any apply.
+    """
+    if not first:
+        out.write(renderer.separator)
+    rel = entry.rel_path.as_posix()
+    if entry.excerpt_of is not None:
+        cache = None  # the cached tokens and hash describe the whole file
+    rec = cache.get(rel, entry_stamp(entry)) if cache is not None else None
+    if transformed is not None:
+        content = transformed.text
+        if hashes is not None:
+            hashes[rel] = transformed.digest
+        if rec is not None and rec.sha256 is None and transformed.digest is not None:
+            cache.update_content(rel, rec.stamp, sha256=transformed.digest)
+        out.write(renderer.open_section(entry))
+        if tokens is not None:
+            method = transformed.token_method(tokens.method)
+            tokens.add(_content_tokens(rel, content, tokens, rec, cache, method))
+        out.write(renderer.body(content), counted=False)
+        out.write(renderer.close_section(entry, content.endswith("\n")))
+        return
+    if (
+        renderer.verbatim
+        and out.fd is not None
+        and entry.data is None
+        and entry.size >= _COPY_MIN_BYTES
+        and _copy_section(out, renderer, entry, rel, rec, tokens, cache, hashes)
+    ):
+        return
+    data = read_entry_bytes(entry)
+    content = decode_text(data)
+    _note_hash(rel, data, rec, cache, hashes)
+    out.write(renderer.open_section(entry))
+    if tokens is not None:
+        tokens.add(_content_tokens(rel, content, tokens, rec, cache))
+    out.write(renderer.body(content), counted=False)
+    out.write(renderer.close_section(entry, content.endswith("\n")))
+
+
+def render_section(
+    entry: FileEntry,
+    renderer: Renderer,
+    first: bool,
+    cache: ScanCache | None = None,
+    pipeline: Pipeline | None = None,
+) -> bytes:
+    """A single file's section as ``render_to`` would write it, for patching a bundle."""
+    buf = BytesIO()
+    transformed = next(pipeline.stream([entry])) if pipeline is not None else None
+    _write_section(BundleWriter(buf), renderer, entry, first, cache=cache, transformed=transformed)
+    return buf.getvalue()
+
+
+def render_to(
+    entries: list[FileEntry],
+    fmt: str,
+    stream: BinaryIO,
+    include_tree: bool = True,
+    tokens: TokenCounter | None = None,
+    cache: ScanCache | None = None,
+    deleted: Iterable[str] = (),
+    hashes: dict[str, str] | None = None,
+    sections: list[tuple[int, int]] | None = None,
+    same_as: Mapping[str, str] | None = None,
+    pipeline: Pipeline | None = None,
+) -> int:
+    """
+    Stream the bundle into a binary ``stream`` one file at a time and return
+    the number of bytes written. Peak memory is bounded by the largest file,
+    not the bundle.
+
+    If ``tokens`` is given, wrapper text is counted as it is written and each
+    file's content is counted once on its own (the count for the raw text is
+    used for escaped XML/JSON bodies too). With a ``cache``, per-file token
+    counts and content hashes are reused for unchanged files and stored for
+    new ones. ``deleted`` paths are listed as removed (see ``--since``), and a
+    ``hashes`` dict is filled with each rendered file's SHA-256 as it streams.
+    A ``sections`` list receives each file's (start, end) byte offsets,
+    separator included. Files in ``same_as`` (path -> an earlier path with
+    the same content, see ``dedup``) are written as references to it. A
+    ``pipeline`` rewrites file content on its way in (see ``transforms``).
+    """
+    renderer = get_renderer(fmt, include_tree, deleted)
+    out = BundleWriter(stream, tokens)
+    prepared: Iterator[Transformed | None] = iter(()) if pipeline is None else pipeline.stream(
+        entries, digests=hashes is not None, skip=same_as or ()
+    )
+    with STATS.timer("render"):
+        out.write(renderer.header(entries))
+        for i, entry in enumerate(entries):
+            start = out.bytes_written
+            transformed = next(prepared, None)
+            original = same_as.get(entry.rel_path.as_posix()) if same_as else None
+            if original is None:
+                _write_section(out, renderer, entry, i == 0, tokens, cache, hashes, transformed)
+            else:
+                if i:
+                    out.write(renderer.separator)
+                out.write(renderer.reference(entry, original))
+                if hashes is not None and original in hashes:
+                    hashes[entry.rel_path.as_posix()] = hashes[original]
+            if sections is not None:
+                sections.append((start, out.bytes_written))
+        out.write(renderer.footer(entries))
+    STATS.add(rendered_files=len(entries), rendered_bytes=out.bytes_written)
+    return out.bytes_written
 
 
 def render(entries: list[FileEntry], fmt: str, include_tree: bool = True) -> str:
-    """Dispatch to the right renderer."""
-    if fmt == OutputFormat.MARKDOWN:
-        return _render_markdown(entries, include_tree)
-    if fmt == OutputFormat.TEXT:
-        return _render_text(entries, include_tree)
-    if fmt == OutputFormat.XML:
-        return _render_xml(entries)
-    if fmt == OutputFormat.JSON:
-        return _render_json(entries)
-    raise ValueError(f"Unknown output format: {fmt!r}")
+    """Render the whole bundle to a string. Prefer ``render_to`` for big trees."""
+    buf = BytesIO()
+    render_to(entries, fmt, buf, include_tree)
+    return buf.getvalue().decode("utf-8")
 
 
 def default_extension(fmt: str) -> str:
@@ -117,4 +557,5 @@ def default_extension(fmt: str) -> str:
         OutputFormat.TEXT: ".txt",
         OutputFormat.XML: ".xml",
         OutputFormat.JSON: ".json",
+        OutputFormat.JSONL: ".jsonl",
     }[fmt]
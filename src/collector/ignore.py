@@ -0,0 +1,301 @@
+"""
+Compiled ignore rules: built-in ignores, nested .gitignore files,
+.git/info/exclude, and the CLI include/exclude globs.
+
+Everything gitignore-shaped is compiled into a ``CompiledSpec``: literal
+names and ``*.ext`` globs become dict lookups, and the remaining patterns
+of a rule set are merged into a single alternation regex, so a path that
+matches nothing (the overwhelmingly common case) costs at most one regex
+evaluation instead of one per pattern.
+
+Nested .gitignore files are rewritten into repository-relative patterns and
+appended to their parent's rules, giving each directory one combined rule
+set. Directories without their own .gitignore share their parent's compiled
+object, so compiling happens once per .gitignore, not once per directory.
+"""
+
+from __future__ import annotations
+
+import fnmatch
+import re
+from collections.abc import Iterable
+from pathlib import Path
+
+from .config import DEFAULT_IGNORED_DIRS, DEFAULT_IGNORED_GLOBS, CollectorConfig
+from .stats import (
+    SKIP_BUILTIN,
+    SKIP_EXCLUDE,
+    SKIP_EXTENSION,
+    SKIP_GITIGNORE,
+    SKIP_IGNORED_DIR,
+    SKIP_INCLUDE,
+)
+
+# pathspec tags the trailing-slash group by name; names must be unique in a union.
+_NAMED_GROUP = re.compile(r"\(\?P<\w+>")
+# Pattern bodies (negation and trailing slash removed) served without regexes:
+# a bare component name like `node_modules`, or an extension glob like `*.log`
+# or `*.min.js`.
+_LITERAL_NAME = re.compile(r"[^*?\[\]\\/\s]+")
+_EXTENSION_GLOB = re.compile(r"\*\.([^*?\[\]\\/.\s]+(?:\.[^*?\[\]\\/.\s]+)*)")
+
+# (pattern index, include, directory-only)
+_Rule = tuple[int, bool, bool]
+
+
+class CompiledSpec:
+    """
+    Gitignore-style patterns compiled for the common shapes.
+
+    Unanchored literal names and ``*.ext`` globs match a single path component,
+    so they are indexed in dicts and checked per component with no regex at
+    all. Everything else is merged into one alternation regex that rejects
+    non-matching paths in a single evaluation; only a hit falls back to the
+    per-pattern scan. Precedence is git's: the highest-numbered matching
+    pattern decides, so negations work across both paths.
+    """
+
+    __slots__ = (
+        "lines", "_names", "_exts", "_dotted", "_regexes", "_any", "_count", "evaluations"
+    )
+
+    def __init__(self, lines: list[str]) -> None:
+        self.lines = lines
+        self.evaluations = 0
+        self._names: dict[str, list[_Rule]] = {}
+        self._exts: dict[str, list[_Rule]] = {}
+        self._regexes: list[tuple[int, bool, re.Pattern[str]]] = []
+        complex_lines: list[tuple[int, str]] = []
+        for index, line in enumerate(line for line in lines if line):
+            if line.startswith("#"):
+                continue
+            include = not line.startswith("!")
+            body = line if include else line[1:]
+            dir_only = body.endswith("/")
+            body = body[:-1] if dir_only else body
+            rule = (index, include, dir_only)
+            if _LITERAL_NAME.fullmatch(body):
+                self._names.setdefault(body, []).append(rule)
+            elif m := _EXTENSION_GLOB.fullmatch(body):
+                self._exts.setdefault(m[1], []).append(rule)
+            else:
+                complex_lines.append((index, line))
+        if complex_lines:
+            # Only these need pathspec's translation, so rule sets of plain names
+            # and extension globs (the built-in ones, most excludes) never import it.
+            import pathspec
+
+            spec = pathspec.PathSpec.from_lines("gitwildmatch", [line for _, line in complex_lines])
+            for (index, _), pattern in zip(complex_lines, spec.patterns, strict=True):
+                if pattern.include is not None and pattern.regex is not None:
+                    self._regexes.append((index, pattern.include, pattern.regex))
+        self._dotted = any("." in ext for ext in self._exts)
+        self._count = sum(map(len, self._names.values())) + sum(map(len, self._exts.values()))
+        self._count += len(self._regexes)
+        union = "|".join(
+            f"(?:{_NAMED_GROUP.sub('(?:', regex.pattern)})" for _, _, regex in self._regexes
+        )
+        self._any = re.compile(union) if union else None
+
+    def __bool__(self) -> bool:
+        return self._count > 0
+
+    def match(self, path: str) -> bool:
+        """True if ``path`` is matched (i.e. ignored / selected); last matching pattern wins."""
+        best, result = -1, False
+        if self._names or self._exts:
+            parts = path.split("/")
+            trailing_slash = parts[-1] == ""
+            if trailing_slash:
+                parts.pop()
+            last = len(parts) - 1
+            for i, comp in enumerate(parts):
+                is_dir = i < last or trailing_slash
+                rules = self._names.get(comp, ())
+                dot = comp.rfind(".")
+                if dot >= 0 and self._exts:
+                    rules = (*rules, *self._exts.get(comp[dot + 1:], ()))
+                    # `*.min.js`: also try every longer suffix.
+                    while self._dotted and (dot := comp.rfind(".", 0, dot)) >= 0:
+                        rules = (*rules, *self._exts.get(comp[dot + 1:], ()))
+                for index, include, dir_only in rules:
+                    if index > best and (is_dir or not dir_only):
+                        best, result = index, include
+        if self._any is not None:
+            self.evaluations += 1
+            if self._any.match(path):
+                for index, include, regex in reversed(self._regexes):
+                    if index <= best:
+                        break
+                    self.evaluations += 1
+                    if regex.match(path):
+                        return include
+        return result
+
+
+def extension_of(name: str) -> str:
+    """Lower-cased extension of a bare filename, without the dot (``Path.suffix`` rules)."""
+    i = name.rfind(".")
+    return name[i + 1:].lower() if 0 < i < len(name) - 1 else ""
+
+
+def has_extension(name: str, extensions: set[str]) -> bool:
+    """Extension filter: ``extensions`` may also list whole names such as ``Makefile``."""
+    return extension_of(name) in extensions or name in extensions
+
+
+def _make_spec(patterns: Iterable[str]) -> CompiledSpec | None:
+    """Compile a list of patterns, or None if it has no effective pattern."""
+    spec = CompiledSpec(list(patterns))
+    return spec if spec else None
+
+
+def rebase_gitignore(lines: Iterable[str], prefix: str) -> list[str]:
+    """
+    Rewrite the lines of ``<prefix>.gitignore`` so they match repository-relative
+    paths. Patterns containing a non-trailing slash are anchored to the file's
+    directory; bare names match at any depth below it.
+    """
+    out: list[str] = []
+    for raw in lines:
+        line = raw.rstrip("\r\n")
+        if not line.strip() or line.startswith("#"):
+            continue
+        if not prefix:
+            out.append(line)
+            continue
+        neg = "!" if line.startswith("!") else ""
+        pat = line[1:] if neg else line
+        body = pat[:-1] if pat.endswith("/") else pat
+        if "/" in body:
+            out.append(neg + prefix + pat[1:] if pat.startswith("/") else neg + prefix + pat)
+        else:
+            out.append(neg + prefix + "**/" + pat)
+    return out
+
+
+def _read_lines(path: Path) -> list[str]:
+    try:
+        return path.read_text(encoding="utf-8", errors="replace").splitlines()
+    except OSError:
+        return []
+
+
+def _git_dir(top: Path) -> Path | None:
+    """Resolve ``top/.git`` to the directory holding ``info/exclude`` (worktrees included)."""
+    dotgit = top / ".git"
+    if dotgit.is_dir():
+        return dotgit
+    for line in _read_lines(dotgit):
+        if line.startswith("gitdir:"):
+            gitdir = (top / line.split(":", 1)[1].strip()).resolve()
+            common = _read_lines(gitdir / "commondir")
+            return (gitdir / common[0].strip()).resolve() if common else gitdir
+    return None
+
+
+def _find_repo_top(root: Path) -> Path | None:
+    for candidate in (root, *root.parents):
+        if (candidate / ".git").exists():
+            return candidate
+    return None
+
+
+class IgnoreMatcher:
+    """
+    All filtering decisions for one walk, ordered cheapest-first.
+
+    Paths passed in are relative to the walk root (POSIX, no leading slash);
+    gitignore rules are evaluated against repository-relative paths so
+    .gitignore files above ``--root`` apply as they would for git.
+    """
+
+    def __init__(self, root: Path, config: CollectorConfig) -> None:
+        self.extensions = {e.lstrip(".").lower() for e in config.extensions}
+        self.respect_gitignore = config.respect_gitignore
+        self.exclude = _make_spec(config.exclude_globs)
+        self.include = _make_spec(config.include_globs)
+        self._builtin = re.compile("|".join(map(fnmatch.translate, DEFAULT_IGNORED_GLOBS)))
+        self._specs = [s for s in (self.exclude, self.include) if s is not None]
+
+        # Walk-root-relative paths become repository-relative by prepending this.
+        self.base = ""
+        self.root_rules: CompiledSpec | None = None
+        self.root_ignored = False
+        if not self.respect_gitignore:
+            return
+        lines: list[str] = []
+        top = _find_repo_top(root)
+        if top is not None:
+            git_dir = _git_dir(top)
+            if git_dir is not None:
+                lines += rebase_gitignore(_read_lines(git_dir / "info" / "exclude"), "")
+            # .gitignore files between the repository top and the walk root.
+            parts = root.relative_to(top).parts
+            for depth in range(len(parts)):
+                prefix = "".join(f"{p}/" for p in parts[:depth])
+                gitignore = top.joinpath(*parts[:depth], ".gitignore")
+                lines += rebase_gitignore(_read_lines(gitignore), prefix)
+            self.base = "".join(f"{p}/" for p in parts)
+        rules = _make_spec(lines)
+        # An explicitly requested root that the enclosing repository ignores
+        # (a checkout inside ~/.pyenv, say) is treated as a tree of its own.
+        if self.base and rules is not None and rules.match(self.base):
+            rules, self.base, self.root_ignored = None, "", True
+        if rules is not None:
+            self._specs.append(rules)
+        self.root_rules = rules
+
+    def _compile(self, lines: list[str]) -> CompiledSpec | None:
+        spec = _make_spec(lines)
+        if spec is not None:
+            self._specs.append(spec)
+        return spec
+
+    @property
+    def evaluations(self) -> int:
+        """Pattern regex evaluations made so far across every rule set of this walk."""
+        return sum(s.evaluations for s in self._specs)
+
+    def enter(
+        self, rules: CompiledSpec | None, gitignore: str, prefix: str
+    ) -> CompiledSpec | None:
+        """Rules for a directory containing the .gitignore at ``gitignore``."""
+        if not self.respect_gitignore:
+            return rules
+        lines = rebase_gitignore(_read_lines(Path(gitignore)), self.base + prefix)
+        if not lines:
+            return rules
+        return self._compile(rules.lines + lines if rules is not None else lines)
+
+    def dir_skip(self, name: str, rel: str, rules: CompiledSpec | None) -> str | None:
+        """Why the walk wouldn't descend into directory ``rel`` (a ``stats`` reason), or None."""
+        if name in DEFAULT_IGNORED_DIRS:
+            return SKIP_IGNORED_DIR
+        if self._builtin.match(name):
+            return SKIP_BUILTIN
+        if self.exclude is not None and self.exclude.match(f"{rel}/"):
+            return SKIP_EXCLUDE
+        if rules is not None and rules.match(f"{self.base}{rel}/"):
+            return SKIP_GITIGNORE
+        return None
+
+    def file_skip(self, name: str, rel: str, rules: CompiledSpec | None) -> str | None:
+        """Why the walk would drop file ``rel`` by name (a ``stats`` reason), or None."""
+        if self.extensions and not has_extension(name, self.extensions):
+            return SKIP_EXTENSION
+        if self._builtin.match(name):
+            return SKIP_BUILTIN
+        if self.exclude is not None and self.exclude.match(rel):
+            return SKIP_EXCLUDE
+        if rules is not None and rules.match(self.base + rel):
+            return SKIP_GITIGNORE
+        if self.include is not None and not self.include.match(rel):
+            return SKIP_INCLUDE
+        return None
+
+    def visit_dir(self, name: str, rel: str, rules: CompiledSpec | None) -> bool:
+        return self.dir_skip(name, rel, rules) is None
+
+    def keep_file(self, name: str, rel: str, rules: CompiledSpec | None) -> bool:
+        return self.file_skip(name, rel, rules) is None
@@ -0,0 +1,86 @@
+"""
+Listings of large file sets: per-directory totals and path-level selections.
+
+A table with a row per file stops being useful (and gets slow to build) long
+before a tree has 100k files. ``summarize`` folds the files into their
+directories down to a given depth, with file counts, bytes and tokens for
+each subtree, and ``select_paths`` lets the picker take a directory or a glob
+where it would otherwise need a run of row numbers.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+from dataclasses import dataclass
+
+from .discovery import FileEntry
+from .ignore import CompiledSpec
+
+_GLOB_CHARS = frozenset("*?[")
+
+
+@dataclass
+class DirTotals:
+    """Files, bytes and (when counted) tokens under one directory, recursively."""
+
+    parts: tuple[str, ...]  # () is the root
+    files: int = 0
+    size: int = 0
+    tokens: int | None = None
+
+    @property
+    def path(self) -> str:
+        return "/".join(self.parts) + "/" if self.parts else "./"
+
+    @property
+    def depth(self) -> int:
+        return len(self.parts)
+
+
+def summarize(
+    entries: Sequence[FileEntry], depth: int, per_file: Sequence[int] | None = None
+) -> list[DirTotals]:
+    """
+    Totals for the root and every directory at most ``depth`` levels below
+    it, in tree order (a directory right before its subdirectories). Deeper
+    directories are folded into their ancestor at ``depth``. ``per_file``
+    holds each entry's tokens, as in ``TokenReport.per_file``.
+    """
+    totals: dict[tuple[str, ...], DirTotals] = {}
+    for i, entry in enumerate(entries):
+        parts = entry.rel_path.parent.parts
+        tokens = per_file[i] if per_file is not None else None
+        for k in range(min(depth, len(parts)) + 1):
+            key = parts[:k]
+            row = totals.get(key)
+            if row is None:
+                row = totals[key] = DirTotals(key, tokens=0 if per_file is not None else None)
+            row.files += 1
+            row.size += entry.size
+            if tokens is not None:
+                row.tokens += tokens  # type: ignore[operator]
+    return [totals[key] for key in sorted(totals)]
+
+
+def is_pattern(token: str) -> bool:
+    """True if a selection token is a glob rather than a path."""
+    return not _GLOB_CHARS.isdisjoint(token)
+
+
+def select_paths(entries: Sequence[FileEntry], token: str) -> list[int]:
+    """
+    Indices of the entries a picker token names: a root-relative file or
+    directory (``src/app``, ``src/app/``, ``README.md``), or a gitignore-style
+    glob as --include takes (``*.md``, ``src/**/test_*.py``).
+    """
+    if is_pattern(token):
+        spec = CompiledSpec([token])
+        return [i for i, entry in enumerate(entries) if spec.match(entry.rel_path.as_posix())]
+    path = token.removeprefix("./").strip("/")
+    if path in ("", "."):
+        return list(range(len(entries)))
+    prefix = path + "/"
+    return [
+        i for i, entry in enumerate(entries)
+        if (rel := entry.rel_path.as_posix()) == path or rel.startswith(prefix)
+    ]
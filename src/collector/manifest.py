@@ -0,0 +1,181 @@
+"""
+Bundle manifests and ``--since`` change detection.
+
+A manifest is a small JSON file recording every file a run walked: path,
+size, mtime and SHA-256, in walk order. A later run given ``--since`` with
+that manifest (or with a git ref) emits only the files that were added or
+modified, and lists the ones that were deleted.
+
+Against a manifest, change detection runs on what the walk already has: a
+file whose size and mtime match its manifest row is unchanged without being
+opened. Only files whose mtime moved but size didn't need a content check,
+and those use the scan cache's hash when it is current.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+from collections.abc import Callable, Sequence
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+from .cache import ScanCache
+from .discovery import FileEntry, content_digest
+
+MANIFEST_VERSION = 1
+_GIT_TIMEOUT = 60
+
+
+@dataclass(slots=True)
+class ManifestEntry:
+    path: str
+    size: int
+    mtime_ns: int
+    sha256: str
+
+
+@dataclass
+class Manifest:
+    """Files of one run keyed by root-relative POSIX path, in walk order."""
+    files: dict[str, ManifestEntry] = field(default_factory=dict)
+
+    @classmethod
+    def load(cls, path: Path) -> Manifest:
+        """Read a manifest written by ``write``. Raises ValueError if it isn't one."""
+        try:
+            payload = json.loads(path.read_text(encoding="utf-8"))
+            if payload.get("version") != MANIFEST_VERSION:
+                raise ValueError(f"unsupported manifest version {payload.get('version')!r}")
+            rows = [ManifestEntry(**row) for row in payload["files"]]
+        except (OSError, KeyError, TypeError, AttributeError, json.JSONDecodeError) as e:
+            raise ValueError(f"{path} is not a readable manifest: {e}") from e
+        return cls({row.path: row for row in rows})
+
+    def write(self, path: Path) -> None:
+        """Write atomically, so a concurrent reader never sees half a manifest."""
+        payload = {
+            "version": MANIFEST_VERSION,
+            "files": [asdict(row) for row in self.files.values()],
+        }
+        tmp = path.with_name(f".{path.name}.tmp")
+        tmp.write_text(json.dumps(payload, indent=1) + "\n", encoding="utf-8")
+        tmp.replace(path)
+
+
+def build_manifest(
+    entries: Sequence[FileEntry],
+    hashes: dict[str, str],
+    previous: Manifest | None = None,
+    cache: ScanCache | None = None,
+) -> Manifest:
+    """
+    Manifest for ``entries``. Hashes come from ``hashes`` (filled by
+    ``render_to``), then from ``previous`` for files whose size and mtime are
+    unchanged, then from the cache; only files none of those cover are read.
+    """
+    files: dict[str, ManifestEntry] = {}
+    for entry in entries:
+        rel = entry.rel_path.as_posix()
+        sha = hashes.get(rel)
+        if sha is None and previous is not None:
+            old = previous.files.get(rel)
+            if old is not None and (old.size, old.mtime_ns) == (entry.size, entry.mtime_ns):
+                sha = old.sha256
+        if sha is None:
+            sha = content_digest(entry, cache)
+        files[rel] = ManifestEntry(rel, entry.size, entry.mtime_ns, sha)
+    return Manifest(files)
+
+
+@dataclass
+class ChangeSet:
+    """Files to emit (added or modified, in walk order) and paths deleted since the baseline."""
+    changed: list[FileEntry]
+    deleted: list[str]
+    added: int = 0
+
+
+def changes_since_manifest(
+    root: Path,
+    entries: Sequence[FileEntry],
+    manifest: Manifest,
+    cache: ScanCache | None = None,
+    keep: Callable[[str], bool] = lambda rel: True,
+) -> ChangeSet:
+    """Compare a walk with a manifest; only touched-but-same-size files are hashed."""
+    changed: list[FileEntry] = []
+    added = 0
+    for entry in entries:
+        old = manifest.files.get(entry.rel_path.as_posix())
+        if old is None:
+            changed.append(entry)
+            added += 1
+        elif old.size != entry.size or (
+            old.mtime_ns != entry.mtime_ns and old.sha256 != content_digest(entry, cache)
+        ):
+            changed.append(entry)
+    seen = {entry.rel_path.as_posix() for entry in entries}
+    # A row the walk didn't produce may just be filtered out this time; only
+    # paths that are really gone count as deleted.
+    deleted = [
+        rel for rel in manifest.files
+        if rel not in seen and keep(rel) and not os.path.lexists(root / rel)
+    ]
+    return ChangeSet(changed, deleted, added)
+
+
+def _git(root: Path, *args: str) -> bytes:
+    proc = subprocess.run(  # noqa: S603 - fixed argv, no shell
+        ["git", *args], cwd=root, capture_output=True, check=False, timeout=_GIT_TIMEOUT
+    )
+    if proc.returncode != 0:
+        message = proc.stderr.decode(errors="replace").strip() or "git failed"
+        raise ValueError(message)
+    return proc.stdout
+
+
+def changes_since_ref(
+    root: Path,
+    entries: Sequence[FileEntry],
+    ref: str,
+    keep: Callable[[str], bool] = lambda rel: True,
+) -> ChangeSet:
+    """
+    Changes between git ``ref`` and the work tree under ``root``, including
+    untracked files that aren't ignored. Raises ValueError if git can't tell.
+    """
+    try:
+        diff = _git(root, "diff", "--name-status", "-z", "--no-renames", "--relative", ref, "--")
+        untracked = _git(root, "ls-files", "-z", "--others", "--exclude-standard")
+    except (OSError, subprocess.SubprocessError) as e:
+        raise ValueError(f"can't run git: {e}") from e
+    fields = os.fsdecode(diff).split("\0")
+    status = dict(zip(fields[1::2], fields[0::2], strict=False))
+    touched = {path for path, code in status.items() if code != "D"}
+    new = {path for path in os.fsdecode(untracked).split("\0") if path}
+    new |= {path for path, code in status.items() if code == "A"}
+    touched |= new
+    changed = [e for e in entries if e.rel_path.as_posix() in touched]
+    added = sum(e.rel_path.as_posix() in new for e in changed)
+    deleted = sorted(path for path, code in status.items() if code == "D" and keep(path))
+    return ChangeSet(changed, deleted, added)
+
+
+def changes_since(
+    root: Path,
+    entries: Sequence[FileEntry],
+    since: str,
+    cache: ScanCache | None = None,
+    keep: Callable[[str], bool] = lambda rel: True,
+) -> tuple[ChangeSet, Manifest | None]:
+    """
+    Resolve ``--since``: an existing file is read as a manifest, anything else
+    is taken as a git ref. Returns the changes and the manifest, if one was used.
+    ``keep`` filters deleted paths (e.g. to the extensions being collected).
+    """
+    if Path(since).is_file():
+        manifest = Manifest.load(Path(since))
+        return changes_since_manifest(root, entries, manifest, cache, keep), manifest
+    return changes_since_ref(root, entries, since, keep), None
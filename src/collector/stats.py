@@ -0,0 +1,185 @@
+"""
+Run instrumentation: time per phase, syscall and byte counters, and what was
+skipped, by reason.
+
+Discovery, rendering, token counting and the platform helpers report into one
+process-wide ``Stats`` object, ``STATS``. Hot loops keep a local ``Stats`` and
+``merge`` it once per directory or batch, so the bookkeeping costs one lock
+per directory rather than per file. Phase times measured on worker threads
+(``--jobs``) are summed across threads and can exceed wall time.
+
+A host process collects the metrics of a stretch of work with ``recording``:
+
+    with recording() as stats:
+        entries = list(walk(config))
+    stats.snapshot()  # {"seconds": {...}, "counts": {...}, "skipped": {...}}
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import TypeVar
+
+T = TypeVar("T")
+
+# Skip reasons, in display order. Files and directories are tallied apart:
+# a pruned directory's contents are never listed, so they aren't counted.
+SKIP_IGNORED_DIR = "ignored dir"  # DEFAULT_IGNORED_DIRS
+SKIP_BUILTIN = "built-in glob"  # DEFAULT_IGNORED_GLOBS
+SKIP_EXTENSION = "extension"
+SKIP_EXCLUDE = "exclude glob"
+SKIP_GITIGNORE = "gitignore"
+SKIP_INCLUDE = "include glob"  # matched none of the --include globs
+SKIP_SYMLINK = "symlink"
+SKIP_SIZE = "size limit"
+SKIP_BINARY = "binary"
+SKIP_REASONS = (
+    SKIP_IGNORED_DIR, SKIP_BUILTIN, SKIP_EXTENSION, SKIP_EXCLUDE, SKIP_GITIGNORE,
+    SKIP_INCLUDE, SKIP_SYMLINK, SKIP_SIZE, SKIP_BINARY,
+)
+
+# Phases, in pipeline order. "render" includes the "read" and "copy" time
+# spent inside it; "walk" includes "git", "list", "filter" and "sniff".
+# "total" is the whole run's wall time, which only the CLI records.
+PHASES = (
+    "total", "walk", "git", "list", "filter", "sniff",
+    "tokens", "render", "read", "copy", "clipboard",
+)
+
+
+def _add(into: dict[str, T], deltas: dict[str, T]) -> None:
+    for key, delta in deltas.items():
+        into[key] = into.get(key, 0) + delta  # type: ignore[operator]
+
+
+class Stats:
+    """
+    Seconds per phase, counters (syscalls, bytes, cache hits, ...) and skipped
+    files and directories per reason. Safe to update from several threads.
+    """
+
+    def __init__(self) -> None:
+        self.seconds: dict[str, float] = {}
+        self.counts: dict[str, int] = {}
+        self.skipped_files: dict[str, int] = {}
+        self.skipped_dirs: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def add(self, **deltas: int) -> None:
+        """Bump counters, e.g. ``add(read_opens=1, read_bytes=n)``."""
+        with self._lock:
+            _add(self.counts, deltas)
+
+    def add_time(self, phase: str, seconds: float) -> None:
+        with self._lock:
+            self.seconds[phase] = self.seconds.get(phase, 0.0) + seconds
+
+    def skip_file(self, reason: str) -> None:
+        """Unlocked: for a local tally that is ``merge``d later."""
+        self.skipped_files[reason] = self.skipped_files.get(reason, 0) + 1
+
+    def skip_dir(self, reason: str) -> None:
+        """Unlocked: for a local tally that is ``merge``d later."""
+        self.skipped_dirs[reason] = self.skipped_dirs.get(reason, 0) + 1
+
+    def merge(self, other: Stats) -> None:
+        """Add everything ``other`` recorded (a local tally, usually) into this one."""
+        with self._lock:
+            _add(self.seconds, other.seconds)
+            _add(self.counts, other.counts)
+            _add(self.skipped_files, other.skipped_files)
+            _add(self.skipped_dirs, other.skipped_dirs)
+
+    @contextmanager
+    def timer(self, phase: str) -> Iterator[None]:
+        """Add the time spent in the block to ``phase``."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(phase, time.perf_counter() - start)
+
+    def timed(self, phase: str, items: Iterator[T]) -> Iterator[T]:
+        """
+        Re-yield ``items``, adding the time spent producing them to ``phase``;
+        time the consumer spends between items isn't counted.
+        """
+        elapsed = 0.0
+        try:
+            while True:
+                start = time.perf_counter()
+                try:
+                    item = next(items)
+                except StopIteration:
+                    return
+                finally:
+                    elapsed += time.perf_counter() - start
+                yield item
+        finally:
+            self.add_time(phase, elapsed)
+
+    def reset(self) -> None:
+        with self._lock:
+            for tally in (self.seconds, self.counts, self.skipped_files, self.skipped_dirs):
+                tally.clear()
+
+    def copy(self) -> Stats:
+        out = Stats()
+        out.merge(self)
+        return out
+
+    def minus(self, before: Stats) -> Stats:
+        """What was recorded since ``before`` (an earlier ``copy``)."""
+        out = self.copy()
+        for mine, theirs in (
+            (out.seconds, before.seconds),
+            (out.counts, before.counts),
+            (out.skipped_files, before.skipped_files),
+            (out.skipped_dirs, before.skipped_dirs),
+        ):
+            for key, value in theirs.items():
+                mine[key] -= value  # type: ignore[operator]
+                if not mine[key]:
+                    del mine[key]
+        return out
+
+    def snapshot(self) -> dict[str, dict]:
+        """A JSON-ready copy: phases and skip reasons in pipeline order, counters sorted."""
+        with self._lock:
+            seconds = dict(self.seconds)
+            counts = dict(self.counts)
+            files, dirs = dict(self.skipped_files), dict(self.skipped_dirs)
+
+        def ordered(tally: dict[str, T], order: tuple[str, ...]) -> dict[str, T]:
+            known = [key for key in order if key in tally]
+            return {key: tally[key] for key in [*known, *sorted(tally.keys() - set(order))]}
+
+        return {
+            "seconds": {k: round(v, 6) for k, v in ordered(seconds, PHASES).items()},
+            "counts": dict(sorted(counts.items())),
+            "skipped": {
+                "files": ordered(files, SKIP_REASONS),
+                "dirs": ordered(dirs, SKIP_REASONS),
+            },
+        }
+
+
+STATS = Stats()
+
+
+@contextmanager
+def recording() -> Iterator[Stats]:
+    """
+    Collect what the process records inside the block into a fresh ``Stats``,
+    filled in when the block exits. Work running concurrently in other
+    threads of the same process is included too.
+    """
+    before = STATS.copy()
+    result = Stats()
+    try:
+        yield result
+    finally:
+        result.merge(STATS.copy().minus(before))
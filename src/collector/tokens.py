@@ -2,16 +2,284 @@
 
 from __future__ import annotations
 
+import os
+import time
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass, field
+from functools import cache
+from typing import TYPE_CHECKING, Any
 
-def count_tokens(text: str) -> tuple[int, str]:
+from .stats import STATS
+
+if TYPE_CHECKING:
+    from .cache import ScanCache, Stamp
+    from .discovery import FileEntry
+    from .formatters import Renderer
+    from .transforms import Pipeline
+
+ENCODINGS = ("cl100k_base", "o200k_base")
+DEFAULT_ENCODING = "cl100k_base"
+HEURISTIC = "heuristic (~chars/4)"
+
+# Below this much content a process pool costs more to start than it saves.
+_POOL_MIN_BYTES = 4 * 1024 * 1024
+_POOL_CHUNKSIZE = 64
+
+
+@cache
+def get_encoder(encoding: str = DEFAULT_ENCODING) -> Any | None:
     """
-    Return (token_count, method). Uses tiktoken's cl100k_base if available,
-    otherwise falls back to a chars/4 heuristic which is roughly accurate
-    for English/code (overestimates for CJK).
+    The tiktoken encoding, loaded once per process. None if tiktoken isn't
+    installed or can't load the encoding (it downloads BPE files on first use,
+    which fails offline).
     """
     try:
         import tiktoken
     except ImportError:
-        return (len(text) // 4, "heuristic (~chars/4)")
-    enc = tiktoken.get_encoding("cl100k_base")
-    return (len(enc.encode(text, disallowed_special=())), "tiktoken cl100k_base")
+        return None
+    try:
+        return tiktoken.get_encoding(encoding)
+    except Exception:  # noqa: BLE001 - network, cache and lookup errors all mean "fall back"
+        return None
+
+
+def method_for(encoding: str = DEFAULT_ENCODING) -> str:
+    """Human-readable counting method; also the cache key for per-file counts."""
+    return HEURISTIC if get_encoder(encoding) is None else f"tiktoken {encoding}"
+
+
+class TokenCounter:
+    """
+    Incremental token counter, fed chunk by chunk while a bundle streams out.
+
+    Uses tiktoken's ``encoding`` (cl100k_base by default) if available,
+    otherwise falls back to a chars/4 heuristic which is roughly accurate for
+    English/code (overestimates for CJK). Chunks are encoded independently,
+    so the tiktoken total can differ from a whole-string count by a token or
+    two per chunk boundary.
+    """
+
+    def __init__(self, encoding: str = DEFAULT_ENCODING) -> None:
+        self._chars = 0
+        self._tokens = 0
+        self._enc = get_encoder(encoding)
+        self.method = method_for(encoding)
+
+    def count(self, text: str) -> int:
+        """Tokens in ``text`` on its own, without adding them to the total."""
+        if self._enc is None:
+            return len(text) // 4
+        return len(self._enc.encode(text, disallowed_special=()))
+
+    def feed(self, text: str) -> None:
+        if self._enc is None:
+            self._chars += len(text)
+        else:
+            self._tokens += self.count(text)
+
+    def add(self, n: int) -> None:
+        """Add a count computed elsewhere (e.g. a cached per-file count)."""
+        self._tokens += n
+
+    @property
+    def total(self) -> int:
+        return self._chars // 4 + self._tokens
+
+
+def count_tokens(text: str, encoding: str = DEFAULT_ENCODING) -> tuple[int, str]:
+    """Return (token_count, method) for a single string."""
+    with STATS.timer("tokens"):
+        counter = TokenCounter(encoding)
+        counter.feed(text)
+    return (counter.total, counter.method)
+
+
+@dataclass
+class TokenReport:
+    """
+    Per-file token estimates for a list of entries, before rendering.
+
+    ``content[i]`` is entry i's file content; ``wrapper[i]`` is what the
+    formatter adds around it (section header, fence/closing tag).
+    ``separator`` is what goes between two sections, charged to every file
+    but the first. ``frame`` covers the bundle header (file tree) and footer.
+
+    With ``--dedup``, ``groups`` maps each file that has byte-identical twins
+    to its content digest and ``reference[i]`` is what it costs as a
+    reference to an earlier twin. ``per_file`` charges the first file of each
+    group in full and the rest as references, for whatever subset is taken.
+    """
+    method: str
+    content: list[int]
+    wrapper: list[int]
+    frame: int = 0
+    groups: dict[int, str] = field(default_factory=dict)
+    reference: dict[int, int] = field(default_factory=dict)
+    separator: int = 0
+    per_file: list[int] = field(init=False)
+
+    def __post_init__(self) -> None:
+        self.per_file = self._full()
+        seen: set[str] = set()
+        for i in sorted(self.groups):
+            if self.groups[i] in seen:
+                self.per_file[i] = self.reference[i] + (self.separator if i else 0)
+            seen.add(self.groups[i])
+
+    def _full(self) -> list[int]:
+        """Each file's cost with its content in full."""
+        return [
+            c + w + (self.separator if i else 0)
+            for i, (c, w) in enumerate(zip(self.content, self.wrapper, strict=True))
+        ]
+
+    @property
+    def total(self) -> int:
+        return self.frame + sum(self.per_file)
+
+    @property
+    def saved(self) -> int:
+        """Tokens that deduplication takes off the bundle."""
+        return sum(self._full()) - sum(self.per_file)
+
+    def subset(self, indices: Sequence[int], frame: int) -> TokenReport:
+        """The report for a selection of the counted entries, with its own ``frame``."""
+        position = {i: n for n, i in enumerate(indices)}
+        return TokenReport(
+            self.method,
+            [self.content[i] for i in indices],
+            [self.wrapper[i] for i in indices],
+            frame,
+            {position[i]: sha for i, sha in self.groups.items() if i in position},
+            {position[i]: n for i, n in self.reference.items() if i in position},
+            self.separator,
+        )
+
+    def by_directory(self, entries: Sequence[FileEntry]) -> dict[str, int]:
+        """Token totals per parent directory ("." for the root), largest first."""
+        totals: dict[str, int] = {}
+        for entry, n in zip(entries, self.per_file, strict=True):
+            parent = entry.rel_path.parent.as_posix()
+            totals[parent] = totals.get(parent, 0) + n
+        return dict(sorted(totals.items(), key=lambda kv: (-kv[1], kv[0])))
+
+
+def _count_file(job: tuple[str, bytes | None, str, str]) -> tuple[int, int]:
+    """Worker: (content tokens, wrapper tokens) for one file. Runs in pool processes."""
+    from pathlib import Path
+
+    from .discovery import decode_text
+
+    path, data, wrapper, encoding = job
+    counter = TokenCounter(encoding)
+    try:
+        content = decode_text(data if data is not None else Path(path).read_bytes())
+    except OSError:
+        content = ""
+    return counter.count(content), counter.count(wrapper)
+
+
+def count_entries(
+    entries: Sequence[FileEntry],
+    renderer: Renderer,
+    encoding: str = DEFAULT_ENCODING,
+    cache: ScanCache | None = None,
+    jobs: int | None = None,
+    copies: Mapping[str, str] | None = None,
+    pipeline: Pipeline | None = None,
+) -> TokenReport:
+    """
+    Count tokens per file, plus each file's formatter wrapper, before rendering.
+
+    Counts already in the scan cache for the same method are reused. With
+    tiktoken and enough content, the rest are encoded in a process pool of
+    ``jobs`` workers (default: one per CPU); each worker loads the encoder once.
+    ``copies`` (path -> digest, from ``dedup.find_copies``) adds what each
+    such file costs as a reference to its first twin. With a ``pipeline``,
+    content is counted as its transforms leave it, transformed by
+    ``Pipeline.prepare`` so the render can reuse the result.
+    """
+    from .discovery import entry_stamp
+
+    start = time.perf_counter()
+    method = method_for(encoding)
+    content: list[int | None] = [None] * len(entries)
+    wrapper = [0] * len(entries)
+    counter = TokenCounter(encoding)
+    todo: list[int] = []
+    methods = [method] * len(entries)
+    stamps: list[Stamp | None] = [None] * len(entries)
+    jobs_args: list[tuple[str, bytes | None, str, str]] = []
+    transform: list[int] = []
+    for i, entry in enumerate(entries):
+        text = renderer.open_section(entry) + renderer.close_section(entry, True)
+        steps = pipeline.steps(entry) if pipeline is not None else ()
+        if steps:
+            methods[i] = pipeline.token_method(method, steps)
+        # An excerpt's count isn't the file's: leave those out of the cache.
+        rec = None
+        if cache is not None and entry.excerpt_of is None:
+            stamps[i] = entry_stamp(entry)
+            rec = cache.get(entry.rel_path.as_posix(), stamps[i])
+        if rec is not None and rec.tokens is not None and rec.token_method == methods[i]:
+            content[i] = rec.tokens
+            wrapper[i] = counter.count(text)
+            continue
+        if steps:
+            transform.append(i)
+            wrapper[i] = counter.count(text)
+            continue
+        todo.append(i)
+        jobs_args.append((str(entry.path), entry.data, text, encoding))
+
+    workers = jobs or os.cpu_count() or 1
+    pending_bytes = sum(entries[i].size for i in todo)
+    if method != HEURISTIC and workers > 1 and pending_bytes >= _POOL_MIN_BYTES:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=get_encoder, initargs=(encoding,)
+        ) as pool:
+            results = list(pool.map(_count_file, jobs_args, chunksize=_POOL_CHUNKSIZE))
+    else:
+        results = [_count_file(args) for args in jobs_args]
+
+    for i, (n_content, n_wrapper) in zip(todo, results, strict=True):
+        content[i], wrapper[i] = n_content, n_wrapper
+    if transform:
+        prepared = pipeline.prepare([entries[i] for i in transform], jobs)
+        for i, result in zip(transform, prepared, strict=True):
+            counted = result.tokens is not None and pipeline.encoding == encoding
+            content[i] = result.tokens if counted else counter.count(result.text)
+    if cache is not None:
+        for i in [*todo, *transform]:
+            if stamps[i] is not None:
+                rel = entries[i].rel_path.as_posix()
+                cache.update_content(rel, stamps[i], tokens=content[i], token_method=methods[i])
+
+    groups: dict[int, str] = {}
+    reference: dict[int, int] = {}
+    first: dict[str, str] = {}
+    for i, entry in enumerate(entries):
+        rel = entry.rel_path.as_posix()
+        sha = copies.get(rel) if copies else None
+        if sha is not None:
+            text = renderer.reference(entry, first.setdefault(sha, rel))
+            groups[i], reference[i] = sha, counter.count(text)
+
+    frame = frame_tokens(entries, renderer, encoding)
+    STATS.add_time("tokens", time.perf_counter() - start)
+    counted = len(todo) + len(transform)
+    STATS.add(tokens_cached=len(entries) - counted, tokens_counted=counted)
+    return TokenReport(
+        method, [n or 0 for n in content], wrapper, frame, groups, reference,
+        counter.count(renderer.separator),
+    )
+
+
+def frame_tokens(
+    entries: Sequence[FileEntry], renderer: Renderer, encoding: str = DEFAULT_ENCODING
+) -> int:
+    """Tokens in the bundle header (including the file tree) and footer for ``entries``."""
+    entries = list(entries)
+    return TokenCounter(encoding).count(renderer.header(entries) + renderer.footer(entries))
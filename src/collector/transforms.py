@@ -0,0 +1,609 @@
+"""
+Content transforms: lossy rewrites of file content that cut a bundle's bytes and tokens.
+
+Every byte of a file goes into the bundle unchanged unless a transform is
+selected (``--transform``, ``CollectorConfig.transforms``). Each one is a
+function of a file's text and its language (``language_for``) and only
+applies where it knows the language's syntax:
+
+- ``license``: a leading comment block that mentions a licence or copyright
+  becomes one comment line, keeping the SPDX identifier if there is one;
+- ``docstrings``: Python docstrings go (a body that was only a docstring
+  becomes ``...``), found with ``ast``;
+- ``comments``: comments go; Python's via ``tokenize``, C-family ``//`` and
+  ``/* */`` ones with a lexer that skips string literals, and full-line
+  ``#``, ``--`` and ``<!-- -->`` ones elsewhere;
+- ``outline``: only imports, signatures and one-line docstrings are kept
+  (headings, for Markdown); with ``--outline GLOB`` just for matching files;
+- ``blank-lines``: runs of blank lines become one.
+
+They run in that order whatever order they were given in, and a file whose
+source they can't parse is left as it was. Text inside string literals that
+spans blank lines can lose lines to ``blank-lines``; the others don't touch
+literals.
+
+``Pipeline.stream`` transforms a render's files one at a time, or a window
+ahead on a process pool when there's enough content to make one pay, and
+tallies the bytes (and, when tokens are being counted, the tokens) each
+transform saved. When tokens are counted before the render,
+``Pipeline.prepare`` transforms the files for that and holds the results
+(within the hand-off budget) for ``stream`` to reuse. Cached token counts
+of transformed files are keyed by the transforms that produced them;
+content hashes (``--manifest``, ``--dedup``) stay those of the files on
+disk.
+"""
+
+from __future__ import annotations
+
+import io
+import os
+import re
+import threading
+from collections import deque
+from collections.abc import Callable, Collection, Iterable, Iterator, Sequence
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+from .cache import content_hash
+from .config import CollectorConfig, language_for
+from .discovery import FileEntry, decode_text, read_entry_bytes
+from .ignore import CompiledSpec
+from .stats import STATS
+from .tokens import _POOL_MIN_BYTES, TokenCounter
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+
+# Files transformed ahead of the render, per pool worker.
+_AHEAD = 4
+
+# Removed text is replaced by a mark until lines are tidied: the first
+# private-use character the file doesn't contain.
+_MARKS = 0xE000
+
+
+@dataclass(frozen=True)
+class _Syntax:
+    """How a language writes comments: full-line prefixes, and a block delimiter pair."""
+
+    line: tuple[str, ...] = ()
+    block: tuple[str, str] | None = None
+
+
+_C_FAMILY = frozenset({
+    "c", "cpp", "csharp", "java", "javascript", "jsx", "typescript", "tsx", "go", "rust",
+    "swift", "kotlin", "scala", "groovy", "dart", "php", "scss", "less", "protobuf",
+    "jsonc", "json5",
+})
+_SYNTAX: dict[str, _Syntax] = {
+    **{lang: _Syntax(("//",), ("/*", "*/")) for lang in _C_FAMILY},
+    "css": _Syntax(block=("/*", "*/")),
+    **{lang: _Syntax(("#",)) for lang in (
+        "python", "bash", "fish", "yaml", "toml", "ruby", "perl", "r", "julia", "elixir",
+        "makefile", "dockerfile", "hcl", "powershell", "gitignore",
+    )},
+    "ini": _Syntax(("#", ";")),
+    **{lang: _Syntax(("--",)) for lang in ("sql", "lua", "haskell", "elm")},
+    **{lang: _Syntax(block=("<!--", "-->")) for lang in (
+        "html", "xml", "markdown", "mdx", "vue", "svelte",
+    )},
+}
+
+
+def _lines(text: str) -> list[str]:
+    """``text`` split after each newline only (``splitlines`` also splits on form feeds)."""
+    return io.StringIO(text).readlines()
+
+
+def _mark(text: str) -> str:
+    """A character to stand in for removed text that ``text`` doesn't already contain."""
+    code = _MARKS
+    while chr(code) in text:
+        code += 1
+    return chr(code)
+
+
+def _tidy(text: str, mark: str) -> str:
+    """Drop the ``mark``s left by a removal, and the lines it left blank."""
+    if mark not in text:
+        return text
+    out = []
+    for line in _lines(text):
+        if mark in line:
+            body = line.replace(mark, "").rstrip()
+            if not body:
+                continue
+            line = body + ("\n" if line.endswith("\n") else "")
+        out.append(line)
+    return "".join(out)
+
+
+def _prefix(line: str, col: int) -> str:
+    """The part of ``line`` before ``ast``'s ``col``, which counts UTF-8 bytes."""
+    return line.encode()[:col].decode(errors="replace") if not line.isascii() else line[:col]
+
+
+# -- blank-lines ---------------------------------------------------------------
+
+_BLANK_RUN = re.compile(r"\n(?:[ \t]*\n){2,}")
+
+
+def _blank_lines(text: str, language: str) -> str:
+    return _BLANK_RUN.sub("\n\n", text)
+
+
+# -- comments ------------------------------------------------------------------
+
+_STRINGS = r'"(?:\\.|[^"\\\n])*"|`(?:\\.|[^`\\])*`'
+_C_LEXER = re.compile(rf"//[^\n]*|/\*.*?\*/|{_STRINGS}|'(?:\\.|[^'\\\n])*'", re.S)
+# Rust lifetimes ('a) look like the start of a character literal.
+_RUST_LEXER = re.compile(rf"//[^\n]*|/\*.*?\*/|{_STRINGS}|'(?:\\.[^'\n]*|[^'\\\n])'", re.S)
+_CSS_LEXER = re.compile(rf"/\*.*?\*/|{_STRINGS}|'(?:\\.|[^'\\\n])*'", re.S)
+
+
+def _python_comments(text: str) -> str:
+    import tokenize
+
+    lines, mark = _lines(text), _mark(text)
+    try:
+        comments = [
+            tok.start for tok in tokenize.generate_tokens(iter(lines).__next__)
+            if tok.type == tokenize.COMMENT
+        ]
+    except (tokenize.TokenError, SyntaxError):
+        return text
+    for row, col in comments:
+        line = lines[row - 1]
+        if row == 1 and line.startswith("#!"):
+            continue
+        lines[row - 1] = line[:col] + mark + ("\n" if line.endswith("\n") else "")
+    return _tidy("".join(lines), mark)
+
+
+def _lexed_comments(text: str, lexer: re.Pattern[str]) -> str:
+    mark = _mark(text)
+    return _tidy(lexer.sub(lambda m: mark if m[0][0] == "/" else m[0], text), mark)
+
+
+def _comments(text: str, language: str) -> str:
+    if language == "python":
+        return _python_comments(text)
+    if language == "rust":
+        return _lexed_comments(text, _RUST_LEXER)
+    if language in _C_FAMILY:
+        return _lexed_comments(text, _C_LEXER)
+    if language == "css":
+        return _lexed_comments(text, _CSS_LEXER)
+    syntax, mark = _SYNTAX[language], _mark(text)
+    if syntax.block is not None:
+        start, end = map(re.escape, syntax.block)
+        return _tidy(re.sub(rf"{start}.*?{end}", mark, text, flags=re.S), mark)
+    prefixes = "|".join(re.escape(p) for p in syntax.line)
+    # Full-line comments only: a "#" later in a line may as well be in a string.
+    return _tidy(re.sub(rf"^[ \t]*(?:{prefixes})(?!!).*$", mark, text, flags=re.M), mark)
+
+
+# -- docstrings ----------------------------------------------------------------
+
+
+def _docstring(node: object) -> object | None:
+    """The docstring expression at the top of a module, class or function body."""
+    import ast
+
+    body = getattr(node, "body", None)
+    if not isinstance(node, ast.Module | ast.ClassDef | ast.FunctionDef | ast.AsyncFunctionDef):
+        return None
+    first = body[0] if body else None
+    if (
+        isinstance(first, ast.Expr)
+        and isinstance(first.value, ast.Constant)
+        and isinstance(first.value.value, str)
+    ):
+        return first
+    return None
+
+
+def _docstrings(text: str, language: str) -> str:
+    import ast
+
+    try:
+        tree = ast.parse(text)
+    except (SyntaxError, ValueError):
+        return text
+    lines, mark = _lines(text), _mark(text)
+    for node in ast.walk(tree):
+        doc = _docstring(node)
+        if doc is None:
+            continue
+        first, last = doc.lineno - 1, doc.end_lineno - 1
+        before = _prefix(lines[first], doc.col_offset)
+        after = lines[last].encode()[doc.end_col_offset:].decode(errors="replace").strip()
+        if before.strip() or (after and not after.startswith("#")):
+            continue  # shares a line with code
+        for row in range(first, last + 1):
+            lines[row] = mark + ("\n" if lines[row].endswith("\n") else "")
+        if len(node.body) == 1 and not isinstance(node, ast.Module):
+            lines[first] = f"{before}...\n"
+    return _tidy("".join(lines), mark)
+
+
+# -- license -------------------------------------------------------------------
+
+_LICENSE_WORDS = re.compile(r"licen[cs]e|copyright|spdx-license-identifier|\(c\)|©", re.I)
+_SPDX = re.compile(r"SPDX-License-Identifier:\s*([\w.+-]+(?:\s+(?:OR|AND|WITH)\s+[\w.+-]+)*)")
+# Shorter leading comments are left alone: one line saves nothing.
+_LICENSE_MIN_LINES = 3
+
+
+def _license(text: str, language: str) -> str:
+    syntax = _SYNTAX[language]
+    lines = _lines(text)
+    start = 1 if lines and lines[0].startswith("#!") else 0
+    end = start
+    if syntax.block is not None and start < len(lines) and lines[start].lstrip().startswith(
+        syntax.block[0]
+    ):
+        while end < len(lines) and syntax.block[1] not in lines[end]:
+            end += 1
+        end += 1
+        opener, closer = syntax.block
+        marker = f"{opener} [{{}} omitted] {closer}\n"
+    elif syntax.line:
+        while end < len(lines) and lines[end].lstrip().startswith(syntax.line):
+            end += 1
+        marker = f"{syntax.line[0]} [{{}} omitted]\n"
+    else:
+        return text
+    end = min(end, len(lines))
+    header = "".join(lines[start:end])
+    if end - start < _LICENSE_MIN_LINES or not _LICENSE_WORDS.search(header):
+        return text
+    spdx = _SPDX.search(header)
+    what = f"{spdx[1]} license header" if spdx else "license header"
+    note = marker.format(f"{what}, {end - start} lines")
+    return "".join([*lines[:start], note, *lines[end:]])
+
+
+# -- outline -------------------------------------------------------------------
+
+_DECLARATION = re.compile(
+    r"^[ \t]*(?:(?:export|pub(?:\([\w:]+\))?|public|private|protected|internal|static|"
+    r"abstract|final|async|override|open|sealed|data|inline|unsafe|extern|declare|default|"
+    r"virtual|partial)\s+)*"
+    r"(?:class|interface|struct|enum|trait|impl|fn|func|function|def|defp|defmodule|defmacro|"
+    r"type|module|namespace|package|import|use|from|record|object|protocol|extension|mod|"
+    r"message|service|rpc|sub)\b.*$"
+    # Java, C# and friends: a modifier, then a return type and a parameter list.
+    r"|^[ \t]*(?:public|private|protected|internal)\b[^;=\n]*\(.*$"
+    r"|^#include\b.*$",
+    re.M,
+)
+_HEADING = re.compile(r"^#{1,6} .*$", re.M)
+_OUTLINE_LANGUAGES = (_C_FAMILY - {"scss", "less", "jsonc", "json5"}) | {
+    "python", "markdown", "mdx", "ruby", "elixir", "bash", "lua",
+}
+
+
+def _start(node: object) -> int:
+    """First line of a statement, decorators included."""
+    return min((d.lineno for d in getattr(node, "decorator_list", ())), default=node.lineno)
+
+
+def _outline_body(body: list, lines: list[str], out: list[str], top: bool) -> None:
+    import ast
+
+    for node in body:
+        if isinstance(node, ast.Import | ast.ImportFrom) or (
+            isinstance(node, ast.Assign | ast.AnnAssign) and node.lineno == node.end_lineno
+        ):
+            out.extend(lines[node.lineno - 1:node.end_lineno])
+            continue
+        if not isinstance(node, ast.ClassDef | ast.FunctionDef | ast.AsyncFunctionDef):
+            continue
+        if top and out and out[-1].strip():
+            out.append("\n")
+        first = node.body[0]
+        row = _start(first) - 1
+        lead = _prefix(lines[first.lineno - 1], first.col_offset)
+        if lead.strip():  # the body starts on the signature's last line
+            out.extend(lines[_start(node) - 1:first.lineno - 1])
+            out.append(lead.rstrip() + " ...\n")
+            continue
+        header = lines[_start(node) - 1:row]
+        while len(header) > 1 and (not header[-1].strip() or header[-1].lstrip()[0] == "#"):
+            header.pop()
+        out.extend(header)
+        doc = _docstring(node)
+        if doc is not None and doc.lineno == doc.end_lineno:
+            out.append(lines[doc.lineno - 1])
+        if isinstance(node, ast.ClassDef):
+            size = len(out)
+            _outline_body(node.body, lines, out, top=False)
+            if len(out) > size:
+                continue
+        out.append(f"{lead}...\n")
+
+
+def _outline(text: str, language: str) -> str:
+    if language in ("markdown", "mdx"):
+        return "".join(m[0] + "\n" for m in _HEADING.finditer(text))
+    if language != "python":
+        return "".join(m[0] + "\n" for m in _DECLARATION.finditer(text))
+    import ast
+
+    try:
+        tree = ast.parse(text)
+    except (SyntaxError, ValueError):
+        return text
+    lines = _lines(text)
+    out: list[str] = []
+    _outline_body(tree.body, lines, out, top=True)
+    return "".join(out)
+
+
+# -- registry ------------------------------------------------------------------
+
+
+@dataclass(frozen=True)
+class Transform:
+    """
+    One rewrite: ``rewrite(text, language)`` for files in ``languages``
+    (every file, if None).
+    """
+
+    name: str
+    help: str
+    rewrite: Callable[[str, str], str]
+    languages: frozenset[str] | None = None
+
+    def applies(self, language: str) -> bool:
+        return self.languages is None or language in self.languages
+
+
+# In the order they run, as listed in config.TRANSFORM_NAMES.
+TRANSFORMS: dict[str, Transform] = {
+    t.name: t for t in (
+        Transform(
+            "license", "collapse a leading licence/copyright comment block to one line",
+            _license, frozenset(_SYNTAX),
+        ),
+        Transform("docstrings", "drop Python docstrings", _docstrings, frozenset({"python"})),
+        Transform("comments", "drop comments", _comments, frozenset(_SYNTAX)),
+        Transform(
+            "outline", "keep only imports and signatures (headings for Markdown)",
+            _outline, frozenset(_OUTLINE_LANGUAGES),
+        ),
+        Transform("blank-lines", "collapse runs of blank lines into one", _blank_lines),
+    )
+}
+
+
+def token_method(method: str, steps: Sequence[str]) -> str:
+    """The cache key for token counts of content transformed by ``steps``."""
+    return f"{method} +{'+'.join(steps)}" if steps else method
+
+
+@dataclass
+class Saving:
+    """What one transform took off the bundle."""
+
+    files: int = 0  # files it changed
+    bytes: int = 0
+    tokens: int = 0  # 0 unless the pipeline counts tokens
+
+
+@dataclass
+class Transformed:
+    """A file's content after its ``steps``, and the (bytes, tokens) each step saved."""
+
+    text: str
+    steps: tuple[str, ...]
+    saved: dict[str, tuple[int, int]] = field(default_factory=dict)
+    digest: str | None = None  # SHA-256 of the file's content on disk, if asked for
+    tokens: int | None = None  # tokens in ``text``, if the pipeline counts them
+
+    def token_method(self, method: str) -> str:
+        return token_method(method, self.steps)
+
+
+def apply_steps(text: str, language: str, steps: Iterable[str]) -> str:
+    """``text`` after the transforms named in ``steps``, unmeasured."""
+    for name in steps:
+        text = TRANSFORMS[name].rewrite(text, language)
+    return text
+
+
+def _transform_entry(job: tuple[FileEntry, tuple[str, ...], str | None, bool]) -> Transformed:
+    """Worker: one file read, transformed and measured. Runs in pool processes too."""
+    entry, steps, encoding, digest = job
+    data = read_entry_bytes(entry)
+    text, language = decode_text(data), language_for(entry.path)
+    counter = TokenCounter(encoding) if encoding is not None else None
+    size = len(text.encode())
+    n_tokens = counter.count(text) if counter is not None else 0
+    saved = {}
+    for name in steps:
+        text = TRANSFORMS[name].rewrite(text, language)
+        new_size = len(text.encode())
+        new_tokens = counter.count(text) if counter is not None else 0
+        saved[name] = (size - new_size, n_tokens - new_tokens)
+        size, n_tokens = new_size, new_tokens
+    return Transformed(
+        text, steps, saved, content_hash(data) if digest else None,
+        n_tokens if counter is not None else None,
+    )
+
+
+class Pipeline:
+    """
+    The transforms selected for a run. ``outline`` globs limit the outline
+    transform to the files they match, and select it if ``names`` doesn't.
+    With an ``encoding`` the tokens each transform saves are counted too.
+    ``savings`` accumulates over every ``stream``. Up to ``keep`` bytes of
+    what ``prepare`` transformed are held for the next ``stream`` to reuse.
+    Raises ValueError for an unknown transform name.
+    """
+
+    def __init__(
+        self,
+        names: Iterable[str] = (),
+        outline: Iterable[str] = (),
+        encoding: str | None = None,
+        keep: int = 0,
+    ) -> None:
+        chosen = set(names)
+        unknown = sorted(chosen - TRANSFORMS.keys())
+        if unknown:
+            raise ValueError(
+                f"unknown transform {unknown[0]!r}; choose from {', '.join(TRANSFORMS)}"
+            )
+        self.outline = tuple(outline)
+        if self.outline:
+            chosen.add("outline")
+        self.names = tuple(name for name in TRANSFORMS if name in chosen)
+        self.encoding = encoding
+        self.savings: dict[str, Saving] = {name: Saving() for name in self.names}
+        self._outline_spec = CompiledSpec(list(self.outline)) if self.outline else None
+        self._lock = threading.Lock()
+        self.keep = keep
+        self._kept: dict[tuple[str, int, int], Transformed] = {}
+
+    @classmethod
+    def from_config(cls, config: CollectorConfig) -> Pipeline | None:
+        """The config's transforms, or None if it selects none."""
+        if not config.transforms and not config.outline_globs:
+            return None
+        counting = config.count_tokens or config.max_tokens is not None
+        encoding = config.token_encoding if counting else None
+        return cls(config.transforms, config.outline_globs, encoding, config.handoff_budget)
+
+    def steps(self, entry: FileEntry) -> tuple[str, ...]:
+        """Names of the transforms that apply to ``entry``, in order."""
+        language = language_for(entry.path)
+        return tuple(
+            name for name in self.names
+            if TRANSFORMS[name].applies(language)
+            and (
+                name != "outline" or self._outline_spec is None
+                or self._outline_spec.match(entry.rel_path.as_posix())
+            )
+        )
+
+    def token_method(self, method: str, steps: Sequence[str]) -> str:
+        return token_method(method, steps)
+
+    @staticmethod
+    def _key(entry: FileEntry) -> tuple[str, int, int]:
+        return (entry.rel_path.as_posix(), entry.mtime_ns, entry.size)
+
+    def _record(self, result: Transformed) -> Transformed:
+        counts = {"transformed_files": 1}
+        with self._lock:
+            for name, (n_bytes, n_tokens) in result.saved.items():
+                saving = self.savings[name]
+                saving.files += n_bytes != 0
+                saving.bytes += n_bytes
+                saving.tokens += n_tokens
+                key = name.replace("-", "_")
+                counts[f"transform_{key}_bytes_saved"] = n_bytes
+                if self.encoding is not None:
+                    counts[f"transform_{key}_tokens_saved"] = n_tokens
+        STATS.add(**counts)
+        return result
+
+    def prepare(
+        self, entries: Sequence[FileEntry], jobs: int | None = None
+    ) -> Iterator[Transformed | None]:
+        """
+        Each entry's transformed content, in order, or None where no
+        transform applies, for counting its tokens before the render. The
+        results are held (up to ``keep`` bytes) for the next ``stream`` over
+        the same files, which yields them instead of transforming again and
+        records their savings then.
+        """
+        self._kept.clear()
+        kept = 0
+        plan = [self.steps(entry) for entry in entries]
+        for entry, result in zip(entries, self._transform(entries, plan, True, jobs), strict=True):
+            if result is not None and kept + len(result.text) <= self.keep:
+                self._kept[self._key(entry)] = result
+                kept += len(result.text)
+            yield result
+
+    def stream(
+        self,
+        entries: Sequence[FileEntry],
+        digests: bool = False,
+        skip: Collection[str] = (),
+        jobs: int | None = None,
+    ) -> Iterator[Transformed | None]:
+        """
+        Each entry's transformed content, in order, or None where no
+        transform applies or its path is in ``skip``. With enough content
+        and ``jobs`` > 1 (default: one per CPU), files are transformed on a
+        process pool, at most a few per worker ahead of the one being
+        consumed. ``digests`` adds the hash of each file's raw content.
+        """
+        plan: list[tuple[str, ...]] = []
+        ready: list[Transformed | None] = []
+        for entry in entries:
+            steps = () if entry.rel_path.as_posix() in skip else self.steps(entry)
+            kept = self._kept.pop(self._key(entry), None) if steps else None
+            plan.append(() if kept is not None else steps)
+            ready.append(kept)
+        results = self._transform(entries, plan, digests, jobs)
+        for kept, result in zip(ready, results, strict=True):
+            done = kept if kept is not None else result
+            yield None if done is None else self._record(done)
+
+    def _transform(
+        self,
+        entries: Sequence[FileEntry],
+        plan: list[tuple[str, ...]],
+        digests: bool,
+        jobs: int | None,
+    ) -> Iterator[Transformed | None]:
+        workers = jobs or os.cpu_count() or 1
+        pending_bytes = sum(entry.size for entry, steps in zip(entries, plan, strict=True) if steps)
+        if workers > 1 and pending_bytes >= _POOL_MIN_BYTES:
+            yield from self._pooled(entries, plan, digests, workers)
+            return
+        for entry, steps in zip(entries, plan, strict=True):
+            yield _transform_entry((entry, steps, self.encoding, digests)) if steps else None
+
+    def _pooled(
+        self,
+        entries: Sequence[FileEntry],
+        plan: list[tuple[str, ...]],
+        digests: bool,
+        workers: int,
+    ) -> Iterator[Transformed | None]:
+        from concurrent.futures import ProcessPoolExecutor
+
+        pool = ProcessPoolExecutor(max_workers=workers)
+        queue: deque[Future[Transformed] | None] = deque()
+        in_flight = 0
+
+        def take() -> Transformed | None:
+            nonlocal in_flight
+            job = queue.popleft()
+            if job is None:
+                return None
+            in_flight -= 1
+            return job.result()
+
+        try:
+            for entry, steps in zip(entries, plan, strict=True):
+                if steps:
+                    queue.append(
+                        pool.submit(_transform_entry, (entry, steps, self.encoding, digests))
+                    )
+                    in_flight += 1
+                else:
+                    queue.append(None)
+                while in_flight >= workers * _AHEAD:
+                    yield take()
+            while queue:
+                yield take()
+        finally:
+            pool.shutdown(cancel_futures=True)
@@ -0,0 +1,629 @@
+"""
+``collect --watch``: keep an output bundle up to date as files change.
+
+Changes come from Linux inotify (through ctypes, one watch per directory the
+walk would enter) or, where that isn't available, from polling with a
+cache-backed re-walk. Events are debounced, then only the affected paths go
+back through the discovery filters (``discovery.probe``).
+
+The bundle is patched rather than regenerated: the byte range of every file
+section in the current output is known, so a new version is assembled from
+the old file's unchanged ranges (copied with ``copy_file_range`` where the
+kernel supports it) plus freshly rendered sections for the files that
+changed. The header and footer are re-rendered only when the set of files
+changes. The result goes to a temporary file that replaces the output in
+one ``rename``, so readers see either the old bundle or the new one.
+
+The tree-tracking half, ``LiveIndex``, also backs ``collect serve``.
+"""
+
+from __future__ import annotations
+
+import bisect
+import ctypes
+import ctypes.util
+import itertools
+import os
+import select
+import struct
+import time
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+
+from .cache import ScanCache
+from .config import CollectorConfig
+from .discovery import FileEntry, probe, walk
+from .formatters import Renderer, get_renderer, render_section, render_to
+from .gitindex import walk_key
+from .ignore import CompiledSpec, IgnoreMatcher
+from .platform_utils import copy_range
+from .transforms import Pipeline
+
+# inotify(7) event bits.
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+_WATCH_MASK = (
+    IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+    | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR
+)
+_EVENT = struct.Struct("iIII")
+
+# Keep collecting events until this long passes without one, or MAX_WAIT overall.
+_MAX_WAIT = 0.5
+
+
+@dataclass
+class Batch:
+    """
+    Debounced changes: root-relative file paths to re-check, directories that
+    disappeared, and whether everything must be re-walked (queue overflow, a
+    .gitignore changed). The polling watcher hands over the new walk directly.
+    """
+    files: set[str] = field(default_factory=set)
+    gone_dirs: set[str] = field(default_factory=set)
+    rescan: bool = False
+    entries: list[FileEntry] | None = None
+
+    def __bool__(self) -> bool:
+        return bool(self.files or self.gone_dirs or self.rescan or self.entries is not None)
+
+
+class _Inotify:
+    """Minimal ctypes binding: init, add/remove watches, read decoded events."""
+
+    def __init__(self) -> None:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._add = libc.inotify_add_watch
+        self._add.argtypes = (ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32)
+        self._rm = libc.inotify_rm_watch
+        self._rm.argtypes = (ctypes.c_int, ctypes.c_int)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        self._poll = select.poll()
+        self._poll.register(self.fd, select.POLLIN)
+
+    def add(self, path: str) -> int:
+        wd = self._add(self.fd, os.fsencode(path), _WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err), path)
+        return wd
+
+    def remove(self, wd: int) -> None:
+        self._rm(self.fd, wd)
+
+    def read(self, timeout: float | None) -> list[tuple[int, int, str]]:
+        """(wd, mask, name) events; waits up to ``timeout`` seconds (None = forever)."""
+        if not self._poll.poll(None if timeout is None else int(timeout * 1000)):
+            return []
+        try:
+            buf = os.read(self.fd, 256 * 1024)
+        except BlockingIOError:
+            return []
+        events = []
+        offset = 0
+        while offset < len(buf):
+            wd, mask, _cookie, length = _EVENT.unpack_from(buf, offset)
+            offset += _EVENT.size
+            name = os.fsdecode(buf[offset:offset + length].rstrip(b"\0"))
+            offset += length
+            events.append((wd, mask, name))
+        return events
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class InotifyWatcher:
+    """
+    One inotify watch per directory the walk would enter, with the gitignore
+    rules in force there, so changed paths can be filtered without a walk.
+    """
+
+    def __init__(
+        self, root: Path, config: CollectorConfig, matcher: IgnoreMatcher, debounce: float
+    ) -> None:
+        self.root = str(root)
+        self.config = config
+        self.matcher = matcher
+        self.debounce = debounce
+        self.rules: dict[str, CompiledSpec | None] = {}
+        self._dirs: dict[int, str] = {}
+        self._inotify = _Inotify()
+        try:
+            self._add_tree("", matcher.root_rules)
+        except OSError:
+            self.close()
+            raise
+
+    def _add_tree(self, prefix: str, rules: CompiledSpec | None) -> list[str]:
+        """Watch ``prefix`` and the visible directories below it; return the files seen."""
+        files: list[str] = []
+        pending = [(prefix, rules)]
+        while pending:
+            prefix, rules = pending.pop()
+            current = os.path.join(self.root, prefix) if prefix else self.root  # noqa: PTH118
+            # Watch before listing, so nothing created in between goes unseen.
+            try:
+                self._dirs[self._inotify.add(current)] = prefix.rstrip("/")
+                with os.scandir(current) as it:
+                    listing = list(it)
+            except (FileNotFoundError, NotADirectoryError, PermissionError):
+                continue  # gone already, or unreadable (the walker skips those too)
+            if any(e.name == ".gitignore" for e in listing):
+                rules = self.matcher.enter(rules, os.path.join(current, ".gitignore"), prefix)  # noqa: PTH118
+            self.rules[prefix.rstrip("/")] = rules
+            for entry in listing:
+                rel = prefix + entry.name
+                try:
+                    if entry.is_symlink():
+                        continue
+                    if entry.is_dir():
+                        if self.matcher.visit_dir(entry.name, rel, rules):
+                            pending.append((rel + "/", rules))
+                    else:
+                        files.append(rel)
+                except OSError:
+                    continue
+        return files
+
+    def _forget(self, prefix: str) -> None:
+        """Stop watching ``prefix`` and everything below it."""
+        for wd, path in list(self._dirs.items()):
+            if path == prefix or path.startswith(prefix + "/"):
+                self._inotify.remove(wd)
+                del self._dirs[wd]
+                self.rules.pop(path, None)
+
+    def next_batch(self, timeout: float | None = None) -> Batch:
+        """Block for the first event (up to ``timeout``), then debounce."""
+        batch = Batch()
+        events = self._inotify.read(timeout)
+        started = time.monotonic()
+        while events:
+            self._apply(events, batch)
+            if time.monotonic() - started > _MAX_WAIT:
+                break
+            events = self._inotify.read(self.debounce)
+        return batch
+
+    def _apply(self, events: list[tuple[int, int, str]], batch: Batch) -> None:
+        for wd, mask, name in events:
+            if mask & IN_Q_OVERFLOW:
+                batch.rescan = True
+                continue
+            directory = self._dirs.get(wd)
+            if directory is None:
+                continue
+            if mask & IN_IGNORED:
+                del self._dirs[wd]
+                continue
+            if not name:
+                continue  # IN_DELETE_SELF / IN_MOVE_SELF: reported via the parent
+            rel = f"{directory}/{name}" if directory else name
+            if name == ".gitignore":
+                batch.rescan = True
+            elif mask & IN_ISDIR:
+                if mask & (IN_DELETE | IN_MOVED_FROM):
+                    self._forget(rel)
+                    batch.gone_dirs.add(rel)
+                elif mask & (IN_CREATE | IN_MOVED_TO) and self.matcher.visit_dir(
+                    name, rel, self.rules.get(directory)
+                ):
+                    try:
+                        batch.files.update(self._add_tree(rel + "/", self.rules.get(directory)))
+                    except OSError:
+                        batch.rescan = True
+            else:
+                batch.files.add(rel)
+
+    def close(self) -> None:
+        self._inotify.close()
+
+
+class PollingWatcher:
+    """Fallback: re-walk every ``interval`` seconds (cheap with the scan cache) and diff."""
+
+    def __init__(
+        self, walk_fn: Callable[[], list[FileEntry]], entries: list[FileEntry], interval: float
+    ) -> None:
+        self.walk_fn = walk_fn
+        self.interval = interval
+        self._stamps = _stamps(entries)
+        self.rules: dict[str, CompiledSpec | None] = {}
+
+    def next_batch(self, timeout: float | None = None) -> Batch:
+        time.sleep(self.interval if timeout is None else min(timeout, self.interval))
+        entries = self.walk_fn()
+        stamps = _stamps(entries)
+        if stamps == self._stamps:
+            return Batch()
+        self._stamps = stamps
+        return Batch(entries=entries)
+
+    def close(self) -> None:
+        pass
+
+
+def _stamps(entries: list[FileEntry]) -> dict[str, tuple[int, int]]:
+    return {e.rel_path.as_posix(): (e.size, e.mtime_ns) for e in entries}
+
+
+def _write_all(fd: int, data: bytes) -> None:
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
+
+
+class LiveBundle:
+    """
+    An output file plus the walk key and byte length of each section in it,
+    in order. ``update`` writes the next version by splicing, then atomically
+    replaces the file.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        fmt: str,
+        include_tree: bool = True,
+        cache: ScanCache | None = None,
+        pipeline: Pipeline | None = None,
+    ) -> None:
+        self.path = path
+        self.fmt = fmt
+        self.include_tree = include_tree
+        self.cache = cache
+        self.pipeline = pipeline
+        self.renderer: Renderer = get_renderer(fmt, include_tree)
+        self.keys: list[str] = []
+        self.lengths: list[int] = []
+        self.head = 0
+        self.size = 0
+        self._written: tuple[int, int] | None = None
+
+    @property
+    def _tmp(self) -> Path:
+        return self.path.with_name(f".{self.path.name}.tmp")
+
+    def _commit(self, keys: list[str], lengths: list[int], head: int) -> None:
+        self._tmp.replace(self.path)
+        st = self.path.stat()
+        self.keys = list(keys)
+        self.lengths = lengths
+        self.head = head
+        self.size = st.st_size
+        self._written = (st.st_ino, st.st_mtime_ns)
+
+    def write_full(self, entries: list[FileEntry], keys: list[str]) -> int:
+        sections: list[tuple[int, int]] = []
+        with self._tmp.open("wb") as fh:
+            render_to(
+                entries, self.fmt, fh, self.include_tree, cache=self.cache, sections=sections,
+                pipeline=self.pipeline,
+            )
+        head = sections[0][0] if sections else 0
+        self._commit(keys, [end - start for start, end in sections], head)
+        return self.size
+
+    def _intact(self) -> bool:
+        """False if someone else rewrote the output since we last did."""
+        try:
+            st = self.path.stat()
+        except OSError:
+            return False
+        return (st.st_ino, st.st_mtime_ns) == self._written and st.st_size == self.size
+
+    def _plan(self, keys: list[str], dirty: set[str]) -> tuple[set[int], list[int]]:
+        """
+        Indices in ``keys`` whose sections must be rendered, and every index at
+        which a run of reusable sections has to break (rendered sections, and
+        the places old sections were removed).
+        """
+        old = self.keys
+        if keys == old:
+            edits = {bisect.bisect_left(keys, key) for key in dirty}
+            return edits, sorted(edits)
+        before, after = set(old), set(keys)
+        edits = {bisect.bisect_left(keys, key) for key in (after - before) | (dirty & after)}
+        # A section's leading separator depends on whether it comes first.
+        if keys[0] != old[0]:
+            edits.add(0)
+            if old[0] in after:
+                edits.add(bisect.bisect_left(keys, old[0]))
+        gaps = {bisect.bisect_left(keys, key) for key in before - after}
+        return edits, sorted(edits | gaps)
+
+    def update(self, entries: list[FileEntry], keys: list[str], dirty: set[str]) -> int:
+        """
+        Write a bundle of ``entries`` (whose walk keys are ``keys``), rendering
+        only the sections whose keys are in ``dirty`` or that are new. Runs of
+        untouched sections are copied from the old file in one range each.
+        """
+        if not self._intact() or not self.keys or not keys:
+            return self.write_full(entries, keys)
+        same_set = keys == self.keys
+        edits, breaks = self._plan(keys, dirty)
+        offsets = list(itertools.accumulate(self.lengths, initial=self.head))
+        lengths: list[int] = []
+        src = os.open(self.path, os.O_RDONLY)
+        try:
+            dst = os.open(self._tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+            try:
+                out = _Spliced(src, dst)
+                if same_set:
+                    out.copy(0, self.head)
+                else:
+                    out.write(self.renderer.header(entries).encode())
+                head = out.pos
+                i = 0
+                for stop in [*breaks, len(keys)]:
+                    if i < stop:
+                        # Untouched run: the same sections, consecutive in the old file.
+                        j = bisect.bisect_left(self.keys, keys[i])
+                        out.copy(offsets[j], offsets[j + stop - i])
+                        lengths.extend(self.lengths[j:j + stop - i])
+                        i = stop
+                    if stop in edits:
+                        entry = entries[stop]
+                        section = render_section(
+                            entry, self.renderer, stop == 0, self.cache, self.pipeline
+                        )
+                        out.write(section)
+                        lengths.append(len(section))
+                        i = stop + 1
+                if same_set:
+                    out.copy(offsets[-1], self.size)
+                else:
+                    out.write(self.renderer.footer(entries).encode())
+                out.flush()
+            finally:
+                os.close(dst)
+        finally:
+            os.close(src)
+        self._commit(keys, lengths, head)
+        return self.size
+
+
+class _Spliced:
+    """Destination writer that coalesces adjacent source ranges into one copy."""
+
+    def __init__(self, src: int, dst: int) -> None:
+        self.src, self.dst = src, dst
+        self.pos = 0
+        self._run: tuple[int, int] | None = None
+
+    def copy(self, start: int, end: int) -> None:
+        if self._run is not None and self._run[1] == start:
+            self._run = (self._run[0], end)
+        else:
+            self.flush()
+            self._run = (start, end)
+        self.pos += end - start
+
+    def write(self, data: bytes) -> None:
+        self.flush()
+        _write_all(self.dst, data)
+        self.pos += len(data)
+
+    def flush(self) -> None:
+        if self._run is not None:
+            start, end = self._run
+            if copy_range(self.src, self.dst, start, end - start) != end - start:
+                raise OSError(f"short copy at offset {start}")
+            self._run = None
+
+
+@dataclass
+class Update:
+    """What one debounced round changed, for reporting."""
+    changed: int
+    added: int
+    removed: int
+    bytes: int
+    seconds: float
+
+
+class LiveIndex:
+    """
+    The walk of one config, kept current: entries in walk order with their
+    walk keys, a watcher, and ``apply`` to fold a watcher batch in. Paths in
+    ``skip`` are never listed.
+    """
+
+    def __init__(
+        self,
+        config: CollectorConfig,
+        cache: ScanCache | None = None,
+        debounce: float = 0.05,
+        poll_interval: float = 1.0,
+        force_polling: bool = False,
+        skip: frozenset[Path] = frozenset(),
+    ) -> None:
+        self.root = config.root.resolve()
+        self.config = config
+        self.cache = cache
+        self.matcher = IgnoreMatcher(self.root, config)
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.force_polling = force_polling
+        self._skip = skip
+        self.entries = self._walk()
+        self.keys = [walk_key(e.rel_path.as_posix()) for e in self.entries]
+        self.watcher: InotifyWatcher | PollingWatcher = self._watcher()
+
+    def _walk(self) -> list[FileEntry]:
+        # Nothing keeps handed-off bytes past the first render, so don't collect them.
+        entries = walk(replace(self.config, handoff_budget=0), self.cache)
+        out = [e for e in entries if e.path not in self._skip]
+        if self.cache is not None:
+            self.cache.flush()
+        return out
+
+    def _watcher(self) -> InotifyWatcher | PollingWatcher:
+        if not self.force_polling:
+            try:
+                return InotifyWatcher(self.root, self.config, self.matcher, self.debounce)
+            except (OSError, AttributeError):
+                pass  # not Linux, no libc inotify, or out of watches
+        return PollingWatcher(self._walk, self.entries, self.poll_interval)
+
+    @property
+    def method(self) -> str:
+        return "inotify" if isinstance(self.watcher, InotifyWatcher) else "polling"
+
+    def _probe(self, rel: str) -> FileEntry | None:
+        parent = rel.rpartition("/")[0]
+        if parent not in self.watcher.rules or self.root / rel in self._skip:
+            return None
+        rules = self.watcher.rules[parent]
+        return probe(self.root, rel, self.config, self.matcher, rules, self.cache)
+
+    def _remove(self, index: int) -> None:
+        del self.entries[index]
+        del self.keys[index]
+
+    def apply(self, batch: Batch) -> tuple[set[str], int, int]:
+        """Fold a batch into ``entries``; return (dirty paths, added, removed)."""
+        if batch.rescan or batch.entries is not None:
+            if batch.rescan:
+                self.watcher.close()
+                self.matcher = IgnoreMatcher(self.root, self.config)
+                new = self._walk()
+                self.watcher = self._watcher()
+            else:
+                new = batch.entries or []
+            old = _stamps(self.entries)
+            dirty = {
+                rel for rel, stamp in _stamps(new).items() if old.get(rel) != stamp
+            }
+            added = sum(e.rel_path.as_posix() not in old for e in new)
+            removed = len(old) - (len(new) - added)
+            self.entries = new
+            self.keys = [walk_key(e.rel_path.as_posix()) for e in new]
+            return dirty, added, removed
+
+        dirty: set[str] = set()
+        added = removed = 0
+        for prefix in batch.gone_dirs:
+            # Everything under a directory is one contiguous run in walk order.
+            dir_key = "".join(f"0{d.lower()}\1{d}\0" for d in prefix.split("/"))
+            lo = bisect.bisect_left(self.keys, dir_key)
+            hi = bisect.bisect_left(self.keys, dir_key + "\U0010ffff")
+            del self.entries[lo:hi]
+            del self.keys[lo:hi]
+            removed += hi - lo
+        for rel in batch.files:
+            key = walk_key(rel)
+            i = bisect.bisect_left(self.keys, key)
+            present = i < len(self.keys) and self.keys[i] == key
+            entry = self._probe(rel)
+            if entry is None:
+                if present:
+                    self._remove(i)
+                    removed += 1
+                continue
+            if present:
+                old = self.entries[i]
+                if (old.size, old.mtime_ns) == (entry.size, entry.mtime_ns):
+                    continue
+                self.entries[i] = entry
+            else:
+                self.entries.insert(i, entry)
+                self.keys.insert(i, key)
+                added += 1
+            dirty.add(rel)
+        return dirty, added, removed
+
+    def refresh(self) -> tuple[set[str], int, int]:
+        """
+        Fold in every change already reported, without waiting for more
+        (beyond the watcher's debounce); returns what ``apply`` would.
+        """
+        dirty: set[str] = set()
+        added = removed = 0
+        while batch := self.watcher.next_batch(timeout=0):
+            changed, n_added, n_removed = self.apply(batch)
+            dirty |= changed
+            added += n_added
+            removed += n_removed
+        if dirty and self.cache is not None:
+            self.cache.flush()
+        return dirty, added, removed
+
+    def close(self) -> None:
+        self.watcher.close()
+
+
+class Session:
+    """
+    The watch loop's state: a ``LiveIndex`` of the tree and the live bundle.
+    ``run`` yields one ``Update`` per rewrite.
+    """
+
+    def __init__(
+        self,
+        config: CollectorConfig,
+        output: Path,
+        cache: ScanCache | None = None,
+        debounce: float = 0.05,
+        poll_interval: float = 1.0,
+        force_polling: bool = False,
+    ) -> None:
+        self.cache = cache
+        self.output = output.resolve()
+        skip = frozenset({self.output, self.output.with_name(f".{self.output.name}.tmp")})
+        self.index = LiveIndex(config, cache, debounce, poll_interval, force_polling, skip)
+        self.bundle = LiveBundle(
+            self.output, config.output_format, config.show_tree, cache,
+            Pipeline.from_config(config),
+        )
+
+    @property
+    def entries(self) -> list[FileEntry]:
+        return self.index.entries
+
+    @property
+    def method(self) -> str:
+        return self.index.method
+
+    def start(self) -> int:
+        """Write the initial bundle; returns its size."""
+        return self.bundle.write_full(self.index.entries, self.index.keys)
+
+    def run(self) -> Iterator[Update]:
+        index = self.index
+        while True:
+            batch = index.watcher.next_batch()
+            if not batch:
+                continue
+            started = time.perf_counter()
+            dirty, added, removed = index.apply(batch)
+            if not dirty and not removed:
+                continue
+            n_bytes = self.bundle.update(
+                index.entries, index.keys, {walk_key(rel) for rel in dirty}
+            )
+            if self.cache is not None:
+                self.cache.flush()
+            yield Update(
+                len(dirty) - added, added, removed, n_bytes, time.perf_counter() - started
+            )
+
+    def close(self) -> None:
+        self.index.close()
+        if self.cache is not None:
+            self.cache.flush()